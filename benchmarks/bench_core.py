@@ -0,0 +1,70 @@
+import os
+import sys
+import shutil
+import subprocess
+from brag.cache import invalidate
+from brag.doc_utils import add_entry, read_history, purge_entries_between
+from brag.category_utils import find_closest_category, extract_categories_from_history
+from brag.tombstones import compact, get_log_path
+from brag.journal import GroupCommit, get_journal
+
+ROUNDS = int(os.environ.get("BRAG_BENCH_ROUNDS", "5"))
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_add_entry(benchmark, brag_doc):
+    benchmark(add_entry, "Benchmarked the append path", "Performance")
+
+def test_add_entry_group_commit(benchmark, brag_doc):
+    journal = get_journal(brag_doc)
+    journal.policy = GroupCommit(entries=32, ms=20)
+    benchmark(add_entry, "Benchmarked the append path", "Performance")
+    journal.close()
+
+def test_read_history_cold(benchmark, brag_doc):
+    def cold_read():
+        invalidate()
+        return read_history()
+
+    lines = benchmark(cold_read)
+    assert len(lines) > 2
+
+def test_read_history_cached(benchmark, brag_doc):
+    read_history()
+    benchmark(read_history)
+
+def test_find_closest_category(benchmark, brag_doc):
+    history = read_history()
+    benchmark.pedantic(find_closest_category, args=("Optimised the search index cutting latency by 40%", history),
+                       rounds=ROUNDS, iterations=1)
+
+def test_extract_categories_from_history(benchmark, brag_doc):
+    history = read_history()
+    categories = benchmark(extract_categories_from_history, history)
+    assert categories
+
+def _restore(corpus_path, brag_doc):
+    shutil.copyfile(corpus_path, brag_doc)
+    if os.path.exists(get_log_path(brag_doc)):
+        os.remove(get_log_path(brag_doc))
+    invalidate()
+
+def test_purge_entries_between(benchmark, brag_doc, corpus_path):
+    result = benchmark.pedantic(purge_entries_between, args=("2021-01-01", "2021-12-31"),
+                                setup=lambda: _restore(corpus_path, brag_doc), rounds=ROUNDS, iterations=1)
+    assert result.removed > 0
+
+def test_compact(benchmark, brag_doc, corpus_path):
+    def purged():
+        _restore(corpus_path, brag_doc)
+        purge_entries_between("2021-01-01", "2021-12-31")
+
+    removed = benchmark.pedantic(compact, setup=purged, rounds=ROUNDS, iterations=1)
+    assert removed > 0
+
+def test_cli_cold_start(benchmark, brag_env):
+    env = dict(os.environ, HOME=str(brag_env), XDG_DATA_HOME=str(brag_env), BRAG_NO_DAEMON="1")
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (PACKAGE_ROOT, env.get("PYTHONPATH")) if p)
+    command = [sys.executable, "-m", "brag.cli", "category", "show"]
+    result = benchmark.pedantic(subprocess.run, args=(command,), kwargs={"env": env, "capture_output": True},
+                                rounds=ROUNDS, iterations=1)
+    assert result.returncode == 0
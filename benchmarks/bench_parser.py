@@ -0,0 +1,85 @@
+"""
+Entry parser benchmarks over the lines of the corpus. The categories and purge-scan groups time the
+current code against the code it replaced, kept here as legacy_* and copied unchanged from before
+the shared parser (brag/category_utils.py and purge_entries_between in brag/doc_utils.py). The
+parse-lines group times category_utils.parse_brag_line, which kept its string splitting, against
+the parser's per-line match and its buffer scan.
+"""
+from datetime import datetime
+import pytest
+from brag import parser
+from brag.category_utils import extract_categories_from_history, parse_brag_line
+from brag.constants import BRAG_ENTRY_PREFIX, DATE_FORMAT, TIMESTAMP_FORMAT
+
+def legacy_extract_categories_from_history(history_lines):
+    categories = set()
+    for line in history_lines:
+        if line.startswith(BRAG_ENTRY_PREFIX):
+            # Try to extract category (assume category is in square brackets after timestamp)
+            parts = line.split("] ", 1)
+            if len(parts) == 2:
+                rest = parts[1]
+                if rest.startswith("["):
+                    cat_end = rest.find("]")
+                    if cat_end != -1:
+                        category = rest[1:cat_end].strip()
+                        if category:
+                            categories.add(category)
+    return sorted(categories)
+
+def legacy_purge_count(lines, start_date, end_date):
+    """The counting loop of purge_entries_between, without its rewrite of the doc."""
+    entries = [line for line in lines if line.startswith("- [")]
+    start_dt = datetime.strptime(start_date, DATE_FORMAT).date()
+    end_dt = datetime.strptime(end_date, DATE_FORMAT).date()
+    removed = 0
+    for entry in entries:
+        try:
+            ts = entry.split(']')[0][3:]
+            entry_dt = datetime.strptime(ts, TIMESTAMP_FORMAT).date()
+            if start_dt <= entry_dt <= end_dt:
+                removed += 1
+                continue
+        except Exception:
+            pass
+    return removed
+
+@pytest.fixture(scope="module")
+def lines(corpus_path):
+    with open(corpus_path, "r") as f:
+        return f.readlines()
+
+@pytest.mark.benchmark(group="parse-lines")
+def test_parse_brag_line(benchmark, lines):
+    benchmark(lambda: [parse_brag_line(line) for line in lines])
+
+@pytest.mark.benchmark(group="parse-lines")
+def test_parse_line(benchmark, lines):
+    parsed = benchmark(lambda: [parser.parse_line(line) for line in lines])
+    assert [fields[1:] for fields in parsed if fields] == [parse_brag_line(line) for line in lines[2:]]
+
+@pytest.mark.benchmark(group="parse-lines")
+def test_parse_buffer(benchmark, lines):
+    buffer = "".join(lines)
+    parsed = benchmark(lambda: list(parser.iter_fields_in(buffer)))
+    assert len(parsed) == len(lines) - 2
+
+@pytest.mark.benchmark(group="categories")
+def test_extract_categories_legacy(benchmark, lines):
+    benchmark(legacy_extract_categories_from_history, lines)
+
+@pytest.mark.benchmark(group="categories")
+def test_extract_categories(benchmark, lines):
+    categories = benchmark(extract_categories_from_history, lines)
+    assert categories == legacy_extract_categories_from_history(lines)
+
+@pytest.mark.benchmark(group="purge-scan")
+def test_purge_scan_legacy(benchmark, lines):
+    benchmark(legacy_purge_count, lines, "2021-01-01", "2021-12-31")
+
+@pytest.mark.benchmark(group="purge-scan")
+def test_purge_scan(benchmark, lines):
+    def count():
+        return sum("2021-01-01" <= day <= "2021-12-31" for day in parser.days_in("".join(lines)))
+
+    assert benchmark(count) == legacy_purge_count(lines, "2021-01-01", "2021-12-31")
@@ -0,0 +1,100 @@
+"""
+Benchmark suite setup. Benchmarks live in bench_*.py so the regular test run never picks them up;
+they are collected only when this directory is passed to pytest:
+
+    python -m pytest benchmarks
+
+Corpus sizes come from BRAG_BENCH_SIZES (default 10000; e.g. "10000,100000,1000000"). Results
+are compared against benchmarks/baseline.json and the run fails when the fastest round (min,
+the figure least affected by machine noise) regresses by more than 50%. Pass your own --benchmark-compare/--benchmark-compare-fail to
+override, or --benchmark-json=benchmarks/baseline.json to record a new baseline.
+
+The baseline is machine-specific: it was recorded with pytest-benchmark 5.3.0 (pinned in
+requirements.txt) on one machine, and slower machines fail the comparison without any regression.
+Record a local baseline from a clean checkout before comparing changes on another machine.
+"""
+import os
+import shutil
+import pytest
+from brag import constants
+from brag.cache import invalidate
+from corpus import write_corpus
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_SIZES = "10000"
+DEFAULT_COMPARE_FAIL = "min:50%"
+CORPUS_SEED = 42
+
+def _benchmarks_requested(config) -> bool:
+    for arg in config.args:
+        path = os.path.abspath(str(arg).split("::")[0])
+        if path == BENCH_DIR or path.startswith(BENCH_DIR + os.sep):
+            return True
+    return False
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    if not _benchmarks_requested(config) or not os.path.exists(BASELINE_PATH):
+        return
+    if config.getoption("benchmark_json", None):
+        return  # recording a new baseline
+    if not config.getoption("benchmark_compare", None):
+        config.option.benchmark_compare = BASELINE_PATH
+    if not config.getoption("benchmark_compare_fail", None):
+        from pytest_benchmark.utils import parse_compare_fail
+        config.option.benchmark_compare_fail = [parse_compare_fail(DEFAULT_COMPARE_FAIL)]
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    # Keep the stored baseline small and free of host names.
+    output_json["machine_info"].pop("node", None)
+    for bench in output_json["benchmarks"]:
+        bench["stats"].pop("data", None)
+
+def pytest_collect_file(file_path, parent):
+    if file_path.suffix != ".py" or not file_path.name.startswith("bench_"):
+        return None
+    if parent.session.isinitpath(file_path):
+        return None  # passed explicitly, so pytest's own collector already picks it up
+    if _benchmarks_requested(parent.config):
+        return pytest.Module.from_parent(parent, path=file_path)
+    return None
+
+def _size_id(size: int) -> str:
+    if size % 1_000_000 == 0:
+        return f"{size // 1_000_000}m"
+    if size % 1000 == 0:
+        return f"{size // 1000}k"
+    return str(size)
+
+def pytest_generate_tests(metafunc):
+    if "corpus_size" in metafunc.fixturenames:
+        sizes = [int(size) for size in os.environ.get("BRAG_BENCH_SIZES", DEFAULT_SIZES).split(",") if size.strip()]
+        metafunc.parametrize("corpus_size", sizes, ids=[_size_id(size) for size in sizes], scope="module")
+
+@pytest.fixture(scope="module")
+def corpus_path(request, corpus_size):
+    """A generated corpus of corpus_size entries, cached across runs in the pytest cache dir."""
+    directory = request.config.cache.mkdir("brag_corpus")
+    path = os.path.join(str(directory), f"bragdoc-{corpus_size}-{CORPUS_SEED}.md")
+    if not os.path.exists(path):
+        write_corpus(path + ".tmp", corpus_size, seed=CORPUS_SEED)
+        os.replace(path + ".tmp", path)
+    return path
+
+@pytest.fixture
+def brag_env(tmp_path):
+    """Point brag at an empty test directory."""
+    original = (constants.IS_TESTING, constants.TEST_DIR)
+    constants.IS_TESTING, constants.TEST_DIR = True, str(tmp_path)
+    invalidate()
+    yield tmp_path
+    invalidate()
+    constants.IS_TESTING, constants.TEST_DIR = original
+
+@pytest.fixture
+def brag_doc(brag_env, corpus_path):
+    """A copy of the corpus installed as the brag doc."""
+    path = os.path.join(str(brag_env), constants.BRAG_DOC_FILENAME)
+    shutil.copyfile(corpus_path, path)
+    return path
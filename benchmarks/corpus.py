@@ -0,0 +1,74 @@
+"""
+Deterministic synthetic brag docs for benchmarks.
+
+The same (size, seed) always produces the same file: timestamps increase steadily over several
+years, categories follow a Zipf distribution and messages are assembled from templates.
+
+    python benchmarks/corpus.py 100000 /tmp/bragdoc.md --seed 1
+"""
+import argparse
+import itertools
+import random
+from datetime import datetime, timedelta
+from typing import Iterator
+from brag.constants import BRAG_DOC_HEADER, CATEGORY_FORMAT, TIMESTAMP_FORMAT
+
+CATEGORIES = [
+    "Backend", "Frontend", "Infrastructure", "Mentoring", "Documentation", "Testing", "Security",
+    "Performance", "Data", "Machine Learning", "Hiring", "On-call", "Design", "Open Source",
+    "Mobile", "Accessibility", "Observability", "Release", "Developer Experience", "Community",
+]
+VERBS = [
+    "Shipped", "Refactored", "Designed", "Migrated", "Automated", "Debugged", "Reviewed",
+    "Documented", "Optimised", "Launched", "Led", "Mentored", "Prototyped", "Stabilised",
+]
+OBJECTS = [
+    "the billing service", "the onboarding flow", "the CI pipeline", "the search index",
+    "the release process", "the metrics dashboard", "the auth layer", "the mobile client",
+    "the data export job", "the alerting rules", "the API gateway", "the design system",
+]
+OUTCOMES = [
+    "cutting latency by {n}%", "saving {n} engineer-hours a month", "unblocking {n} teams",
+    "closing {n} long-standing bugs", "reducing cost by {n}%", "for {n} new customers",
+    "ahead of schedule", "with zero downtime", "after {n} rounds of review",
+]
+
+DEFAULT_START = datetime(2019, 1, 1, 9, 0, 0)
+DEFAULT_YEARS = 5
+UNCATEGORISED_SHARE = 0.1
+
+def iter_corpus_lines(size: int, seed: int = 0, start: datetime = DEFAULT_START,
+                      years: int = DEFAULT_YEARS, zipf_s: float = 1.1) -> Iterator[str]:
+    """Yield size brag entry lines, oldest first."""
+    rng = random.Random(seed)
+    cum_weights = list(itertools.accumulate(1 / rank ** zipf_s for rank in range(1, len(CATEGORIES) + 1)))
+    step = timedelta(days=365 * years).total_seconds() / max(size, 1)
+    when = start
+    for _ in range(size):
+        when += timedelta(seconds=step * rng.uniform(0.2, 1.8))
+        message = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(OUTCOMES).format(n=rng.randint(2, 90))}"
+        timestamp = when.strftime(TIMESTAMP_FORMAT)
+        if rng.random() < UNCATEGORISED_SHARE:
+            yield f"- [{timestamp}] {message}\n"
+        else:
+            category = rng.choices(CATEGORIES, cum_weights=cum_weights)[0]
+            yield f"- [{timestamp}] {CATEGORY_FORMAT.format(category=category)} {message}\n"
+
+def write_corpus(path: str, size: int, seed: int = 0, **kwargs) -> str:
+    """Write a brag doc with size synthetic entries to path and return path."""
+    with open(path, "w", buffering=1 << 20) as f:
+        f.write(BRAG_DOC_HEADER)
+        f.writelines(iter_corpus_lines(size, seed, **kwargs))
+    return path
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic brag doc.")
+    parser.add_argument("size", type=int, help="Number of entries.")
+    parser.add_argument("path", help="Output file.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--years", type=int, default=DEFAULT_YEARS)
+    args = parser.parse_args()
+    write_corpus(args.path, args.size, args.seed, years=args.years)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Data access for the Streamlit app. Every loader takes the identity of the data it reads as its
+arguments: the file keys (inode, size, mtime_ns) of the brag doc with its tombstone log and of the
+profile, and the HEAD sha for git history. Wrapped in st.cache_data, a rerun with unchanged keys
+costs a few stat calls and no reads.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from brag.cache import FileKey, file_key, invalidate
+from brag.doc_utils import get_brag_doc_path, page_entries
+from brag.profile import get_profile, get_profile_path, get_profile_store
+
+DocKey = Tuple[FileKey, FileKey]  # the brag doc and its tombstone log
+
+class DataKeys(NamedTuple):
+    doc: DocKey
+    profile: FileKey
+    head: Optional[str]
+
+def current_keys() -> DataKeys:
+    """Return the current identity of the brag doc, the profile and the brag repo's HEAD."""
+    from brag.git_utils import read_head_sha
+    from brag.tombstones import get_log_path
+    from brag.journal import recover
+    brag_doc = get_brag_doc_path()
+    recover(brag_doc)
+    doc_key = (file_key(brag_doc), file_key(get_log_path(brag_doc)))
+    return DataKeys(doc_key, file_key(get_profile_path()), read_head_sha())
+
+def load_history_page(doc_key: DocKey, page: int, page_size: int, since: Optional[str] = None,
+                      until: Optional[str] = None, category: Optional[str] = None,
+                      query: Optional[str] = None) -> Tuple[List[Dict[str, Any]], bool]:
+    """Return one page of entries, newest first, as dicts, and whether more pages follow."""
+    entries, has_more = page_entries(page, page_size, since=since, until=until,
+                                     category=category, query=query)
+    return [entry.to_dict() for entry in entries], has_more
+
+def load_categories(doc_key: DocKey) -> List[str]:
+    """Return the categories used in the brag doc."""
+    from brag.category_utils import get_categories
+    return get_categories()
+
+def load_profile(profile_key: FileKey) -> Dict[str, Any]:
+    """Return the profile. profile_key only identifies the version being read."""
+    return get_profile()
+
+def load_git_history(head: Optional[str], limit: int) -> List[Any]:
+    """Return up to limit commits of the brag repo, or an empty list without a repo."""
+    if head is None:
+        return []
+    from brag.git_utils import get_git_history
+    try:
+        return get_git_history(limit=limit)
+    except Exception:
+        return []
+
+def invalidate_doc() -> None:
+    """Forget in-process state cached for the brag doc."""
+    invalidate(get_brag_doc_path())
+
+def invalidate_profile() -> None:
+    """Forget in-process state cached for the profile."""
+    get_profile_store().invalidate()
@@ -0,0 +1,243 @@
+"""
+Compressed archive tier for old entries.
+
+`brag archive --before DATE` moves older entries out of the brag doc into immutable compressed
+blocks (zstd when the zstandard package is installed, gzip otherwise) in an `archive` directory
+next to the doc. A small index records each block's first and last timestamp, so readers only
+open the blocks whose date range overlaps their query. The doc itself stays small, which keeps
+reads of recent history and git diffs cheap.
+"""
+import os
+import json
+import gzip
+import heapq
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from brag import trace
+from brag.cache import cached, invalidate
+from brag.doc_utils import get_brag_doc_path
+from brag.parser import entry_day, parse_line
+from brag.constants import (
+    ARCHIVE_DIR_NAME, ARCHIVE_INDEX_FILE_NAME, ARCHIVE_BLOCK_ENTRIES, BRAG_ENTRY_PREFIX
+)
+
+class Block(NamedTuple):
+    file: str
+    first: str
+    last: str
+    entries: int
+
+    def overlaps(self, since: Optional[str], until: Optional[str]) -> bool:
+        """Return True if the block may hold entries between the inclusive YYYY-MM-DD bounds."""
+        return not (since and self.last[:10] < since) and not (until and self.first[:10] > until)
+
+def get_archive_dir(path: Optional[str] = None) -> str:
+    """Return the archive directory of the brag doc at path (the default doc if None)."""
+    return os.path.join(os.path.dirname(path or get_brag_doc_path()), ARCHIVE_DIR_NAME)
+
+def _index_path(archive_dir: str) -> str:
+    return os.path.join(archive_dir, ARCHIVE_INDEX_FILE_NAME)
+
+def load_blocks(path: Optional[str] = None) -> List[Block]:
+    """Return the archive blocks of the doc at path, oldest first. Empty if nothing is archived."""
+    index_path = _index_path(get_archive_dir(path))
+    if not os.path.exists(index_path):
+        return []
+    return cached("archive_index", index_path, lambda: _read_index(index_path))
+
+def _read_index(index_path: str) -> List[Block]:
+    try:
+        with open(index_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return sorted((Block(**block) for block in data.get("blocks", [])), key=lambda b: (b.first, b.file))
+
+def _write_index(archive_dir: str, blocks: List[Block]) -> None:
+    path = _index_path(archive_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"blocks": [block._asdict() for block in blocks]}, f, indent=1)
+    os.replace(tmp_path, path)
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+def _compress(data: bytes) -> Tuple[bytes, str]:
+    zstandard = _zstd()
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), ".zst"
+    return gzip.compress(data, compresslevel=9, mtime=0), ".gz"
+
+def _decompress(block_path: str) -> Tuple[str, ...]:
+    with open(block_path, "rb") as f:
+        data = f.read()
+    if block_path.endswith(".zst"):
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError(f"{block_path} is zstd-compressed; install zstandard to read it.")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        data = gzip.decompress(data)
+    return tuple(data.decode("utf-8").splitlines(keepends=True))
+
+def read_block(block: Block, path: Optional[str] = None) -> Tuple[str, ...]:
+    """Return the entry lines of a block. Blocks are immutable, so they are cached by file."""
+    block_path = os.path.join(get_archive_dir(path), block.file)
+    with trace.span("archive.read_block") as span:
+        lines = cached("archive_block", block_path, lambda: _decompress(block_path))
+        span.set(entries=len(lines))
+    return lines
+
+def iter_archived_lines(since: Optional[str] = None, until: Optional[str] = None,
+                        reverse: bool = False, path: Optional[str] = None) -> Iterator[str]:
+    """Yield archived entry lines from the blocks overlapping the date range, in doc order."""
+    from brag.tombstones import load_tombstones, is_hidden
+    blocks = [block for block in load_blocks(path) if block.overlaps(since, until)]
+    tombstones = load_tombstones(path) if blocks else ()
+    for block in reversed(blocks) if reverse else blocks:
+        lines = read_block(block, path)
+        lines = reversed(lines) if reverse else lines
+        if tombstones:
+            lines = (line for line in lines if not is_hidden(line, tombstones))
+        yield from lines
+
+def iter_lines_with_archive(lines: Iterator[str], path: Optional[str] = None, since: Optional[str] = None,
+                            until: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield the doc's lines with the archived entries spliced in before its first entry. Given a
+    date range, only the blocks overlapping it are read; the doc's lines are all yielded.
+    """
+    archived = False
+    for line in lines:
+        if not archived and line.startswith(BRAG_ENTRY_PREFIX):
+            archived = True
+            yield from iter_archived_lines(since, until, path=path)
+        yield line
+    if not archived:
+        yield from iter_archived_lines(since, until, path=path)
+
+def _next_sequence(blocks: List[Block]) -> int:
+    return max((int(block.file.rsplit("_", 1)[1].split(".")[0]) for block in blocks), default=-1) + 1
+
+def _write_block(archive_dir: str, lines: List[str], sequence: int) -> Block:
+    data, suffix = _compress("".join(lines).encode("utf-8"))
+    first, last = parse_line(lines[0])[0], parse_line(lines[-1])[0]
+    name = f"{first[:10]}_{last[:10]}_{sequence:04d}.md{suffix}"
+    with open(os.path.join(archive_dir, name), "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return Block(name, first, last, len(lines))
+
+def archive_before(date: str, path: Optional[str] = None, block_entries: int = ARCHIVE_BLOCK_ENTRIES) -> int:
+    """
+    Move entries dated before date (YYYY-MM-DD) from the brag doc into new archive blocks of at
+    most block_entries entries. The blocks and index are written before the doc is rewritten, so
+    an interruption can leave entries in both places but never loses one. Returns the number of
+    entries archived.
+    """
+    from brag.tombstones import compact
+    brag_doc = path or get_brag_doc_path()
+    if not os.path.exists(brag_doc):
+        return 0
+    with open(brag_doc, "r") as f:
+        if not any(day is not None and day < date for day in map(entry_day, f)):
+            return 0  # nothing to move: leave pending purges undoable
+    compact(brag_doc)  # tombstones treat archived entries as older than every purge
+    with open(brag_doc, "r") as f:
+        lines = f.readlines()
+    moved, kept = [], []
+    for line in lines:
+        day = entry_day(line)
+        (moved if day is not None and day < date else kept).append(line)
+    if not moved:
+        return 0
+    if not moved[-1].endswith("\n"):
+        moved[-1] += "\n"
+    with trace.span("archive.write") as span:
+        archive_dir = get_archive_dir(brag_doc)
+        os.makedirs(archive_dir, exist_ok=True)
+        blocks = list(load_blocks(brag_doc))
+        sequence = _next_sequence(blocks)
+        for start in range(0, len(moved), block_entries):
+            blocks.append(_write_block(archive_dir, moved[start:start + block_entries], sequence))
+            sequence += 1
+        _write_index(archive_dir, blocks)
+        tmp_path = f"{brag_doc}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(kept)
+        os.replace(tmp_path, brag_doc)
+        span.set(entries=len(moved), bytes=os.path.getsize(brag_doc))
+    invalidate(brag_doc)
+    return len(moved)
+
+def compact_blocks(ranges: List[Tuple[str, str]], hidden: Callable[[str], bool],
+                   path: Optional[str] = None) -> int:
+    """
+    Replace each block overlapping one of the (start, end) date ranges with a new block without
+    the lines hidden() selects, dropping blocks left empty. Returns the number of lines dropped.
+    """
+    blocks = load_blocks(path)
+    if not any(block.overlaps(start, end) for block in blocks for start, end in ranges):
+        return 0
+    archive_dir = get_archive_dir(path)
+    sequence = _next_sequence(blocks)
+    kept_blocks, stale, removed = [], [], 0
+    for block in blocks:
+        if not any(block.overlaps(start, end) for start, end in ranges):
+            kept_blocks.append(block)
+            continue
+        lines = read_block(block, path)
+        kept = [line for line in lines if not hidden(line)]
+        if len(kept) == len(lines):
+            kept_blocks.append(block)
+            continue
+        removed += len(lines) - len(kept)
+        stale.append(block.file)
+        if kept:
+            kept_blocks.append(_write_block(archive_dir, kept, sequence))
+            sequence += 1
+    _write_index(archive_dir, kept_blocks)
+    for name in stale:
+        os.remove(os.path.join(archive_dir, name))
+    return removed
+
+def merge_lines(lines: List[str], path: Optional[str] = None, block_entries: int = ARCHIVE_BLOCK_ENTRIES) -> int:
+    """
+    Merge entry lines, sorted by timestamp, into the archive in timestamp order. The blocks from
+    the first one ending after the oldest line on are rewritten; lines newer than the whole
+    archive go into new blocks. Returns the number of lines merged.
+    """
+    if not lines:
+        return 0
+    from brag.parser import TIMESTAMP, match_entry
+    blocks = load_blocks(path)
+    oldest = match_entry(lines[0]).group(TIMESTAMP)
+    kept = [block for block in blocks if block.last <= oldest]
+    stale = blocks[len(kept):]
+    archived = [line for block in stale for line in read_block(block, path)]
+    merged = list(heapq.merge(archived, lines, key=lambda line: match_entry(line).group(TIMESTAMP)))
+    archive_dir = get_archive_dir(path)
+    os.makedirs(archive_dir, exist_ok=True)
+    sequence = _next_sequence(blocks)
+    for start in range(0, len(merged), block_entries):
+        kept.append(_write_block(archive_dir, merged[start:start + block_entries], sequence))
+        sequence += 1
+    _write_index(archive_dir, kept)
+    for block in stale:
+        os.remove(os.path.join(archive_dir, block.file))
+    return len(lines)
+
+def archive_summary(path: Optional[str] = None) -> Dict[str, Any]:
+    """Return the number of blocks and entries in the archive and its date range."""
+    blocks = load_blocks(path)
+    return {
+        "blocks": len(blocks),
+        "entries": sum(block.entries for block in blocks),
+        "first": blocks[0].first if blocks else None,
+        "last": max(block.last for block in blocks) if blocks else None,
+    }
@@ -0,0 +1,116 @@
+"""
+Background generation for long-lived processes such as the Streamlit app. One pool is shared by
+every session: a request already running (same response cache key) is joined rather than sent
+again, partial output is readable while the model streams, and a running job can be cancelled.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import requests
+from brag.constants import GENERATION_WORKERS, GENERATION_JOBS_KEPT
+from brag.ollama_utils import (
+    GenerationRequest, GenerationCancelled, OllamaUnavailableError,
+    generate_stream, get_cached_response, put_cached_response, enqueue_job
+)
+
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+UNAVAILABLE = "unavailable"
+
+class GenerationJob:
+    """A generation running on the pool. text grows while the model streams."""
+
+    def __init__(self, request: GenerationRequest):
+        self.request = request
+        self.status = RUNNING
+        self.error: Optional[str] = None
+        self.started = time.time()
+        self._chunks = []
+        self._cancel = threading.Event()
+
+    @property
+    def key(self) -> str:
+        return self.request.key
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    @property
+    def running(self) -> bool:
+        return self.status == RUNNING
+
+    def cancel(self) -> None:
+        """Ask the job to stop; it does so at the next streamed chunk."""
+        self._cancel.set()
+
+    def _finish(self, status: str, text: Optional[str] = None, error: Optional[str] = None) -> None:
+        if text is not None:
+            self._chunks = [text]
+        self.error = error
+        self.status = status
+
+class GenerationPool:
+    """Runs generations on a bounded thread pool and deduplicates them by cache key."""
+
+    def __init__(self, max_workers: int = GENERATION_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="brag-generate")
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, request: GenerationRequest) -> GenerationJob:
+        """
+        Start a generation, or return the job already running or finished for the same key.
+        Cached responses complete immediately; failed and cancelled jobs are started again.
+        """
+        with self._lock:
+            job = self._jobs.get(request.key)
+            if job is not None and job.status in (RUNNING, DONE):
+                return job
+            job = GenerationJob(request)
+            cached = get_cached_response(request.key)
+            if cached is not None:
+                job._finish(DONE, text=cached)
+            else:
+                self._executor.submit(self._run, job)
+            self._jobs[request.key] = job
+            self._prune()
+            return job
+
+    def get(self, key: str) -> Optional[GenerationJob]:
+        """Return the job for key, if it is still known to the pool."""
+        return self._jobs.get(key)
+
+    def cancel(self, key: str) -> None:
+        job = self._jobs.get(key)
+        if job is not None:
+            job.cancel()
+
+    def shutdown(self) -> None:
+        """Cancel running jobs and stop the worker threads."""
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._executor.shutdown(wait=True)
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if not job.running]
+        for job in sorted(finished, key=lambda job: job.started)[:max(0, len(finished) - GENERATION_JOBS_KEPT)]:
+            del self._jobs[job.key]
+
+    def _run(self, job: GenerationJob) -> None:
+        request = job.request
+        try:
+            text = generate_stream(request.prompt, job._chunks.append, job._cancel)
+        except GenerationCancelled:
+            job._finish(CANCELLED)
+        except requests.exceptions.ConnectionError:
+            job_id = enqueue_job(request.key, request.prompt, request.label)
+            job._finish(UNAVAILABLE, error=str(OllamaUnavailableError(job_id)))
+        except Exception as e:
+            job._finish(FAILED, error=str(e))
+        else:
+            put_cached_response(request.key, text)
+            job._finish(DONE, text=text)
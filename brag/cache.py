@@ -0,0 +1,44 @@
+"""In-process caches keyed on file identity, so long-lived processes only re-read files that changed."""
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+FileKey = Optional[Tuple[int, int, int]]
+
+_entries: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+_lock = threading.Lock()
+
+def file_key(path: str) -> FileKey:
+    """Return (inode, size, mtime_ns) for path, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def cached(name: str, path: str, loader: Callable[[], Any], deps: Sequence[str] = ()) -> Any:
+    """
+    Return loader()'s result for path, reusing the previous result while the file, and any files
+    in deps it depends on, are unchanged. Missing files are never cached.
+    """
+    key = file_key(path)
+    if key is not None and deps:
+        key = (key,) + tuple(file_key(dep) for dep in deps)
+    slot = (name, path)
+    hit = _entries.get(slot)
+    if key is not None and hit is not None and hit[0] == key:
+        return hit[1]
+    value = loader()
+    if key is not None:
+        with _lock:
+            _entries[slot] = (key, value)
+    return value
+
+def invalidate(path: Optional[str] = None) -> None:
+    """Drop cached values for path, or everything if path is None."""
+    with _lock:
+        if path is None:
+            _entries.clear()
+            return
+        for slot in [slot for slot in _entries if slot[1] == path]:
+            del _entries[slot]
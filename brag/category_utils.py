@@ -2,6 +2,8 @@ import difflib
 from typing import List, Optional, Tuple
 from collections import Counter
 import os
+from brag import trace
+from brag.parser import categories_in, iter_fields_in
 from brag.constants import CATEGORY_FILE_NAME, BRAG_ENTRY_PREFIX
 
 def extract_categories_from_history(history_lines: List[str]) -> List[str]:
@@ -9,24 +11,19 @@ def extract_categories_from_history(history_lines: List[str]) -> List[str]:
     Extract unique categories from brag history lines.
     Assumes lines are in the format: '- [timestamp] [category] message' or '- [timestamp] message'.
     """
-    categories = set()
-    for line in history_lines:
-        if line.startswith(BRAG_ENTRY_PREFIX):
-            # Try to extract category (assume category is in square brackets after timestamp)
-            parts = line.split("] ", 1)
-            if len(parts) == 2:
-                rest = parts[1]
-                if rest.startswith("["):
-                    cat_end = rest.find("]")
-                    if cat_end != -1:
-                        category = rest[1:cat_end].strip()
-                        if category:
-                            categories.add(category)
+    with trace.span("category.extract", entries=len(history_lines)):
+        return _extract_categories(history_lines)
+
+def _extract_categories(history_lines: List[str]) -> List[str]:
+    categories = {category.strip() for category in set(categories_in("\n".join(history_lines)))}
+    categories.discard("")
     return sorted(categories)
 
 def parse_brag_line(line: str) -> Tuple[Optional[str], str]:
     """
     Parse a brag line and return (category, message).
+    Plain string splitting: per line it beats a regex match, whose match object alone costs more.
+    Scan many lines at once with brag.parser instead, which also rejects malformed timestamps.
     """
     if not line.startswith(BRAG_ENTRY_PREFIX):
         return (None, "")
@@ -49,31 +46,47 @@ def find_closest_category(new_message: str, history_lines: List[str], cutoff: fl
     Find the most likely category for new_message by majority voting among the top 3 most similar previous brag messages.
     Returns the most common category if there is a majority, else None.
     """
-    # Build a list of (category, message) from history
-    samples = [parse_brag_line(line) for line in history_lines if line.startswith(BRAG_ENTRY_PREFIX)]
-    messages = [msg for cat, msg in samples if msg]
-    if not messages:
-        return None
-    # Find top 3 closest messages
-    matches = difflib.get_close_matches(new_message, messages, n=3, cutoff=cutoff)
-    if not matches:
-        return None
-    # Get categories for these messages
-    matched_categories = []
-    for match in matches:
-        for cat, msg in samples:
-            if msg == match:
-                if cat:
-                    matched_categories.append(cat)
-                break
-    if not matched_categories:
+    with trace.span("category.find_closest", entries=len(history_lines)):
+        return _find_closest_category(new_message, history_lines, cutoff)
+
+def _find_closest_category(new_message: str, history_lines: List[str], cutoff: float) -> Optional[str]:
+    return Categoriser(history_lines, cutoff)(new_message)
+
+class Categoriser:
+    """
+    find_closest_category for many messages against the same history, which is parsed once.
+    Picklable, so it can be mapped over a process pool.
+    """
+
+    def __init__(self, history_lines: List[str], cutoff: float = 0.6):
+        # Build a list of (category, message) from history
+        self.samples = [(category, message) for _, category, message in iter_fields_in("\n".join(history_lines))]
+        self.messages = [msg for cat, msg in self.samples if msg]
+        self.cutoff = cutoff
+
+    def __call__(self, new_message: str) -> Optional[str]:
+        if not self.messages:
+            return None
+        # Find top 3 closest messages
+        matches = difflib.get_close_matches(new_message, self.messages, n=3, cutoff=self.cutoff)
+        if not matches:
+            return None
+        # Get categories for these messages
+        matched_categories = []
+        for match in matches:
+            for cat, msg in self.samples:
+                if msg == match:
+                    if cat:
+                        matched_categories.append(cat)
+                    break
+        if not matched_categories:
+            return None
+        # Majority vote
+        counter = Counter(matched_categories)
+        most_common, count = counter.most_common(1)[0]
+        if count > 1 or len(counter) == 1:
+            return most_common
         return None
-    # Majority vote
-    counter = Counter(matched_categories)
-    most_common, count = counter.most_common(1)[0]
-    if count > 1 or len(counter) == 1:
-        return most_common
-    return None
 
 def get_category_file_path() -> str:
     """Return the path to the .brag_category file in the brag doc directory."""
@@ -109,6 +122,16 @@ def list_categories(history_lines: List[str]) -> list:
     """Return a list of unique categories from brag history."""
     return extract_categories_from_history(history_lines)
 
+def get_categories() -> List[str]:
+    """
+    Return the unique categories in the brag doc and its archive, re-extracting them only when the
+    doc changes.
+    """
+    from brag.doc_utils import get_brag_doc_path, read_history, cached_doc
+    brag_doc = get_brag_doc_path()
+    return list(cached_doc("categories", brag_doc,
+                           lambda: extract_categories_from_history(read_history(include_archive=True))))
+
 def select_category_by_index(history_lines: List[str], index: int) -> str:
     """Return the category at the given index from the list of unique categories."""
     categories = list_categories(history_lines)
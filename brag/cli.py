@@ -1,30 +1,60 @@
+from brag import trace
 import typer
 from brag.doc_utils import init_brag_doc, add_entry, read_history, purge_entries_between
-from brag.git_utils import sync_with_git, get_git_history
-from brag.ollama_utils import (
-    summarize_brag_doc, generate_resume_bullets,
-    generate_profile_based_resume, generate_profile_based_summary
-)
 from datetime import datetime, timedelta
 import re
 from brag.category_utils import (
-    extract_categories_from_history, find_closest_category,
-    set_current_category, get_current_category, unset_current_category, change_current_category,
-    list_categories, select_category_by_index
+    find_closest_category, set_current_category, get_current_category, unset_current_category,
+    change_current_category, select_category_by_index, get_categories
 )
-from brag.profile import (
-    init_profile, get_profile, update_profile_field,
-    add_list_item, remove_list_item
+from brag.constants import (
+    PROFILE_FIELDS, BULLET_WORKERS, JOB_WORKERS, GIT_HISTORY_LIMIT, SEMANTIC_TOP_K, INGEST_WORKERS,
+    JOURNAL_FILE_NAME
 )
-from brag.constants import PROFILE_FIELDS
-from brag.prompts import PROFILE_GREETING
+import os
 import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import List
+from brag.completion import complete_category, complete_category_index, complete_profile_field
+
+# Heavy dependencies (GitPython, requests, pydantic) are imported inside the commands that use them,
+# so that frequent commands such as `brag add` don't pay for them at startup.
 
 app = typer.Typer(help="Brag CLI: Create and manage your brag document.")
 category_app = typer.Typer(help="Manage current brag category.")
 profile_app = typer.Typer(help="Manage your developer profile.")
+jobs_app = typer.Typer(help="Manage Ollama jobs queued while the server was unavailable.")
+workspace_app = typer.Typer(help="Manage named brag docs (workspaces) besides the default one.")
 app.add_typer(category_app, name="category")
 app.add_typer(profile_app, name="profile")
+app.add_typer(jobs_app, name="jobs")
+app.add_typer(workspace_app, name="workspace")
+trace.note_import("cli")
+
+@app.callback()
+def global_options(
+    ctx: typer.Context,
+    profile: bool = typer.Option(False, "--profile", help="Time each phase of the command and print a summary table to stderr.")
+):
+    started = time.perf_counter()
+    if profile:
+        trace.enable(collect=True)
+    from brag import doc_utils
+    brag_doc = doc_utils.get_brag_doc_path()
+    journal_path = os.path.join(os.path.dirname(brag_doc), JOURNAL_FILE_NAME)
+    if os.path.exists(journal_path) and os.path.getsize(journal_path):  # after a crash or mid-group
+        from brag.journal import recover
+        with trace.span("journal.recover"):
+            recover(brag_doc)
+
+    def finish():
+        trace.record(f"cli.{ctx.invoked_subcommand}", started)
+        if profile:
+            typer.echo(trace.summary(trace.stop_collecting()), err=True)
+
+    ctx.call_on_close(finish)
 
 def parse_relative_time(relative: str) -> str:
     """
@@ -57,17 +87,73 @@ def init():
     else:
         typer.echo("Brag doc already exists.")
 
+def _report_sync(result) -> None:
+    if result is None:
+        return
+    if result.commit is None:
+        typer.echo("No changes to commit.")
+    elif result.squashed:
+        typer.echo(f"Squashed changes into unpushed commit {result.commit[:7]}.")
+    if result.push_started:
+        typer.echo("Pushing in the background; run `brag sync --status` to check the result.")
+
+@contextmanager
+def _noting_compaction():
+    """Tell the user when the command compacted the doc, dropping purges they could still undo."""
+    from brag.tombstones import load_tombstones
+    had_undo = bool(load_tombstones())
+    yield
+    if had_undo and not load_tombstones():
+        typer.echo("Compacted the brag doc first, so earlier purges can no longer be undone.")
+
 @app.command()
-def sync():
+def sync(
+    foreground: bool = typer.Option(False, "--foreground", help="Wait for the push to finish instead of pushing in the background."),
+    status: bool = typer.Option(False, "--status", help="Show the result of the last push and exit.")
+):
     """Sync brag doc with git."""
+    from brag.git_utils import sync_with_git, get_push_status
+    if status:
+        push_status = get_push_status()
+        if not push_status:
+            typer.echo("No push has been recorded.")
+        else:
+            sha = (push_status.get("sha") or "")[:7]
+            typer.echo(f"Last push: {push_status['state']} {sha}".rstrip())
+            if push_status.get("error"):
+                typer.echo(push_status["error"])
+        return
     try:
-        sync_with_git()
+        result = sync_with_git(background=False) if foreground else sync_with_git()
         typer.echo("Brag doc synced with git.")
+        _report_sync(result)
     except Exception as e:
         typer.echo(f"Git sync failed: {e}")
 
+@app.command()
+def serve(
+    stop: bool = typer.Option(False, "--stop", help="Stop the running daemon.")
+):
+    """Run a resident daemon that answers brag commands over a Unix socket."""
+    from brag.client import get_socket_path, send_request
+    if stop:
+        result = send_request({"op": "shutdown"}, get_socket_path())
+        typer.echo(result[1].rstrip() if result else "No brag daemon is running.")
+        return
+    from brag.daemon import serve as run_daemon
+    typer.echo(f"Brag daemon listening on {get_socket_path()} (stop with `brag serve --stop`).")
+    try:
+        run_daemon()
+    except RuntimeError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+    except KeyboardInterrupt:
+        pass
+
 @category_app.command("set")
-def set_category(category: str):
+def set_category(
+    category: str = typer.Argument(..., autocompletion=complete_category)
+):
     """Set the current category for new brags."""
     set_current_category(category)
     typer.echo(f"Current category set to: {category}")
@@ -79,7 +165,9 @@ def unset_category():
     typer.echo("Current category unset.")
 
 @category_app.command("change")
-def change_category(new_category: str):
+def change_category(
+    new_category: str = typer.Argument(..., autocompletion=complete_category)
+):
     """Change the current category."""
     change_current_category(new_category)
     typer.echo(f"Current category changed to: {new_category}")
@@ -96,8 +184,7 @@ def show_category():
 @category_app.command("list")
 def list_all_categories():
     """List all unique categories from brag history with their indices."""
-    history = read_history()
-    categories = list_categories(history)
+    categories = get_categories()
     if not categories:
         typer.echo("No categories found.")
         return
@@ -105,9 +192,11 @@ def list_all_categories():
         typer.echo(f"{idx}: {cat}")
 
 @category_app.command("select")
-def select_category(index: int):
+def select_category(
+    index: int = typer.Argument(..., autocompletion=complete_category_index)
+):
     """Select a category by its index from the list and set it as current."""
-    history = read_history()
+    history = read_history(include_archive=True)
     try:
         category = select_category_by_index(history, index)
         set_current_category(category)
@@ -118,6 +207,7 @@ def select_category(index: int):
 @profile_app.command("init")
 def initialize_profile():
     """Initialize a new developer profile."""
+    from brag.profile import init_profile
     created = init_profile()
     if created:
         typer.echo("Developer profile initialized.")
@@ -127,24 +217,44 @@ def initialize_profile():
 @profile_app.command("show")
 def show_profile():
     """Show your developer profile."""
+    from brag.profile import get_profile
     profile = get_profile()
     typer.echo(json.dumps(profile, indent=2))
 
 @profile_app.command("update")
 def update_profile(
-    field: str = typer.Option(..., help=f"Field to update. Available fields: {', '.join(PROFILE_FIELDS)}"),
+    field: str = typer.Option(..., help=f"Field to update. Available fields: {', '.join(PROFILE_FIELDS)}", autocompletion=complete_profile_field),
     value: str = typer.Option(..., help="New value for the field")
 ):
     """Update a field in your developer profile."""
+    from brag.profile import update_profile_field
     update_profile_field(field, value)
     typer.echo(f"Updated {field} to: {value}")
 
+@profile_app.command("set")
+def set_profile_fields(
+    assignments: List[str] = typer.Argument(..., help="One or more field=value pairs, e.g. name=Ada contact.email=ada@example.com")
+):
+    """Update several profile fields with a single write."""
+    from brag.profile import update_profile_fields
+    values = {}
+    for assignment in assignments:
+        field, sep, value = assignment.partition("=")
+        if not sep or not field:
+            typer.echo(f"Invalid assignment '{assignment}'. Use field=value.")
+            raise typer.Exit(code=1)
+        values[field.strip()] = value
+    update_profile_fields(values)
+    for field, value in values.items():
+        typer.echo(f"Updated {field} to: {value}")
+
 @profile_app.command("add-item")
 def add_to_list(
     field: str = typer.Option(..., help="List field to add to (skills, experience, education)"),
     item: str = typer.Option(..., help="Item to add to the list")
 ):
     """Add an item to a list field in your profile."""
+    from brag.profile import add_list_item
     add_list_item(field, item)
     typer.echo(f"Added '{item}' to {field}")
 
@@ -154,6 +264,7 @@ def remove_from_list(
     index: int = typer.Option(..., help="Index of the item to remove")
 ):
     """Remove an item from a list field by index."""
+    from brag.profile import remove_list_item
     removed = remove_list_item(field, index)
     if removed:
         typer.echo(f"Removed '{removed}' from {field}")
@@ -163,20 +274,64 @@ def remove_from_list(
 @profile_app.command("generate-resume")
 def profile_resume():
     """Generate a comprehensive resume using your profile and brag document."""
-    resume = generate_profile_based_resume()
+    from brag.ollama_utils import generate_profile_based_resume, OllamaUnavailableError
+    try:
+        resume = generate_profile_based_resume()
+    except OllamaUnavailableError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
     typer.echo(resume)
 
 @profile_app.command("generate-summary")
 def profile_summary():
     """Generate a professional summary using your profile and brag document."""
-    summary = generate_profile_based_summary()
+    from brag.ollama_utils import generate_profile_based_summary, OllamaUnavailableError
+    try:
+        summary = generate_profile_based_summary()
+    except OllamaUnavailableError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
     typer.echo(summary)
 
+@jobs_app.command("status")
+def jobs_status():
+    """Show queued Ollama jobs."""
+    from brag.ollama_utils import load_jobs
+    jobs = load_jobs()
+    if not jobs:
+        typer.echo("No queued jobs.")
+        return
+    for job in jobs:
+        line = f"{job['id']} [{job['status']}] {job['label']} (attempts: {job['attempts']})"
+        if job.get("error"):
+            line += f" - {job['error']}"
+        typer.echo(line)
+
+@jobs_app.command("run")
+def jobs_run(
+    workers: int = typer.Option(JOB_WORKERS, help="Maximum number of concurrent Ollama requests.")
+):
+    """Run queued Ollama jobs and store their results in the response cache."""
+    from brag.ollama_utils import run_jobs
+    counts = run_jobs(max_workers=workers)
+    typer.echo(
+        f"Completed {counts['done']} jobs, {counts['pending']} still pending, {counts['failed']} failed."
+    )
+    if counts["done"]:
+        typer.echo("Re-run the original command to see the cached results.")
+
 @app.command()
 def add(
-    message: str = typer.Argument(..., help="Message or achievement to add.")
+    message: str = typer.Argument(..., help="Message or achievement to add."),
+    sync: bool = typer.Option(False, "--sync", help="Commit the brag doc and push it in the background."),
+    on_duplicate: str = typer.Option("warn", "--on-duplicate", help="When a recent entry is nearly the same: warn (and add), skip, or merge (replace the earlier entry).")
 ):
     """Add a new entry to the brag doc. Uses the current category if set, else auto-categorises."""
+    if on_duplicate not in ("warn", "skip", "merge"):
+        typer.echo(f"Unknown --on-duplicate action: {on_duplicate}. Use warn, skip or merge.")
+        raise typer.Exit(1)
+    from brag.profile import get_profile
+    from brag.prompts import PROFILE_GREETING
     # Display personalized greeting if profile exists
     try:
         profile = get_profile()
@@ -185,7 +340,8 @@ def add(
     except:
         pass
         
-    assigned_category = get_current_category()
+    with trace.span("category.current"):
+        assigned_category = get_current_category()
     if not assigned_category:
         history = read_history()
         assigned_category = find_closest_category(message, history)
@@ -193,19 +349,179 @@ def add(
             typer.echo(f"No category set. Assigned to existing category by similarity: '{assigned_category}'")
         else:
             typer.echo("No category set. No category found by similarity.")
+    from brag.dedupe import find_duplicate
+    with trace.span("dedupe.check"):
+        duplicate = find_duplicate(message)
+    if duplicate:
+        typer.echo(f"Similar entry already logged ({duplicate.similarity:.0%} alike): {duplicate.entry.line.rstrip()}")
+        if on_duplicate == "skip":
+            typer.echo("Skipped the new entry.")
+            return
+        if on_duplicate == "merge":
+            from brag.doc_utils import remove_lines
+            with _noting_compaction():
+                replaced = remove_lines([duplicate.entry.line])
+            if not replaced:
+                typer.echo("The earlier entry is archived and can't be replaced, so nothing was added. "
+                           "Use --on-duplicate warn to add the new entry alongside it.")
+                raise typer.Exit(1)
+            typer.echo("Replaced the earlier entry.")
     add_entry(message, assigned_category)
     if assigned_category:
         typer.echo(f"Added entry: [{assigned_category}] {message}")
     else:
         typer.echo(f"Added entry: {message}")
+    if sync:
+        try:
+            from brag.git_utils import sync_with_git
+            _report_sync(sync_with_git())
+        except Exception as e:
+            typer.echo(f"Git sync failed: {e}")
+
+def _resolve_date(value: str) -> str:
+    """Return value if it is already a YYYY-MM-DD date, else parse it as a relative time."""
+    return value if re.match(r"\d{4}-\d{2}-\d{2}", value) else parse_relative_time(value)
+
+def _selected_docs(doc: str, all_docs: bool):
+    """Return the (name, path) docs chosen with --doc/--all, or None if neither was given."""
+    if doc is None and not all_docs:
+        return None
+    from brag.workspace import resolve_docs, WorkspaceError
+    try:
+        return resolve_docs(doc, all_docs)
+    except WorkspaceError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+
+def _echo_entries(items, output_format: str, labelled: bool) -> int:
+    """Print (workspace name, entry) pairs as text, json or ndjson. Returns the number printed."""
+    count = 0
+    if output_format == "json":
+        typer.echo("[", nl=False)
+    for name, entry in items:
+        data = entry.to_dict()
+        if labelled:
+            data["doc"] = name
+        if output_format == "json":
+            typer.echo(("," if count else "") + "\n  " + json.dumps(data), nl=False)
+        elif output_format == "ndjson":
+            typer.echo(json.dumps(data))
+        else:
+            typer.echo((f"{name}: " if labelled else "") + entry.line, nl=False)
+        count += 1
+    if output_format == "json":
+        typer.echo("\n]")
+    return count
+
+def _docs_history_lines(docs) -> list:
+    """Return the entry lines of docs merged by timestamp, for the generators."""
+    from brag.workspace import iter_merged_entries
+    return [entry.line for _, entry in iter_merged_entries(docs)]
+
+@workspace_app.command("add")
+def workspace_add(
+    name: str = typer.Argument(..., help="Name for the workspace."),
+    path: str = typer.Argument(..., help="Path to the workspace's brag doc.")
+):
+    """Register a brag doc as a named workspace."""
+    from brag.workspace import add_workspace, WorkspaceError
+    try:
+        doc_path = add_workspace(name, path)
+    except WorkspaceError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+    typer.echo(f"Registered workspace '{name}': {doc_path}")
+
+@workspace_app.command("list")
+def workspace_list():
+    """List registered workspaces."""
+    from brag.workspace import resolve_docs
+    for name, path in resolve_docs(all_docs=True):
+        typer.echo(f"{name}: {path}")
+
+@workspace_app.command("remove")
+def workspace_remove(
+    name: str = typer.Argument(..., help="Workspace to unregister. Its brag doc is kept.")
+):
+    """Unregister a workspace."""
+    from brag.workspace import remove_workspace
+    if remove_workspace(name):
+        typer.echo(f"Removed workspace '{name}'.")
+    else:
+        typer.echo(f"No workspace named '{name}'.")
+        raise typer.Exit(1)
+
+def _annotate_with_commit(line: str, entry_commits: dict) -> str:
+    from brag.doc_utils import entry_hash
+    sha = entry_commits.get(entry_hash(line))
+    return line.rstrip("\n") + (f"  ({sha[:7]})\n" if sha else "  (uncommitted)\n")
 
 @app.command()
-def history():
+def history(
+    since: str = typer.Option(None, help="Only show entries on or after a date (YYYY-MM-DD) or relative time (e.g., 2w)."),
+    until: str = typer.Option(None, help="Only show entries on or before a date (YYYY-MM-DD) or relative time (e.g., 1d)."),
+    category: str = typer.Option(None, help="Only show entries in this category."),
+    limit: int = typer.Option(0, help="Maximum number of entries to show (0 for all)."),
+    reverse: bool = typer.Option(False, "--reverse", help="Show the newest entries first."),
+    output_format: str = typer.Option("text", "--format", help="Output format: text, json or ndjson."),
+    git_limit: int = typer.Option(GIT_HISTORY_LIMIT, "--git-limit", help="Maximum number of git commits to show (0 for all)."),
+    git_since: str = typer.Option(None, "--git-since", help="Only show git commits since a date (YYYY-MM-DD) or relative time (e.g., 2w)."),
+    with_commits: bool = typer.Option(False, "--with-commits", help="Show the commit that introduced each entry."),
+    doc: str = typer.Option(None, "--doc", help="Read the named workspace's brag doc."),
+    all_docs: bool = typer.Option(False, "--all", help="Read every workspace's brag doc, merged by timestamp.")
+):
     """View brag doc history."""
-    lines = read_history()
-    typer.echo("".join(lines))
+    from itertools import islice
+    from brag.doc_utils import iter_doc_lines, iter_entries
+    if output_format not in ("text", "json", "ndjson"):
+        typer.echo(f"Unknown format: {output_format}. Use text, json or ndjson.")
+        raise typer.Exit(1)
+    try:
+        since_date = _resolve_date(since) if since else None
+        until_date = _resolve_date(until) if until else None
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+    if (doc is not None or all_docs) and (with_commits or git_since or git_limit != GIT_HISTORY_LIMIT):
+        # Only the default doc is kept in git; a workspace's history has no commits to show.
+        typer.echo("--with-commits, --git-since and --git-limit only apply to the default brag doc; "
+                   "they can't be combined with --doc or --all.")
+        raise typer.Exit(1)
+    docs = _selected_docs(doc, all_docs)
+    if docs is not None:
+        from brag.workspace import iter_merged_entries
+        entries = iter_merged_entries(docs, since=since_date, until=until_date, category=category,
+                                      reverse=reverse, limit=limit or None)
+        _echo_entries(entries, output_format, labelled=all_docs)
+        return
+    entry_commits = {}
+    if with_commits and output_format == "text":
+        try:
+            from brag.git_utils import update_entry_index
+            entry_commits = update_entry_index()
+        except Exception as e:
+            typer.echo(f"Could not read git history: {e}")
+
+    if since_date or until_date or category or limit or reverse or output_format != "text":
+        entries = iter_entries(since=since_date, until=until_date, category=category, reverse=reverse)
+        if limit:
+            entries = islice(entries, limit)
+        if output_format != "text":
+            _echo_entries(((None, entry) for entry in entries), output_format, labelled=False)
+            return
+        for entry in entries:
+            line = _annotate_with_commit(entry.line, entry_commits) if with_commits else entry.line
+            typer.echo(line, nl=False)
+    else:
+        from brag.archive import iter_lines_with_archive
+        for line in iter_lines_with_archive(iter_doc_lines()):
+            if with_commits and line.startswith("- ["):
+                line = _annotate_with_commit(line, entry_commits)
+            typer.echo(line, nl=False)
+        typer.echo("")
     try:
-        commits = get_git_history()
+        from brag.git_utils import get_git_history
+        commits = get_git_history(limit=git_limit or None, since=_resolve_date(git_since) if git_since else None)
         typer.echo("\nGit History:")
         for commit in commits:
             typer.echo(f"- {commit.hexsha[:7]} {commit.summary} ({commit.committed_datetime})")
@@ -213,23 +529,238 @@ def history():
         pass
 
 @app.command()
-def summarize():
+def stats(
+    since: str = typer.Option(None, help="Only count entries on or after a date (YYYY-MM-DD) or relative time (e.g., 12w)."),
+    until: str = typer.Option(None, help="Only count entries on or before a date (YYYY-MM-DD) or relative time."),
+    output_format: str = typer.Option("text", "--format", help="Output format: text or json."),
+    trend_months: int = typer.Option(3, help="Months compared against the preceding period for category trends."),
+    doc: str = typer.Option(None, "--doc", help="Count the named workspace's brag doc."),
+    all_docs: bool = typer.Option(False, "--all", help="Count every workspace's brag doc together.")
+):
+    """Show entry counts per week, month and category, streaks and busiest periods."""
+    from brag.stats import load_entry_columns, load_docs_columns, compute_stats, format_stats
+    try:
+        since_date = _resolve_date(since) if since else None
+        until_date = _resolve_date(until) if until else None
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+    docs = _selected_docs(doc, all_docs)
+    if docs is not None:
+        columns = load_docs_columns([path for _, path in docs], since_date, until_date)
+    else:
+        columns = load_entry_columns(since=since_date, until=until_date)
+    result = compute_stats(columns, trend_months=trend_months)
+    if output_format == "json":
+        typer.echo(json.dumps(result, indent=2))
+    else:
+        typer.echo(format_stats(result))
+
+@app.command()
+def export(
+    output_format: str = typer.Option("jsonl", "--format", help="Output format: jsonl, csv, html or md."),
+    output: str = typer.Option("-", "--output", "-o", help="Output file ('-' for stdout). A .gz suffix enables gzip."),
+    compress: bool = typer.Option(False, "--gzip", help="Gzip-compress the output."),
+    since: str = typer.Option(None, help="Only export entries on or after a date (YYYY-MM-DD) or relative time."),
+    until: str = typer.Option(None, help="Only export entries on or before a date (YYYY-MM-DD) or relative time."),
+    category: str = typer.Option(None, help="Only export entries in this category.")
+):
+    """Export brag entries to JSONL, CSV, HTML or markdown, streaming from the doc."""
+    from brag.doc_utils import iter_entries
+    from brag.export import EXPORT_FORMATS, export_entries, open_output
+    if output_format not in EXPORT_FORMATS:
+        typer.echo(f"Unknown format: {output_format}. Use one of: {', '.join(EXPORT_FORMATS)}.")
+        raise typer.Exit(1)
+    try:
+        since_date = _resolve_date(since) if since else None
+        until_date = _resolve_date(until) if until else None
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+    entries = iter_entries(since=since_date, until=until_date, category=category)
+    try:
+        out = open_output(output, compress)
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+    try:
+        count = export_entries(entries, output_format, out)
+    finally:
+        if out is sys.stdout:
+            out.flush()
+        else:
+            out.close()
+    if output and output != "-":
+        typer.echo(f"Exported {count} entries to {output}.")
+
+def _semantic_results(docs, query: str, k: int, since: str, until: str, category: str) -> list:
+    """Return the (workspace name, entry) pairs closest in meaning to query across docs, best first."""
+    from brag.semantic import semantic_search, EmbeddingUnavailableError
+    matches = []
+    try:
+        for name, path in docs:
+            matches.extend((match.score, name, match.entry) for match in
+                           semantic_search(query, k, since, until, category, path=path))
+    except EmbeddingUnavailableError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+    matches.sort(key=lambda match: match[0], reverse=True)
+    return [(name, entry) for _, name, entry in matches[:k]]
+
+@app.command()
+def search(
+    query: str = typer.Argument(..., help="Words to look for; an entry matches when its message contains all of them."),
+    since: str = typer.Option(None, help="Only search entries on or after a date (YYYY-MM-DD) or relative time (e.g., 2w)."),
+    until: str = typer.Option(None, help="Only search entries on or before a date (YYYY-MM-DD) or relative time."),
+    category: str = typer.Option(None, help="Only search entries in this category."),
+    limit: int = typer.Option(0, help="Maximum number of results (0 for all)."),
+    output_format: str = typer.Option("text", "--format", help="Output format: text, json or ndjson."),
+    doc: str = typer.Option(None, "--doc", help="Search the named workspace's brag doc."),
+    all_docs: bool = typer.Option(False, "--all", help="Search every workspace's brag doc."),
+    semantic: bool = typer.Option(False, "--semantic", help=f"Rank entries by closeness in meaning to the query using Ollama embeddings (top {SEMANTIC_TOP_K} unless --limit is given).")
+):
+    """Search brag entries by keyword, newest first (case-insensitive), or by meaning with --semantic."""
+    from brag.workspace import resolve_docs, iter_merged_entries
+    if output_format not in ("text", "json", "ndjson"):
+        typer.echo(f"Unknown format: {output_format}. Use text, json or ndjson.")
+        raise typer.Exit(1)
+    try:
+        since_date = _resolve_date(since) if since else None
+        until_date = _resolve_date(until) if until else None
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
+    docs = _selected_docs(doc, all_docs) or resolve_docs()
+    if semantic:
+        results = _semantic_results(docs, query, limit or SEMANTIC_TOP_K, since_date, until_date, category)
+    else:
+        results = iter_merged_entries(docs, since=since_date, until=until_date, category=category,
+                                      query=query, reverse=True, limit=limit or None)
+    count = _echo_entries(results, output_format, labelled=all_docs)
+    if not count and output_format == "text":
+        typer.echo("No matching entries found.")
+
+@app.command()
+def summarize(
+    doc: str = typer.Option(None, "--doc", help="Summarise the named workspace's brag doc."),
+    all_docs: bool = typer.Option(False, "--all", help="Summarise every workspace's brag doc together.")
+):
     """Generate a summary using Ollama."""
-    summary = summarize_brag_doc()
+    from brag.ollama_utils import summarize_brag_doc, OllamaUnavailableError
+    docs = _selected_docs(doc, all_docs)
+    try:
+        summary = summarize_brag_doc(_docs_history_lines(docs)) if docs is not None else summarize_brag_doc()
+    except OllamaUnavailableError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
     typer.echo(summary)
 
 @app.command()
-def bullets():
+def bullets(
+    per_category: bool = typer.Option(False, "--per-category", help="Generate bullets per category in parallel, reusing cached results for unchanged categories."),
+    workers: int = typer.Option(BULLET_WORKERS, help="Maximum number of concurrent Ollama requests with --per-category."),
+    doc: str = typer.Option(None, "--doc", help="Use the named workspace's brag doc."),
+    all_docs: bool = typer.Option(False, "--all", help="Use every workspace's brag doc together.")
+):
     """Generate resume bullet points using Ollama."""
-    bullets = generate_resume_bullets()
+    from brag.ollama_utils import generate_resume_bullets, OllamaUnavailableError
+    docs = _selected_docs(doc, all_docs)
+    try:
+        if docs is not None:
+            bullets = generate_resume_bullets(per_category=per_category, max_workers=workers,
+                                              history_lines=_docs_history_lines(docs))
+        elif per_category:
+            bullets = generate_resume_bullets(per_category=True, max_workers=workers)
+        else:
+            bullets = generate_resume_bullets()
+    except OllamaUnavailableError as e:
+        typer.echo(str(e))
+        raise typer.Exit(1)
     typer.echo(bullets)
 
+@app.command()
+def dedupe(
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only list the near-duplicate groups."),
+    threshold: float = typer.Option(None, help="Minimum estimated similarity (0-1) for two entries to count as duplicates.")
+):
+    """Find near-duplicate entries and keep only the newest entry of each group."""
+    from brag.dedupe import dedupe_doc
+    from brag.constants import DEDUPE_THRESHOLD
+    with _noting_compaction():
+        groups = dedupe_doc(dry_run=dry_run, threshold=threshold or DEDUPE_THRESHOLD)
+    if not groups:
+        typer.echo("No near-duplicate entries found.")
+        return
+    for group in groups:
+        typer.echo(f"keep  {group[-1].line.rstrip()}")
+        for entry in group[:-1]:
+            typer.echo(f"drop  {entry.line.rstrip()}")
+        typer.echo("")
+    removed = sum(len(group) - 1 for group in groups)
+    if dry_run:
+        typer.echo(f"{removed} entries in {len(groups)} groups would be removed. Run without --dry-run to remove them.")
+    else:
+        typer.echo(f"Removed {removed} near-duplicate entries in {len(groups)} groups.")
+
+@app.command()
+def archive(
+    before: str = typer.Option(None, "--before", help="Archive entries dated before this date (YYYY-MM-DD) or relative time (e.g., 52w).")
+):
+    """Move old entries into compressed archive blocks, or show what is archived."""
+    from brag.archive import archive_before, archive_summary
+    if before:
+        try:
+            before_date = _resolve_date(before)
+        except ValueError as e:
+            typer.echo(str(e))
+            raise typer.Exit(1)
+        with _noting_compaction():
+            moved = archive_before(before_date)
+        typer.echo(f"Archived {moved} entries dated before {before_date}.")
+    summary = archive_summary()
+    if summary["blocks"]:
+        typer.echo(f"Archive: {summary['entries']} entries in {summary['blocks']} blocks, "
+                   f"{summary['first']} to {summary['last']}.")
+    else:
+        typer.echo("Nothing is archived yet.")
+
+@app.command("ingest-git")
+def ingest_git(
+    repos: List[str] = typer.Argument(..., help="Paths of the git repos to import commits from."),
+    author: str = typer.Option(..., "--author", help="Only import commits whose author name or email contains this."),
+    categorise: bool = typer.Option(False, "--categorise", help="Pick each entry's category from similar past entries, falling back to the repo name."),
+    workers: int = typer.Option(INGEST_WORKERS, help="Maximum number of repos scanned at once.")
+):
+    """Add your commits from git repos as entries, picking up where the last import stopped."""
+    from brag.ingest import ingest_repos
+    with _noting_compaction():
+        result = ingest_repos(repos, author, categorise=categorise, workers=workers)
+    for scan in result.scans:
+        if scan.error:
+            typer.echo(f"{scan.path}: skipped, {scan.error}.")
+        else:
+            typer.echo(f"{scan.name}: {len(scan.commits)} new commits")
+    if result.added:
+        repos_with_commits = sum(1 for scan in result.scans if scan.commits)
+        typer.echo(f"Added {result.added} entries from {repos_with_commits} repos.")
+    else:
+        typer.echo("No new commits to ingest.")
+
 @app.command()
 def purge(
     start: str = typer.Option(None, help="Start date (YYYY-MM-DD) or relative (e.g., 2d, 1w5d, 1h5m)"),
-    end: str = typer.Option(None, help="End date (YYYY-MM-DD) or relative (e.g., 1d, 1w)")
+    end: str = typer.Option(None, help="End date (YYYY-MM-DD) or relative (e.g., 1d, 1w)"),
+    undo: bool = typer.Option(False, "--undo", help="Restore the entries removed by the most recent purge.")
 ):
     """Purge brag doc entries between two dates or for a relative time period."""
+    if undo:
+        from brag.tombstones import undo_last
+        tombstone = undo_last()
+        if tombstone is None:
+            typer.echo("Nothing to undo. Purges can't be undone once the doc has been compacted.")
+            raise typer.Exit(1)
+        typer.echo(f"Restored {tombstone.entries} entries between {tombstone.start} and {tombstone.end}.")
+        return
     if not start and not end:
         typer.echo("Please provide at least one of --start or --end.")
         raise typer.Exit(1)
@@ -250,8 +781,19 @@ def purge(
             raise typer.Exit(1)
     else:
         end_date = now_str
-    removed = purge_entries_between(start_date, end_date)
-    typer.echo(f"Purged {removed} entries between {start_date} and {end_date}.")
+    result = purge_entries_between(start_date, end_date)
+    typer.echo(f"Purged {result.removed} entries between {start_date} and {end_date}.")
+    if result.compacted:
+        typer.echo("So much of the doc is purged that it was compacted; this purge can't be undone.")
+    elif result.removed:
+        typer.echo("Undo with `brag purge --undo` until the doc is compacted.")
+
+@app.command()
+def compact():
+    """Rewrite the brag doc without purged entries. Purges before this can no longer be undone."""
+    from brag.tombstones import compact as compact_doc
+    removed = compact_doc()
+    typer.echo(f"Compacted the brag doc, removing {removed} purged entries.")
 
 if __name__ == "__main__":
     app()
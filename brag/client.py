@@ -0,0 +1,91 @@
+"""
+Entry point for the `brag` command. Forwards the command to a running `brag serve` daemon and
+falls back to running it in-process when no daemon is listening.
+
+A forwarded command runs in the caller's working directory and its output is streamed back as it
+is written. Settings the daemon read at startup (BRAG_* and OLLAMA_* variables) can't be changed
+per command, so the daemon hands a command back to run in-process when the caller's differ.
+
+Only the standard library and brag.doc_utils are imported before forwarding, so a forwarded
+command doesn't pay for typer or any of the command dependencies.
+"""
+import os
+import sys
+import json
+import socket
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from brag.constants import NO_DAEMON_ENV, DAEMON_TIMEOUT, DAEMON_ENV_PREFIXES, SOCKET_FILE_NAME
+
+# Commands that must run in the calling process.
+LOCAL_COMMANDS = {"serve", "--install-completion", "--show-completion"}
+
+def get_socket_path() -> str:
+    """Return the path of the daemon's Unix socket in the brag data dir."""
+    from brag.doc_utils import get_brag_data_dir
+    return os.path.join(get_brag_data_dir(), SOCKET_FILE_NAME)
+
+def command_env() -> Dict[str, str]:
+    """Return the environment variables that change how a command runs."""
+    return {
+        name: value for name, value in os.environ.items()
+        if name.startswith(DAEMON_ENV_PREFIXES) and name != NO_DAEMON_ENV
+    }
+
+def send_request(request: dict, socket_path: str,
+                 write: Optional[Callable[[str], Any]] = None) -> Optional[Tuple[int, str]]:
+    """
+    Send a request to the daemon, passing the output to write as it arrives if given. Returns
+    (exit code, output not passed to write), or None if no daemon is listening or the daemon
+    handed the command back.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+    output, streamed, code = [], False, None
+    try:
+        client.settimeout(DAEMON_TIMEOUT)
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with client.makefile("rb") as replies:
+            for line in replies:
+                reply = json.loads(line)
+                if "output" not in reply:
+                    code = reply.get("exit_code")
+                    break
+                if write is None:
+                    output.append(reply["output"])
+                else:
+                    write(reply["output"])
+                    streamed = True
+    finally:
+        client.close()
+    if code is None:
+        # Output already shown can't be taken back by running the command again
+        return (1, "".join(output)) if streamed else None
+    return code, "".join(output)
+
+def forward(argv: List[str], socket_path: Optional[str] = None,
+            write: Optional[Callable[[str], Any]] = None) -> Optional[Tuple[int, str]]:
+    """Run a CLI command in the daemon. Returns None if it has to run in-process instead."""
+    if os.environ.get(NO_DAEMON_ENV) or (argv and argv[0] in LOCAL_COMMANDS):
+        return None
+    if "_BRAG_COMPLETE" in os.environ:
+        return None
+    request = {"argv": argv, "cwd": os.getcwd(), "env": command_env()}
+    return send_request(request, socket_path or get_socket_path(), write)
+
+def _write_stdout(text: str) -> None:
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+def main() -> None:
+    result = forward(sys.argv[1:], write=_write_stdout)
+    if result is not None:
+        sys.exit(result[0])
+    from brag.cli import app
+    app(prog_name="brag")
+
+if __name__ == "__main__":
+    main()
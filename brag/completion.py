@@ -0,0 +1,145 @@
+"""
+Shell completion backed by a small precomputed catalogue of categories and profile fields.
+
+The catalogue records how often and how recently each value was used, is updated incrementally
+when entries are added, and is rebuilt from the brag doc only when the doc changed behind its
+back. Only the standard library and light brag modules are imported here, so completion doesn't
+load GitPython, requests or pydantic.
+"""
+import os
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from brag.cache import file_key
+from brag.constants import (
+    CACHE_DIR_NAME, COMPLETION_CATALOGUE_FILE_NAME, COMPLETION_HALF_LIFE_DAYS,
+    PROFILE_FIELDS, TIMESTAMP_FORMAT
+)
+
+def get_catalogue_path() -> str:
+    """Return the path to the completion catalogue in the brag data dir."""
+    from brag.doc_utils import get_brag_data_dir
+    return os.path.join(get_brag_data_dir(), CACHE_DIR_NAME, COMPLETION_CATALOGUE_FILE_NAME)
+
+def _doc_key(doc_key: Optional[Tuple[int, int, int]] = None) -> Optional[List[Optional[List[int]]]]:
+    """
+    The staleness key of the catalogue: the brag doc's file key (doc_key if given, else the current
+    one) and its tombstone log's, since a purge changes the categories without touching the doc.
+    """
+    from brag.doc_utils import get_brag_doc_path
+    from brag.tombstones import get_log_path
+    brag_doc = get_brag_doc_path()
+    key = doc_key or file_key(brag_doc)
+    if not key:
+        return None
+    log_key = file_key(get_log_path(brag_doc))
+    return [list(key), list(log_key) if log_key else None]
+
+def _save(catalogue: Dict[str, Any]) -> None:
+    path = get_catalogue_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(catalogue, f)
+    os.replace(tmp_path, path)
+
+def _load_raw() -> Dict[str, Any]:
+    try:
+        with open(get_catalogue_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _to_epoch(timestamp: str) -> float:
+    try:
+        return datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()
+    except ValueError:
+        return 0.0
+
+def rebuild_catalogue() -> Dict[str, Any]:
+    """Rebuild category usage from the brag doc, keeping recorded profile field usage."""
+    from brag.doc_utils import iter_entries
+    categories: Dict[str, Dict[str, float]] = {}
+    for entry in iter_entries():
+        if not entry.category:
+            continue
+        usage = categories.setdefault(entry.category, {"count": 0, "last": 0.0})
+        usage["count"] += 1
+        usage["last"] = max(usage["last"], _to_epoch(entry.timestamp))
+    catalogue = {
+        "doc_key": _doc_key(),
+        "categories": categories,
+        "profile_fields": _load_raw().get("profile_fields", {}),
+    }
+    _save(catalogue)
+    return catalogue
+
+def load_catalogue() -> Dict[str, Any]:
+    """Load the catalogue, rebuilding it if it is missing or the brag doc changed externally."""
+    catalogue = _load_raw()
+    if not catalogue or catalogue.get("doc_key") != _doc_key():
+        return rebuild_catalogue()
+    return catalogue
+
+def _bump(catalogue: Dict[str, Any], section: str, value: str, when: float) -> None:
+    usage = catalogue.setdefault(section, {}).setdefault(value, {"count": 0, "last": 0.0})
+    usage["count"] += 1
+    usage["last"] = max(usage["last"], when)
+
+def record_entry_added(category: Optional[str], timestamp: str,
+                       prior_doc_key: Optional[Tuple[int, int, int]]) -> None:
+    """
+    Update the catalogue after an entry was appended to the brag doc. prior_doc_key is the doc's
+    file key before the append; if the catalogue didn't match it, the catalogue is left stale and
+    the next completion rebuilds it.
+    """
+    catalogue = _load_raw()
+    if not catalogue or catalogue.get("doc_key") != (_doc_key(prior_doc_key) if prior_doc_key else None):
+        return
+    if category:
+        _bump(catalogue, "categories", category, _to_epoch(timestamp))
+    catalogue["doc_key"] = _doc_key()
+    _save(catalogue)
+
+def record_profile_field_use(*fields: str) -> None:
+    """Count an update of each of the profile fields, in a single catalogue write."""
+    catalogue = _load_raw()
+    now = time.time()
+    for field in fields:
+        _bump(catalogue, "profile_fields", field, now)
+    _save(catalogue)
+
+def rank(usage: Dict[str, Dict[str, float]], now: Optional[float] = None) -> List[str]:
+    """Order values by frecency: use count decayed by the time since last use."""
+    now = now or time.time()
+    half_life = COMPLETION_HALF_LIFE_DAYS * 86400
+
+    def score(item):
+        name, stats = item
+        age = max(0.0, now - stats.get("last", 0.0))
+        return (-stats.get("count", 0) * 0.5 ** (age / half_life), name.lower())
+
+    return [name for name, _ in sorted(usage.items(), key=score)]
+
+def complete_category(incomplete: str) -> List[str]:
+    """Return categories starting with incomplete, most frequently and recently used first."""
+    prefix = incomplete.lower()
+    categories = load_catalogue().get("categories", {})
+    return rank({name: usage for name, usage in categories.items() if name.lower().startswith(prefix)})
+
+def complete_category_index(incomplete: str) -> List[Tuple[str, str]]:
+    """Return (index, category) pairs for `brag category select`, ranked by frecency."""
+    categories = load_catalogue().get("categories", {})
+    positions = {name: idx for idx, name in enumerate(sorted(categories))}
+    return [
+        (str(positions[name]), name)
+        for name in rank(categories)
+        if str(positions[name]).startswith(incomplete)
+    ]
+
+def complete_profile_field(incomplete: str) -> List[str]:
+    """Return profile fields starting with incomplete, recently updated fields first."""
+    used = _load_raw().get("profile_fields", {})
+    ranked = rank(used) + [field for field in PROFILE_FIELDS if field not in used]
+    return [field for field in ranked if field in PROFILE_FIELDS and field.startswith(incomplete)]
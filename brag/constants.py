@@ -4,6 +4,11 @@ import os
 BRAG_DOC_FILENAME = "bragdoc.md"
 CATEGORY_FILE_NAME = ".brag_category"
 PROFILE_FILE_NAME = ".brag_profile.json"
+CACHE_DIR_NAME = ".brag_cache"
+SOCKET_FILE_NAME = ".brag.sock"
+COMPLETION_CATALOGUE_FILE_NAME = "completion.json"
+RESPONSE_CACHE_DIR_NAME = "responses"
+JOB_QUEUE_FILE_NAME = "jobs.json"
 
 # Testing configuration
 IS_TESTING = False
@@ -21,14 +26,93 @@ BRAG_ENTRY_PREFIX = "- ["
 CATEGORY_FORMAT = "[{category}]"
 TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
 DATE_FORMAT = "%Y-%m-%d"
+EXPORT_BUFFER_SIZE = 1 << 20
 
 # Git related
 GIT_COMMIT_MESSAGE = "Update brag doc"
 GIT_INIT_COMMIT_MESSAGE = "Initialize brag doc"
+GIT_REMOTE_NAME = "origin"
+GITIGNORE_FILE_NAME = ".gitignore"
+SYNC_STATE_FILE_NAME = "sync.json"
+PUSH_STATUS_FILE_NAME = "push_status.json"
+GIT_HISTORY_CACHE_FILE_NAME = "git_history.json"
+GIT_HISTORY_CACHE_SIZE = 8
+GIT_HISTORY_LIMIT = 20
+ENTRY_INDEX_FILE_NAME = "entry_index.json"
 
 # Ollama API
 OLLAMA_API_URL = os.environ.get("OLLAMA_API_URL", "http://localhost:11434/api/generate")
 OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3.2")
+OLLAMA_EMBED_URL = os.environ.get("OLLAMA_EMBED_URL", "http://localhost:11434/api/embed")
+OLLAMA_EMBED_MODEL = os.environ.get("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+BULLET_WORKERS = 4
+JOB_WORKERS = 4
+GENERATION_WORKERS = 2
+GENERATION_JOBS_KEPT = 32
+UNCATEGORISED_LABEL = "Uncategorised"
+
+# Shell completion
+COMPLETION_HALF_LIFE_DAYS = 30
+
+# Archive
+ARCHIVE_DIR_NAME = "archive"
+ARCHIVE_INDEX_FILE_NAME = "index.json"
+ARCHIVE_BLOCK_ENTRIES = 5000
+
+# Purge
+TOMBSTONE_FILE_NAME = "tombstones.json"
+COMPACT_THRESHOLD = 0.25  # compact once this share of entries is purged
+PURGE_SCAN_BYTES = 1 << 16  # the doc is read in blocks of whole lines this big when applying tombstones
+
+# Semantic search
+EMBEDDING_DIR_NAME = "embeddings"
+EMBEDDING_BATCH = 64  # entries per embeddings request
+SEMANTIC_TOP_K = 10
+
+# Append journal
+JOURNAL_FILE_NAME = "journal.log"
+JOURNAL_GROUP_ENTRIES = 1  # fsync after this many appends...
+JOURNAL_GROUP_MS = 0  # ...or this many ms after the first unsynced one (0 waits for the count)
+DAEMON_GROUP_ENTRIES = 32
+DAEMON_GROUP_MS = 20
+GROUP_COMMIT_ENV = "BRAG_GROUP_COMMIT"
+FSYNC_ENV = "BRAG_FSYNC"
+
+# Near-duplicate detection
+DEDUPE_INDEX_FILE_NAME = "dedupe.json"
+DEDUPE_NUM_PERM = 96
+DEDUPE_BANDS = 32  # 3 signature slots per band
+DEDUPE_SHINGLE_SIZE = 4
+DEDUPE_THRESHOLD = 0.5
+DEDUPE_WINDOW = 500  # recent entries checked by `brag add`
+DEDUPE_BUCKET_LIMIT = 50
+DEDUPE_CANDIDATES = 8  # candidates compared in full per lookup
+
+# Web app
+HISTORY_PAGE_SIZES = [25, 50, 100]
+
+# Workspaces
+WORKSPACES_FILE_NAME = "workspaces.json"
+DEFAULT_WORKSPACE_NAME = "default"
+WORKSPACE_WORKERS = None  # one process per doc, up to the number of CPUs
+WORKSPACE_CHUNK_ENTRIES = 256  # entries per message from a worker streaming a doc...
+WORKSPACE_QUEUE_CHUNKS = 4  # ...and messages it may queue ahead of the merge
+
+# Git ingestion
+INGEST_CURSORS_FILE_NAME = "ingest_cursors.json"
+INGEST_WORKERS = 8  # repos scanned at once
+INGEST_CATEGORISE_WINDOW = 1000  # recent entries the auto-categoriser compares against
+INGEST_CATEGORISE_CHUNK = 64  # messages per process when categorising in parallel
+
+# Tracing
+TRACE_ENV = "BRAG_TRACE"
+
+# Daemon
+NO_DAEMON_ENV = "BRAG_NO_DAEMON"
+DAEMON_TIMEOUT = 300
+DAEMON_ENV_PREFIXES = ("BRAG_", "OLLAMA_")  # settings a forwarded command must share with the daemon
+DAEMON_FLUSH_BYTES = 1 << 16  # output is streamed back in chunks of up to this size...
+DAEMON_FLUSH_MS = 50  # ...or whatever was written in this long
 
 # Profile related
 PROFILE_FIELDS = [
@@ -0,0 +1,195 @@
+"""
+Resident brag server. Keeps modules imported and the brag doc, categories and profile cached in
+memory, and runs CLI commands received over a Unix domain socket.
+
+A request is one JSON line: {"argv": [...], "cwd": ..., "env": {...}}. The reply is a stream of
+{"output": ...} lines as the command writes, ended by {"exit_code": ...}, or a single
+{"local": true} when the caller's environment differs from the daemon's and the command has to
+run in the caller's process.
+"""
+import io
+import os
+import json
+import time
+import socket
+import socketserver
+import threading
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+from typing import IO, List, Optional, Tuple
+from brag.client import command_env, get_socket_path
+from brag.constants import (
+    GROUP_COMMIT_ENV, DAEMON_GROUP_ENTRIES, DAEMON_GROUP_MS, DAEMON_FLUSH_BYTES, DAEMON_FLUSH_MS
+)
+
+class _ReplyStream(io.TextIOBase):
+    """stdout and stderr of a forwarded command: sends the output back in chunks as it is written."""
+
+    def __init__(self, wfile: IO[bytes]):
+        self._wfile = wfile
+        self._chunks: List[str] = []
+        self._size = 0
+        self._sent = time.monotonic()
+        self._closed = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")  # click probes with b""
+        self._chunks.append(text)
+        self._size += len(text)
+        if self._size >= DAEMON_FLUSH_BYTES:
+            self.send()
+        return len(text)
+
+    def flush(self) -> None:
+        if (time.monotonic() - self._sent) * 1000 >= DAEMON_FLUSH_MS:
+            self.send()
+
+    def send(self) -> None:
+        """Send what was written since the last send."""
+        if self._chunks and not self._closed:
+            data = json.dumps({"output": "".join(self._chunks)}).encode("utf-8") + b"\n"
+            try:
+                self._wfile.write(data)
+                self._wfile.flush()
+            except OSError:
+                self._closed = True  # the caller went away; let the command finish anyway
+        self._chunks, self._size = [], 0
+        self._sent = time.monotonic()
+
+def run_command(argv: List[str], output: Optional[IO[str]] = None,
+                cwd: Optional[str] = None) -> Tuple[int, str]:
+    """
+    Run a brag CLI command in this process, in the working directory cwd if given. Returns (exit
+    code, output), the output being captured only when no output stream is given.
+    """
+    import click
+    import typer.main
+    from brag.cli import app
+    command = typer.main.get_command(app)
+    captured = output is None
+    if captured:
+        output = io.StringIO()
+    previous_cwd = os.getcwd()
+    if cwd:
+        os.chdir(cwd)
+    with redirect_stdout(output), redirect_stderr(output):
+        try:
+            rv = command.main(args=argv, prog_name="brag", standalone_mode=False)
+            code = rv if isinstance(rv, int) else 0
+        except click.exceptions.Exit as e:
+            code = e.exit_code
+        except click.ClickException as e:
+            e.show(file=output)
+            code = e.exit_code
+        except click.exceptions.Abort:
+            code = 1
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc(file=output)
+            code = 1
+        finally:
+            os.chdir(previous_cwd)
+    return code, output.getvalue() if captured else ""
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return
+        if request.get("op") == "shutdown":
+            self._reply(0, "Brag daemon stopped.\n")
+            self.server.shutdown_requested = True
+            return
+        cwd = request.get("cwd")
+        if request.get("env", {}) != self.server.env or (cwd and not os.path.isdir(cwd)):
+            self._send({"local": True})
+            return
+        stream = _ReplyStream(self.wfile)
+        code, _ = run_command(request.get("argv", []), stream, cwd)
+        stream.send()
+        self._send({"exit_code": code})
+
+    def _reply(self, code: int, output: str) -> None:
+        self._send({"output": output})
+        self._send({"exit_code": code})
+
+    def _send(self, reply: dict) -> None:
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+class BragServer(socketserver.UnixStreamServer):
+    """
+    Serves one request at a time: commands write to the process-wide stdout, which is redirected
+    while each command runs.
+    """
+
+    def __init__(self, socket_path: str):
+        self.shutdown_requested = False
+        self.socket_path = socket_path
+        self.env = command_env()  # the settings its modules were imported with
+        super().__init__(socket_path, _RequestHandler)
+        os.chmod(socket_path, 0o600)
+
+    def service_actions(self):
+        if self.shutdown_requested:
+            # Runs inside serve_forever, so shut down from a helper thread to avoid deadlocking.
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            self.shutdown_requested = False
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+def _is_listening(socket_path: str) -> bool:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        client.close()
+
+def warm_up() -> None:
+    """Import command dependencies and load cached state before serving the first request."""
+    import brag.cli  # noqa: F401
+    import brag.git_utils  # noqa: F401
+    import brag.ollama_utils  # noqa: F401
+    from brag.doc_utils import get_brag_doc_path, read_history
+    from brag.category_utils import get_categories
+    from brag.journal import recover
+    from brag.profile import get_profile_path, get_profile
+    recover(get_brag_doc_path())
+    read_history()
+    get_categories()
+    if os.path.exists(get_profile_path()):
+        get_profile()
+
+def make_server(socket_path: Optional[str] = None) -> BragServer:
+    """Create the daemon's server, replacing a stale socket left behind by a crashed daemon."""
+    socket_path = socket_path or get_socket_path()
+    if os.path.exists(socket_path):
+        if _is_listening(socket_path):
+            raise RuntimeError(f"A brag daemon is already running at {socket_path}.")
+        os.remove(socket_path)
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    return BragServer(socket_path)
+
+def serve(socket_path: Optional[str] = None) -> None:
+    """Run the daemon until it is stopped."""
+    from brag.journal import GroupCommit, set_group_commit
+    server = make_server(socket_path)
+    if not os.environ.get(GROUP_COMMIT_ENV):
+        set_group_commit(GroupCommit(DAEMON_GROUP_ENTRIES, DAEMON_GROUP_MS))
+    warm_up()
+    try:
+        server.serve_forever(poll_interval=0.2)
+    finally:
+        server.server_close()
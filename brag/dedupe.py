@@ -0,0 +1,221 @@
+"""
+Near-duplicate detection for brag entries with MinHash signatures and locality-sensitive hashing.
+
+Each message is normalised, cut into character shingles and summarised by a MinHash signature;
+the fraction of equal signature slots estimates the Jaccard similarity of two messages. Signatures
+are split into bands and entries sharing any band land in the same LSH bucket, so a lookup only
+compares against a handful of candidates instead of the whole doc.
+
+The index of recent entries is persisted next to the completion catalogue and kept up to date by
+add_entry; like the catalogue it is rebuilt when the brag doc changed behind its back. Only the
+standard library is used, so `brag add` stays free of NumPy.
+"""
+import os
+import re
+import json
+import base64
+import struct
+import hashlib
+from operator import eq
+from functools import lru_cache
+from collections import Counter
+from itertools import islice
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from brag.cache import cached, file_key
+from brag.doc_utils import Entry, get_brag_data_dir, get_brag_doc_path, iter_entries, parse_entry
+from brag.constants import (
+    CACHE_DIR_NAME, DEDUPE_INDEX_FILE_NAME, DEDUPE_NUM_PERM, DEDUPE_BANDS, DEDUPE_SHINGLE_SIZE,
+    DEDUPE_THRESHOLD, DEDUPE_WINDOW, DEDUPE_BUCKET_LIMIT, DEDUPE_CANDIDATES
+)
+
+Signature = Tuple[int, ...]
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SIGNATURE = struct.Struct(f"<{DEDUPE_NUM_PERM}I")
+_ROWS = DEDUPE_NUM_PERM // DEDUPE_BANDS
+
+class Duplicate(NamedTuple):
+    entry: Entry
+    similarity: float
+
+def shingles(message: str) -> Set[str]:
+    """Return the character shingles of message after lowercasing and dropping punctuation."""
+    text = " ".join(_WORD.findall(message.lower()))
+    if len(text) <= DEDUPE_SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + DEDUPE_SHINGLE_SIZE] for i in range(len(text) - DEDUPE_SHINGLE_SIZE + 1)}
+
+@lru_cache(maxsize=1 << 16)
+def _slot_hashes(shingle: str) -> Signature:
+    # One SHAKE-128 digest supplies all DEDUPE_NUM_PERM hash values of a shingle. Shingles recur
+    # across entries, so a whole-doc pass hashes most of them once.
+    return _SIGNATURE.unpack(hashlib.shake_128(shingle.encode("utf-8")).digest(_SIGNATURE.size))
+
+def signature(message: str) -> Signature:
+    """Return the MinHash signature of message: the per-slot minimum over its shingles' hashes."""
+    return tuple(map(min, zip(*map(_slot_hashes, shingles(message)))))
+
+def similarity(a: Signature, b: Signature) -> float:
+    """Estimate the Jaccard similarity of two messages from their signatures."""
+    return sum(map(eq, a, b)) / len(a)
+
+def band_keys(sig: Signature) -> List[Tuple[int, ...]]:
+    """Return the LSH bucket keys of a signature, one per band."""
+    return [(band,) + sig[band * _ROWS:(band + 1) * _ROWS] for band in range(DEDUPE_BANDS)]
+
+class LSHIndex:
+    """In-memory LSH buckets mapping band keys to the ids of the signatures that share them."""
+
+    def __init__(self, bucket_limit: int = DEDUPE_BUCKET_LIMIT):
+        self.buckets: Dict[Tuple[int, ...], List[int]] = {}
+        self.signatures: List[Signature] = []
+        self.bucket_limit = bucket_limit
+
+    def add(self, sig: Signature) -> int:
+        """Index sig and return its id."""
+        ident = len(self.signatures)
+        self.signatures.append(sig)
+        for key in band_keys(sig):
+            self.buckets.setdefault(key, []).append(ident)
+        return ident
+
+    def candidates(self, sig: Signature) -> Counter:
+        """
+        Count, per indexed id, the bands it shares with sig. Only the newest bucket_limit members of
+        each bucket are counted, which bounds the work on buckets of very common wording.
+        """
+        hits: Counter = Counter()
+        for key in band_keys(sig):
+            members = self.buckets.get(key)
+            if members:
+                hits.update(members[-self.bucket_limit:])
+        return hits
+
+    def query(self, sig: Signature, threshold: float = DEDUPE_THRESHOLD) -> List[Tuple[int, float]]:
+        """
+        Return (id, similarity) for indexed signatures at least threshold similar, best first. Only
+        the DEDUPE_CANDIDATES ids sharing the most bands are compared slot by slot.
+        """
+        hits = self.candidates(sig)
+        matches = [(ident, similarity(sig, self.signatures[ident]))
+                   for ident, _ in hits.most_common(DEDUPE_CANDIDATES)]
+        return sorted((m for m in matches if m[1] >= threshold), key=lambda m: (-m[1], -m[0]))
+
+def get_index_path() -> str:
+    """Return the path to the persisted dedupe index in the brag data dir."""
+    return os.path.join(get_brag_data_dir(), CACHE_DIR_NAME, DEDUPE_INDEX_FILE_NAME)
+
+def _encode(sig: Signature) -> str:
+    return base64.b64encode(_SIGNATURE.pack(*sig)).decode("ascii")
+
+def _decode(data: str) -> Signature:
+    return _SIGNATURE.unpack(base64.b64decode(data))
+
+def _doc_key(doc_key: Optional[Tuple[int, int, int]] = None) -> Optional[List[Optional[List[int]]]]:
+    """
+    The staleness key of the index: the brag doc's file key (doc_key if given, else the current
+    one) and its tombstone log's, since a purge hides entries without touching the doc.
+    """
+    from brag.tombstones import get_log_path
+    brag_doc = get_brag_doc_path()
+    key = doc_key or file_key(brag_doc)
+    if not key:
+        return None
+    log_key = file_key(get_log_path(brag_doc))
+    return [list(key), list(log_key) if log_key else None]
+
+def _save(index: Dict[str, Any]) -> None:
+    path = get_index_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+
+def _load_raw() -> Dict[str, Any]:
+    try:
+        with open(get_index_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def rebuild_index() -> Dict[str, Any]:
+    """Rebuild the index from the DEDUPE_WINDOW most recent entries of the brag doc."""
+    recent = list(islice(iter_entries(reverse=True), DEDUPE_WINDOW))
+    index = {
+        "doc_key": _doc_key(),
+        "entries": [[entry.line, _encode(signature(entry.message))] for entry in reversed(recent)],
+    }
+    _save(index)
+    return index
+
+def _build(index: Dict[str, Any]) -> Tuple[Optional[list], List[str], LSHIndex]:
+    lsh = LSHIndex()
+    lines = []
+    for line, data in index.get("entries", []):
+        lines.append(line)
+        lsh.add(_decode(data))
+    return index.get("doc_key"), lines, lsh
+
+def _recent_index() -> Tuple[List[str], LSHIndex]:
+    # The LSH buckets are rebuilt only when the index file changes, so a resident daemon checks
+    # new messages without touching the disk beyond three stats.
+    path = get_index_path()
+    doc_key, lines, lsh = cached("dedupe", path, lambda: _build(_load_raw()))
+    if doc_key != _doc_key():
+        doc_key, lines, lsh = _build(rebuild_index())
+    return lines, lsh
+
+def find_duplicate(message: str, threshold: float = DEDUPE_THRESHOLD) -> Optional[Duplicate]:
+    """Return the recent entry most similar to message if it is at least threshold similar."""
+    lines, lsh = _recent_index()
+    matches = lsh.query(signature(message), threshold)
+    if not matches:
+        return None
+    ident, score = matches[0]
+    return Duplicate(parse_entry(lines[ident]), score)
+
+def record_entry_added(line: str, message: str, prior_doc_key: Optional[Tuple[int, int, int]]) -> None:
+    """
+    Add a newly appended entry to the persisted index. prior_doc_key is the doc's file key before
+    the append; if the index didn't match it, the index is left stale and rebuilt on next use.
+    """
+    index = _load_raw()
+    if not index or index.get("doc_key") != (_doc_key(prior_doc_key) if prior_doc_key else None):
+        return
+    entries = index.setdefault("entries", [])
+    entries.append([line, _encode(signature(message))])
+    del entries[:-DEDUPE_WINDOW]
+    index["doc_key"] = _doc_key()
+    _save(index)
+
+def find_duplicate_groups(entries: Iterable[Entry], threshold: float = DEDUPE_THRESHOLD) -> List[List[Entry]]:
+    """
+    Group near-duplicate entries in one pass. The first entry of each group is its seed and only
+    seeds are indexed: every later entry is compared with its LSH candidate seeds and joins the
+    most similar one, or seeds a new group. Matching against seeds rather than chaining through
+    members keeps every group within threshold of its seed. Groups are in doc order and only
+    groups of two or more entries are returned.
+    """
+    seeds = LSHIndex()
+    groups: List[List[Entry]] = []
+    for entry in entries:
+        sig = signature(entry.message)
+        matches = seeds.query(sig, threshold)
+        if matches:
+            groups[matches[0][0]].append(entry)
+        else:
+            seeds.add(sig)
+            groups.append([entry])
+    return [group for group in groups if len(group) > 1]
+
+def dedupe_doc(dry_run: bool = False, threshold: float = DEDUPE_THRESHOLD) -> List[List[Entry]]:
+    """
+    Find near-duplicate groups in the brag doc and, unless dry_run, keep only the newest entry of
+    each group. Archived entries are immutable and left out. Returns the groups found.
+    """
+    from brag.doc_utils import remove_lines
+    groups = find_duplicate_groups(iter_entries(archived=False), threshold)
+    if groups and not dry_run:
+        remove_lines(entry.line for group in groups for entry in group[:-1])
+    return groups
@@ -1,12 +1,19 @@
 import os
+import heapq
+import hashlib
 import platform
+from itertools import chain, islice
+from collections import Counter
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from brag import trace
+from brag.cache import cached, invalidate, file_key
+from brag.parser import parse_line, days_in
 from brag.constants import (
     BRAG_DOC_FILENAME, TIMESTAMP_FORMAT, DATE_FORMAT, BRAG_DOC_HEADER,
     WINDOWS_BASE_PATH, DARWIN_APP_SUPPORT_PATH, LINUX_DATA_PATH, XDG_DATA_HOME_ENV,
-    CATEGORY_FORMAT, GIT_INIT_COMMIT_MESSAGE, IS_TESTING, TEST_DIR
+    CATEGORY_FORMAT, GIT_INIT_COMMIT_MESSAGE, GITIGNORE_FILE_NAME, CACHE_DIR_NAME, JOURNAL_FILE_NAME,
+    IS_TESTING, TEST_DIR
 )
 
 # Determine brag doc path based on OS
@@ -43,10 +50,16 @@ def get_brag_doc_path(test_path: str = None) -> str:
         xdg = os.environ.get(XDG_DATA_HOME_ENV, os.path.join(home, LINUX_DATA_PATH))
         return os.path.join(xdg, BRAG_DOC_FILENAME)
 
-class BragEntry(BaseModel):
-    timestamp: str
-    message: str
-    category: Optional[str] = None
+def get_brag_data_dir() -> str:
+    """Return the directory holding the brag doc and its companion files."""
+    return os.path.dirname(get_brag_doc_path())
+
+def __getattr__(name: str):
+    # BragEntry needs pydantic; load it only when someone asks for it.
+    if name == "BragEntry":
+        from brag.models import BragEntry
+        return BragEntry
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def init_brag_doc() -> bool:
     brag_doc = get_brag_doc_path()
@@ -58,76 +71,352 @@ def init_brag_doc() -> bool:
     return False
 
 def add_entry(message: str, category: str = None) -> None:
-    brag_doc = get_brag_doc_path()
+    from brag.completion import record_entry_added
+    from brag.dedupe import record_entry_added as record_dedupe_entry
+    from brag.journal import get_journal
+    with trace.span("doc.resolve_path"):
+        brag_doc = get_brag_doc_path()
     now = datetime.now().strftime(TIMESTAMP_FORMAT)
-    entry = BragEntry(timestamp=now, message=message, category=category)
-    with open(brag_doc, "a") as f:
-        if category:
-            f.write(f"- [{entry.timestamp}] {CATEGORY_FORMAT.format(category=category)} {entry.message}\n")
+    prior_key = file_key(brag_doc)
+    with trace.span("doc.append") as span:
+        line = format_entry(now, message, category)
+        get_journal(brag_doc).append([line])
+        span.set(bytes=len(line.encode("utf-8")), entries=1)
+    invalidate(brag_doc)
+    with trace.span("completion.record"):
+        record_entry_added(category, now, prior_key)
+    with trace.span("dedupe.record"):
+        record_dedupe_entry(line, message, prior_key)
+
+def format_entry(timestamp: str, message: str, category: Optional[str] = None) -> str:
+    """Return the doc line for an entry, ending in a newline."""
+    if category:
+        return f"- [{timestamp}] {CATEGORY_FORMAT.format(category=category)} {message}\n"
+    return f"- [{timestamp}] {message}\n"
+
+def add_entries(entries: Iterable[Tuple[str, Optional[str], str]]) -> int:
+    """
+    Add (timestamp, category, message) entries to the brag doc, keeping the doc and archive in
+    timestamp order. Entries newer than the doc's last one are appended as one journalled write
+    with a single fsync; older ones are merged in by rewriting the doc, and the archive blocks
+    too for entries older than the archive's newest. The completion and dedupe indexes notice the
+    change and rebuild on next use. Returns the number of entries added.
+    """
+    from brag.journal import get_journal
+    brag_doc = get_brag_doc_path()
+    lines = sorted((format_entry(timestamp, message, category) for timestamp, category, message in entries),
+                   key=_timestamp_key)
+    if not lines:
+        return 0
+    last = next(filter(None, map(parse_line, iter_doc_lines_reversed(brag_doc))), None)
+    if last is None or last[0] <= _timestamp_key(lines[0]):
+        with trace.span("doc.append") as span:
+            journal = get_journal(brag_doc)
+            journal.append(lines)
+            journal.commit()
+            span.set(bytes=sum(len(line.encode("utf-8")) for line in lines), entries=len(lines))
+    else:
+        _merge_lines(brag_doc, lines)
+    invalidate(brag_doc)
+    return len(lines)
+
+def _timestamp_key(line: str) -> str:
+    return line[3:22]  # formatted entry lines only
+
+def _merge_lines(brag_doc: str, lines: List[str]) -> None:
+    from brag.archive import load_blocks, merge_lines
+    from brag.tombstones import compact
+    compact(brag_doc)  # merged-in entries would land before the tombstones' marks and be hidden
+    with trace.span("doc.merge") as span:
+        blocks = load_blocks(brag_doc)
+        archived = 0
+        if blocks:
+            archived = sum(1 for line in lines if _timestamp_key(line) < blocks[-1].last)
+            merge_lines(lines[:archived], brag_doc)
+        with open(brag_doc, "r") as f:
+            existing = f.readlines()
+        if existing and not existing[-1].endswith("\n"):
+            existing[-1] += "\n"
+        tmp_path = f"{brag_doc}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(line for _, line in heapq.merge(
+                _keyed_lines(existing), ((_timestamp_key(line), line) for line in lines[archived:]),
+                key=lambda keyed: keyed[0]
+            ))
+        os.replace(tmp_path, brag_doc)
+        span.set(entries=len(lines), archived=archived)
+
+def _keyed_lines(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Pair each doc line with its entry's timestamp; other lines stay behind the entry before them."""
+    key = ""
+    for line in lines:
+        fields = parse_line(line)
+        if fields:
+            key = fields[0]
+        yield key, line
+
+def _read_lines(path: str) -> Tuple[str, ...]:
+    if not os.path.exists(path):
+        return ()
+    from brag.tombstones import load_tombstones, visible_lines
+    with trace.span("doc.read") as span:
+        tombstones = load_tombstones(path)
+        if tombstones:
+            lines = tuple(visible_lines(path, tombstones))
         else:
-            f.write(f"- [{entry.timestamp}] {entry.message}\n")
+            with open(path, "r") as f:
+                lines = tuple(f.readlines())
+        span.set(bytes=os.path.getsize(path), entries=len(lines))
+    return lines
 
-def read_history() -> List[str]:
+def cached_doc(name: str, path: str, loader: Callable[[], Any]) -> Any:
+    """Like cache.cached for data derived from the doc at path, also keyed on its tombstone log."""
+    from brag.tombstones import get_log_path
+    return cached(name, path, loader, deps=(get_log_path(path),))
+
+def read_history(include_archive: bool = False) -> List[str]:
+    """
+    Return the lines of the brag doc. With include_archive, archived entries are spliced in before
+    the doc's own entries, giving the full history in doc order.
+    """
     brag_doc = get_brag_doc_path()
-    if not os.path.exists(brag_doc):
-        return []
-    with open(brag_doc, "r") as f:
-        return f.readlines()
+    with trace.span("doc.read_history"):
+        if include_archive:
+            from brag.archive import iter_lines_with_archive
+            return list(cached_doc("full_history", brag_doc,
+                                   lambda: tuple(iter_lines_with_archive(iter(_read_lines(brag_doc)), brag_doc))))
+        return list(cached_doc("history", brag_doc, lambda: _read_lines(brag_doc)))
+
+class Entry(NamedTuple):
+    timestamp: str
+    category: Optional[str]
+    message: str
+    line: str
+
+    def to_dict(self) -> dict:
+        return {"timestamp": self.timestamp, "category": self.category, "message": self.message}
+
+def parse_entry(line: str) -> Optional[Entry]:
+    """
+    Parse a brag entry line of the form '- [timestamp] [category] message' or '- [timestamp] message'.
+    Returns None for header or malformed lines.
+    """
+    fields = parse_line(line)
+    return Entry(*fields, line) if fields else None
+
+def iter_doc_lines(path: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield the lines of the brag doc one at a time without loading the whole file. Entries hidden
+    by a purge are skipped.
+    """
+    path = path or get_brag_doc_path()
+    if not os.path.exists(path):
+        return
+    from brag.tombstones import load_tombstones, visible_lines
+    tombstones = load_tombstones(path)
+    if tombstones:
+        yield from visible_lines(path, tombstones)
+        return
+    with open(path, "r") as f:
+        yield from f
+
+def iter_doc_lines_reversed(path: Optional[str] = None, block_size: int = 1 << 16,
+                            include_hidden: bool = False) -> Iterator[str]:
+    """
+    Yield the lines of the brag doc last to first, reading the file backwards in blocks. Entries
+    hidden by a purge are skipped unless include_hidden is set.
+    """
+    path = path or get_brag_doc_path()
+    if not os.path.exists(path):
+        return
+    from brag.tombstones import load_tombstones, visible_lines
+    tombstones = () if include_hidden else load_tombstones(path)
+    if tombstones:
+        yield from visible_lines(path, tombstones, reverse=True)
+        return
+    with open(path, "rb") as f:
+        for _, raw in iter_raw_lines_reversed(f, block_size):
+            yield raw.decode("utf-8") + "\n"
 
-def purge_entries_between(start_date: str, end_date: str) -> int:
+def iter_raw_lines_reversed(f: BinaryIO, block_size: int = 1 << 16) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yield (byte offset, line without its newline) for the non-empty lines of a file opened in
+    binary mode, last to first, reading it backwards in blocks.
+    """
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    remainder = b""
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        f.seek(position)
+        block = f.read(read_size) + remainder
+        lines = block.split(b"\n")
+        # The first piece may be the tail of a line that continues in the previous block.
+        remainder = lines.pop(0)
+        end = position + len(block)
+        for raw in reversed(lines):
+            end -= len(raw)
+            if raw:
+                yield end, raw
+            end -= 1
+    if remainder:
+        yield 0, remainder
+
+def iter_entries(since: Optional[str] = None, until: Optional[str] = None,
+                 category: Optional[str] = None, reverse: bool = False,
+                 path: Optional[str] = None, query: Optional[str] = None,
+                 archived: bool = True) -> Iterator[Entry]:
+    """
+    Stream entries from the brag doc, filtered by date range (inclusive 'YYYY-MM-DD' bounds),
+    category (case-insensitive) and a text query: every whitespace-separated word of the query
+    must appear in the message, ignoring case. With reverse, the newest entries come first.
+    Archived entries are included unless archived is False; only archive blocks overlapping the
+    date range are read.
+    """
+    path = path or get_brag_doc_path()
+    lines = iter_doc_lines_reversed(path) if reverse else iter_doc_lines(path)
+    if archived:
+        from brag.archive import iter_archived_lines
+        older = iter_archived_lines(since, until, reverse, path)
+        lines = chain(lines, older) if reverse else chain(older, lines)
+    wanted = category.lower() if category else None
+    terms = query.lower().split() if query else None
+    for line in lines:
+        entry = parse_entry(line)
+        if entry is None:
+            continue
+        day = entry.timestamp[:10]
+        if since and day < since:
+            continue
+        if until and day > until:
+            continue
+        if wanted and (entry.category or "").lower() != wanted:
+            continue
+        if terms:
+            message = entry.message.lower()
+            if not all(term in message for term in terms):
+                continue
+        yield entry
+
+def page_entries(page: int, page_size: int, **filters) -> Tuple[List[Entry], bool]:
+    """
+    Return one page (0-based) of entries, newest first, and whether more pages follow.
+    filters are passed to iter_entries; only the entries up to the end of the page are parsed.
+    """
+    start = max(page, 0) * page_size
+    window = list(islice(iter_entries(reverse=True, **filters), start, start + page_size + 1))
+    return window[:page_size], len(window) > page_size
+
+def entry_hash(line: str) -> str:
+    """Return a stable identifier for a brag entry line, ignoring surrounding whitespace."""
+    return hashlib.sha1(line.strip().encode("utf-8")).hexdigest()
+
+class PurgeResult(NamedTuple):
+    removed: int
+    compacted: bool  # the purge tipped the doc into compaction, so it can't be undone
+
+def purge_entries_between(start_date: str, end_date: str) -> PurgeResult:
     """
     Purge brag doc entries between start_date and end_date (inclusive).
     Dates should be in 'YYYY-MM-DD' format.
-    Returns the number of entries removed.
+    The purge is recorded as a tombstone that readers apply; the doc is only rewritten by a
+    compaction, which runs once enough of it is purged. Returns the number of entries removed
+    and whether the doc was compacted.
     """
+    from brag.archive import iter_archived_lines
+    from brag.tombstones import add_tombstone, load_tombstones, needs_compaction, iter_visible_blocks, compact
     brag_doc = get_brag_doc_path()
     if not os.path.exists(brag_doc):
+        return PurgeResult(0, False)
+    # Reject malformed dates before anything is recorded.
+    datetime.strptime(start_date, DATE_FORMAT)
+    datetime.strptime(end_date, DATE_FORMAT)
+    with trace.span("doc.purge") as span:
+        per_day = Counter()
+        for block, _ in iter_visible_blocks(brag_doc, load_tombstones(brag_doc)):
+            per_day.update(days_in(block))
+        per_day.update(days_in("".join(iter_archived_lines(path=brag_doc)).encode("utf-8")))
+        first, last = start_date.encode("ascii"), end_date.encode("ascii")
+        visible = sum(per_day.values())
+        removed = sum(count for day, count in per_day.items() if first <= day <= last)
+        if removed:
+            add_tombstone(start_date, end_date, removed, brag_doc)
+        span.set(entries=removed)
+    compacted = bool(removed) and needs_compaction(visible - removed, brag_doc)
+    if compacted:
+        compact(brag_doc)
+    return PurgeResult(removed, compacted)
+
+def remove_lines(lines: Iterable[str]) -> int:
+    """
+    Remove the given entry lines from the brag doc, each at most once, rewriting it atomically.
+    Returns the number of lines removed.
+    """
+    from brag.tombstones import compact
+    brag_doc = get_brag_doc_path()
+    pending = Counter(line.rstrip("\n") for line in lines)
+    if not pending or not os.path.exists(brag_doc):
         return 0
     with open(brag_doc, "r") as f:
-        lines = f.readlines()
-    header = []
-    entries = []
-    for line in lines:
-        if line.startswith("- ["):
-            entries.append(line)
-        else:
-            header.append(line)
-    start_dt = datetime.strptime(start_date, DATE_FORMAT).date()
-    end_dt = datetime.strptime(end_date, DATE_FORMAT).date()
-    kept = []
+        if not any(line.rstrip("\n") in pending for line in f):
+            return 0  # e.g. the lines are archived: leave pending purges undoable
+    compact(brag_doc)
     removed = 0
-    for entry in entries:
-        try:
-            ts = entry.split(']')[0][3:]
-            entry_dt = datetime.strptime(ts, TIMESTAMP_FORMAT).date()
-            if start_dt <= entry_dt <= end_dt:
+    tmp_path = f"{brag_doc}.{os.getpid()}.tmp"
+    with open(brag_doc, "r") as src, open(tmp_path, "w") as dst:
+        for line in src:
+            key = line.rstrip("\n")
+            if pending.get(key):
+                pending[key] -= 1
                 removed += 1
                 continue
-        except Exception:
-            pass
-        kept.append(entry)
-    with open(brag_doc, "w") as f:
-        f.writelines(header + kept)
+            dst.write(line)
+    os.replace(tmp_path, brag_doc)
+    invalidate(brag_doc)
     return removed
 
 def init_brag_repo() -> str:
     """
-    Initialize a git repo in the bragdoc's directory (if not already a repo) and create the bragdoc there.
+    Initialize a git repo in the bragdoc's directory (if not already a repo) and create the bragdoc there,
+    with a .gitignore keeping brag's local cache and journal out of the repo.
     Returns the path to the bragdoc.
     """
     brag_doc = get_brag_doc_path()
     brag_dir = os.path.dirname(brag_doc)
     os.makedirs(brag_dir, exist_ok=True)
+    import git
     # Initialize git repo if not present
     if not os.path.exists(os.path.join(brag_dir, ".git")):
-        import git
         repo = git.Repo.init(brag_dir)
     else:
         repo = git.Repo(brag_dir)
+    changed = _ignore_local_files(brag_dir)
     # Create bragdoc if not present
     if not os.path.exists(brag_doc):
         with open(brag_doc, "w") as f:
             f.write(BRAG_DOC_HEADER)
         repo.git.add(brag_doc)
+        changed = True
+    if changed:
+        repo.git.add(GITIGNORE_FILE_NAME)
         repo.index.commit(GIT_INIT_COMMIT_MESSAGE)
     return brag_doc
+
+def _ignore_local_files(brag_dir: str) -> bool:
+    """Add brag's cache dir and journal to the .gitignore in brag_dir. Returns True if it changed."""
+    path = os.path.join(brag_dir, GITIGNORE_FILE_NAME)
+    try:
+        with open(path, "r") as f:
+            content = f.read()
+    except FileNotFoundError:
+        content = ""
+    present = set(content.splitlines())
+    missing = [pattern for pattern in (f"{CACHE_DIR_NAME}/", JOURNAL_FILE_NAME) if pattern not in present]
+    if not missing:
+        return False
+    with open(path, "a") as f:
+        if content and not content.endswith("\n"):
+            f.write("\n")
+        f.writelines(pattern + "\n" for pattern in missing)
+    return True
@@ -0,0 +1,103 @@
+"""
+Streaming export of brag entries. Entries flow from the doc through a generator pipeline into a
+buffered writer, so only one entry is held in memory at a time.
+"""
+import io
+import os
+import csv
+import sys
+import gzip
+import json
+from html import escape
+from typing import Callable, Dict, Iterable, Optional, TextIO
+from brag.doc_utils import Entry
+from brag.constants import BRAG_DOC_HEADER, EXPORT_BUFFER_SIZE
+
+EXPORT_FORMATS = ("jsonl", "csv", "html", "md")
+
+HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Brag Doc</title>
+</head>
+<body>
+<h1>Brag Doc</h1>
+<table>
+<thead><tr><th>Timestamp</th><th>Category</th><th>Message</th></tr></thead>
+<tbody>
+"""
+
+HTML_FOOTER = """</tbody>
+</table>
+</body>
+</html>
+"""
+
+def _write_jsonl(entries: Iterable[Entry], out: TextIO) -> int:
+    count = 0
+    for entry in entries:
+        out.write(json.dumps(entry.to_dict()) + "\n")
+        count += 1
+    return count
+
+def _write_csv(entries: Iterable[Entry], out: TextIO) -> int:
+    writer = csv.writer(out)
+    writer.writerow(["timestamp", "category", "message"])
+    count = 0
+    for entry in entries:
+        writer.writerow([entry.timestamp, entry.category or "", entry.message])
+        count += 1
+    return count
+
+def _write_html(entries: Iterable[Entry], out: TextIO) -> int:
+    out.write(HTML_HEADER)
+    count = 0
+    for entry in entries:
+        out.write(
+            f"<tr><td>{escape(entry.timestamp)}</td><td>{escape(entry.category or '')}</td>"
+            f"<td>{escape(entry.message)}</td></tr>\n"
+        )
+        count += 1
+    out.write(HTML_FOOTER)
+    return count
+
+def _write_md(entries: Iterable[Entry], out: TextIO) -> int:
+    out.write(BRAG_DOC_HEADER)
+    count = 0
+    for entry in entries:
+        out.write(entry.line if entry.line.endswith("\n") else entry.line + "\n")
+        count += 1
+    return count
+
+WRITERS: Dict[str, Callable[[Iterable[Entry], TextIO], int]] = {
+    "jsonl": _write_jsonl,
+    "csv": _write_csv,
+    "html": _write_html,
+    "md": _write_md,
+}
+
+def open_output(path: Optional[str], compress: bool = False) -> TextIO:
+    """
+    Open a buffered text stream for path ('-' or None for stdout).
+    Output is gzip-compressed when compress is set or the path ends in '.gz'.
+    """
+    if not path or path == "-":
+        if compress:
+            raise ValueError("Gzip output needs an output file.")
+        return sys.stdout
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if compress or path.endswith(".gz"):
+        return io.TextIOWrapper(
+            io.BufferedWriter(gzip.open(path, "wb"), buffer_size=EXPORT_BUFFER_SIZE),
+            encoding="utf-8", newline=""
+        )
+    return open(path, "w", encoding="utf-8", newline="", buffering=EXPORT_BUFFER_SIZE)
+
+def export_entries(entries: Iterable[Entry], fmt: str, out: TextIO) -> int:
+    """Write entries to out in the given format. Returns the number of entries written."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}. Use one of: {', '.join(EXPORT_FORMATS)}.")
+    return WRITERS[fmt](entries, out)
@@ -1,17 +1,377 @@
 import git
 import os
-from brag.doc_utils import get_brag_doc_path
-from brag.constants import GIT_COMMIT_MESSAGE
+import sys
+import json
+import time
+import hashlib
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+from brag import trace
+from brag.doc_utils import get_brag_doc_path, get_brag_data_dir, entry_hash
+from brag.constants import (
+    GIT_COMMIT_MESSAGE, GIT_REMOTE_NAME, CACHE_DIR_NAME,
+    SYNC_STATE_FILE_NAME, PUSH_STATUS_FILE_NAME, GIT_HISTORY_CACHE_FILE_NAME,
+    GIT_HISTORY_CACHE_SIZE, ENTRY_INDEX_FILE_NAME, BRAG_ENTRY_PREFIX
+)
 
-def sync_with_git():
+class SyncResult(NamedTuple):
+    commit: Optional[str]
+    squashed: bool
+    push_started: bool
+
+class CommitInfo(NamedTuple):
+    hexsha: str
+    summary: str
+    committed_datetime: datetime
+
+def get_brag_repo() -> git.Repo:
+    """Return the git repo containing the brag doc, independent of the working directory."""
     brag_doc = get_brag_doc_path()
-    repo = git.Repo(os.getcwd())
-    repo.git.add(brag_doc)
+    return git.Repo(os.path.dirname(brag_doc), search_parent_directories=True)
+
+def _cache_path(name: str) -> str:
+    return os.path.join(get_brag_data_dir(), CACHE_DIR_NAME, name)
+
+def _load_json(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _content_hash(brag_doc: str) -> str:
+    """Hash of what sync commits that can change on its own: the doc and its tombstone log."""
+    from brag.tombstones import get_log_path
+    log_path = get_log_path(brag_doc)
+    if not os.path.exists(log_path):
+        return _hash_file(brag_doc)
+    return f"{_hash_file(brag_doc)}:{_hash_file(log_path)}"
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        if os.waitpid(pid, os.WNOHANG)[0]:
+            return False  # our own push process, exited and now reaped
+    except ChildProcessError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def get_push_status() -> Dict[str, Any]:
+    """
+    Return the status of the last push, as written by the push process. A push whose process died
+    before recording its outcome is reported as failed.
+    """
+    status = _load_json(_cache_path(PUSH_STATUS_FILE_NAME))
+    if status.get("state") == "running" and not _pid_alive(status.get("pid")):
+        status.update(state="failed", error="The push process exited without recording its outcome.")
+    return status
+
+def _is_unpushed(repo: git.Repo, sha: str) -> bool:
+    """Return True if no remote-tracking branch contains the given commit."""
+    return not repo.git.branch("-r", "--contains", sha).strip()
+
+def _can_squash(repo: git.Repo) -> bool:
+    """
+    A previous sync commit can be amended when it is ours, not yet on the remote, and no push of it
+    is in flight.
+    """
+    if not repo.head.is_valid() or GIT_REMOTE_NAME not in [r.name for r in repo.remotes]:
+        return False
+    head = repo.head.commit
+    if head.message.strip() != GIT_COMMIT_MESSAGE or len(head.parents) != 1:
+        return False
+    if get_push_status().get("state") == "running":
+        return False
+    return _is_unpushed(repo, head.hexsha)
+
+def _commit_changes(repo: git.Repo, brag_doc: str) -> SyncResult:
+    from brag.archive import get_archive_dir
+    from brag.tombstones import get_log_path
+    rel_paths = [os.path.relpath(brag_doc, repo.working_tree_dir)]
+    archive_dir = get_archive_dir(brag_doc)
+    if os.path.isdir(archive_dir):
+        rel_paths.append(os.path.relpath(archive_dir, repo.working_tree_dir))
+    log_path = get_log_path(brag_doc)
+    if os.path.exists(log_path):  # an uncompacted purge only exists as a tombstone
+        rel_paths.append(os.path.relpath(log_path, repo.working_tree_dir))
+    repo.git.add(*rel_paths)
+    if repo.head.is_valid() and not repo.index.diff("HEAD", paths=rel_paths):
+        return SyncResult(None, False, False)
+    if _can_squash(repo):
+        repo.git.commit("--amend", "--no-edit")
+        return SyncResult(repo.head.commit.hexsha, True, False)
     repo.index.commit(GIT_COMMIT_MESSAGE)
-    origin = repo.remote(name='origin')
-    origin.push()
+    return SyncResult(repo.head.commit.hexsha, False, False)
+
+def push_brag_repo(repo_dir: str, status_path: str) -> Dict[str, Any]:
+    """Push the current branch to origin and record the outcome in status_path."""
+    repo = git.Repo(repo_dir)
+    sha = repo.head.commit.hexsha
+    status = {"state": "running", "sha": sha, "pid": os.getpid(), "started": time.time()}
+    _write_json(status_path, status)
+    try:
+        repo.git.push("--set-upstream", GIT_REMOTE_NAME, repo.active_branch.name)
+        status.update(state="ok", error=None)
+    except Exception as e:
+        status.update(state="failed", error=str(e))
+    status["finished"] = time.time()
+    _write_json(status_path, status)
+    return status
 
-def get_git_history():
+def _start_background_push(repo_dir: str, status_path: str) -> None:
+    """
+    Push from a detached process so the caller can return immediately. The process waits for its
+    stdin to close, so the status naming its pid is always written before any of its own.
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (package_root, env.get("PYTHONPATH")) if p)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "brag.git_utils", "push", repo_dir, status_path],
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True, close_fds=True, env=env
+    )
+    try:
+        _write_json(status_path, {"state": "running", "sha": None, "pid": proc.pid, "started": time.time()})
+    finally:
+        proc.stdin.close()
+
+def sync_with_git(background: bool = True, push: bool = True) -> SyncResult:
+    """
+    Commit the brag doc if its content changed since the last sync and push it to origin.
+
+    Consecutive syncs that haven't reached the remote yet are squashed into a single commit.
+    With background, the push runs in a detached process; see get_push_status() for the result.
+    """
+    brag_doc = get_brag_doc_path()
+    with trace.span("git.open_repo"):
+        repo = get_brag_repo()
+    state_path = _cache_path(SYNC_STATE_FILE_NAME)
+    state = _load_json(state_path)
+    content_hash = _content_hash(brag_doc)
+    result = SyncResult(None, False, False)
+    if state.get("content_hash") != content_hash:
+        with trace.span("git.commit") as span:
+            result = _commit_changes(repo, brag_doc)
+            span.set(bytes=os.path.getsize(brag_doc), squashed=result.squashed)
+        _write_json(state_path, {"content_hash": content_hash, "commit": repo.head.commit.hexsha})
+    if not push or GIT_REMOTE_NAME not in [r.name for r in repo.remotes]:
+        return result
+    with trace.span("git.check_unpushed"):
+        unpushed = _is_unpushed(repo, repo.head.commit.hexsha)
+    if not unpushed:
+        return result
+    status_path = _cache_path(PUSH_STATUS_FILE_NAME)
+    if background:
+        with trace.span("git.start_push"):
+            _start_background_push(repo.working_tree_dir, status_path)
+        return result._replace(push_started=True)
+    with trace.span("git.push"):
+        status = push_brag_repo(repo.working_tree_dir, status_path)
+    if status["state"] != "ok":
+        raise RuntimeError(status["error"])
+    return result
+
+def _find_git_dir(start: str) -> Optional[str]:
+    current = os.path.abspath(start)
+    while True:
+        candidate = os.path.join(current, ".git")
+        if os.path.isdir(candidate):
+            return candidate
+        if os.path.isfile(candidate):
+            # Worktrees and submodules point at the real git dir.
+            with open(candidate) as f:
+                content = f.read().strip()
+            if content.startswith("gitdir:"):
+                return os.path.join(current, content[len("gitdir:"):].strip())
+            return None
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+def read_head_sha() -> Optional[str]:
+    """
+    Return the sha HEAD points at by reading the ref files directly, without spawning git.
+    Returns None if the brag doc isn't in a repo or HEAD can't be resolved.
+    """
+    git_dir = _find_git_dir(os.path.dirname(get_brag_doc_path()))
+    if git_dir is None:
+        return None
+    try:
+        with open(os.path.join(git_dir, "HEAD")) as f:
+            head = f.read().strip()
+        if not head.startswith("ref:"):
+            return head or None
+        ref = head[len("ref:"):].strip()
+        # Linked worktrees keep shared refs in the common dir.
+        common_dir = git_dir
+        commondir_file = os.path.join(git_dir, "commondir")
+        if os.path.exists(commondir_file):
+            with open(commondir_file) as f:
+                common_dir = os.path.join(git_dir, f.read().strip())
+        for base in (git_dir, common_dir):
+            ref_path = os.path.join(base, ref)
+            if os.path.exists(ref_path):
+                with open(ref_path) as f:
+                    return f.read().strip() or None
+        packed_refs = os.path.join(common_dir, "packed-refs")
+        if os.path.exists(packed_refs):
+            with open(packed_refs) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        return parts[0]
+    except OSError:
+        pass
+    return None
+
+def iter_git_history(limit: Optional[int] = None, since: Optional[str] = None) -> Iterator[CommitInfo]:
+    """
+    Lazily yield commits touching the brag doc, newest first.
+    A single `git log` process is streamed, so stopping early avoids walking the rest of history.
+    """
     brag_doc = get_brag_doc_path()
-    repo = git.Repo(os.path.dirname(brag_doc))
-    return list(repo.iter_commits(paths=brag_doc))
+    repo = get_brag_repo()
+    args = ["--format=%H%x1f%cI%x1f%s"]
+    if limit:
+        args.append(f"--max-count={limit}")
+    if since:
+        args.append(f"--since={since}")
+    proc = repo.git.log(*args, "--", brag_doc, as_process=True)
+    try:
+        for raw in proc.proc.stdout:
+            parts = raw.decode("utf-8", "replace").rstrip("\n").split("\x1f", 2)
+            if len(parts) != 3:
+                continue
+            hexsha, committed, summary = parts
+            yield CommitInfo(hexsha, summary, datetime.fromisoformat(committed))
+    finally:
+        proc.proc.stdout.close()
+        proc.proc.terminate()
+        proc.proc.wait()
+
+def get_git_history(limit: Optional[int] = None, since: Optional[str] = None) -> List[CommitInfo]:
+    """
+    Return commits touching the brag doc, newest first, optionally limited in count and date.
+    Results are cached by HEAD sha, so repeat calls don't touch git at all.
+    """
+    head = read_head_sha()
+    cache_path = _cache_path(GIT_HISTORY_CACHE_FILE_NAME)
+    cache = _load_json(cache_path) if head else {}
+    query = f"{limit or ''}|{since or ''}"
+    if cache.get("head") == head and query in cache.get("queries", {}):
+        return [
+            CommitInfo(hexsha, summary, datetime.fromisoformat(committed))
+            for hexsha, summary, committed in cache["queries"][query]
+        ]
+    with trace.span("git.log") as span:
+        commits = list(iter_git_history(limit=limit, since=since))
+        span.set(entries=len(commits))
+    if head:
+        queries = cache.get("queries", {}) if cache.get("head") == head else {}
+        queries.pop(query, None)
+        while len(queries) >= GIT_HISTORY_CACHE_SIZE:
+            queries.pop(next(iter(queries)))
+        queries[query] = [[c.hexsha, c.summary, c.committed_datetime.isoformat()] for c in commits]
+        _write_json(cache_path, {"head": head, "queries": queries})
+    return commits
+
+def _index_commits(repo: git.Repo, rev_range: str, rel_path: str, index: Dict[str, Any]) -> None:
+    """Record the commit that introduced each entry line added in rev_range, oldest commit first."""
+    proc = repo.git.log(
+        "--reverse", "--format=%x00%H", "--unified=0", "--no-color", "--no-renames", "-p",
+        rev_range, "--", rel_path, as_process=True
+    )
+    entries = index["entries"]
+    commits = index["commits"]
+    added_prefix = "+" + BRAG_ENTRY_PREFIX
+    sha = None
+    try:
+        for raw in proc.proc.stdout:
+            line = raw.decode("utf-8", "replace")
+            if line.startswith("\x00"):
+                sha = line[1:].strip()
+                commits.append(sha)
+            elif sha and line.startswith(added_prefix):
+                entries.setdefault(entry_hash(line[1:]), sha)
+    finally:
+        proc.proc.stdout.close()
+        proc.proc.wait()
+
+def update_entry_index() -> Dict[str, str]:
+    """
+    Return a mapping of entry hash to the sha of the commit that introduced the entry.
+
+    The index is persisted in the brag data dir and updated incrementally: only commits after the
+    last indexed HEAD are diffed. If history was rewritten (e.g. a squashed sync commit was
+    amended), entries from commits no longer reachable from HEAD are dropped and re-indexed.
+    """
+    head = read_head_sha()
+    index_path = _cache_path(ENTRY_INDEX_FILE_NAME)
+    index = _load_json(index_path)
+    if head and index.get("head") == head:
+        return index["entries"]
+    repo = get_brag_repo()
+    if not repo.head.is_valid():
+        return {}
+    head = repo.head.commit.hexsha
+    rel_path = os.path.relpath(get_brag_doc_path(), repo.working_tree_dir)
+    if index.get("doc") != rel_path:
+        index = {}
+    index.setdefault("entries", {})
+    index.setdefault("commits", [])
+    commits = index["commits"]
+    while commits and not repo.is_ancestor(commits[-1], head):
+        dropped = commits.pop()
+        index["entries"] = {h: c for h, c in index["entries"].items() if c != dropped}
+    rev_range = f"{commits[-1]}..{head}" if commits else head
+    _index_commits(repo, rev_range, rel_path, index)
+    index.update(head=head, doc=rel_path)
+    _write_json(index_path, index)
+    return index["entries"]
+
+def get_entry_commits(history_lines: List[str]) -> Dict[str, Optional[str]]:
+    """Return the sha of the commit that introduced each entry line, or None if not yet committed."""
+    entries = update_entry_index()
+    return {
+        line: entries.get(entry_hash(line))
+        for line in history_lines if line.startswith(BRAG_ENTRY_PREFIX)
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "push":
+        sys.stdin.read()  # until the starting process has recorded our pid
+        push_brag_repo(sys.argv[2], sys.argv[3])
@@ -0,0 +1,143 @@
+"""
+Import commits from git repos as brag entries.
+
+Each repo is scanned by one `git log` process, filtered to the author's non-merge commits by git
+itself and streamed line by line, so large histories never pass through GitPython's object layer.
+The last commit ingested per repo and author is kept as a cursor in the brag data dir, and a
+re-run only asks git for the commits after it. Repos are scanned in parallel and all their new
+commits are added in one go by doc_utils.add_entries, which keeps the doc in timestamp order.
+"""
+import os
+import json
+import git
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from brag import trace
+from brag.doc_utils import add_entries, get_brag_data_dir, read_history
+from brag.parser import iter_fields_in
+from brag.constants import (
+    CACHE_DIR_NAME, INGEST_CURSORS_FILE_NAME, INGEST_WORKERS, INGEST_CATEGORISE_WINDOW,
+    INGEST_CATEGORISE_CHUNK, TIMESTAMP_FORMAT, BRAG_ENTRY_PREFIX
+)
+
+class RepoScan(NamedTuple):
+    path: str  # the repo's working tree, or the path as given if it isn't a repo
+    name: str
+    head: Optional[str]  # the sha the scan stopped at, None if the repo was skipped
+    commits: List[Tuple[str, str]]  # (timestamp, subject) of each new commit, oldest first
+    error: Optional[str] = None
+
+class IngestResult(NamedTuple):
+    scans: List[RepoScan]
+    added: int  # entries added, after skipping commits already in the history
+
+def get_cursors_path() -> str:
+    return os.path.join(get_brag_data_dir(), CACHE_DIR_NAME, INGEST_CURSORS_FILE_NAME)
+
+def load_cursors() -> Dict[str, Dict[str, str]]:
+    """Return the last ingested sha per repo path and author."""
+    try:
+        with open(get_cursors_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cursors(cursors: Dict[str, Dict[str, str]]) -> None:
+    path = get_cursors_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cursors, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _is_commit(repo: git.Repo, sha: str) -> bool:
+    try:
+        repo.git.cat_file("-e", f"{sha}^{{commit}}")
+        return True
+    except git.GitCommandError:
+        return False
+
+def _log_commits(repo: git.Repo, rev_range: str, author: str) -> List[Tuple[str, str]]:
+    proc = repo.git.log(
+        "--reverse", "--no-merges", "--fixed-strings", "--regexp-ignore-case", f"--author={author}",
+        "--format=%at%x1f%s", rev_range, as_process=True
+    )
+    commits = []
+    try:
+        for raw in proc.proc.stdout:
+            at, _, subject = raw.decode("utf-8", "replace").rstrip("\n").partition("\x1f")
+            if subject.strip():
+                commits.append((datetime.fromtimestamp(int(at)).strftime(TIMESTAMP_FORMAT), subject.strip()))
+    finally:
+        proc.proc.stdout.close()
+        proc.proc.wait()
+    return commits
+
+def scan_repo(path: str, author: str, cursors: Optional[Dict[str, str]] = None) -> RepoScan:
+    """
+    Return the author's commits in the repo at path that came after its cursor, cursors mapping
+    repo roots to the last sha ingested.
+    """
+    with trace.span("ingest.scan") as span:
+        try:
+            repo = git.Repo(path, search_parent_directories=True)
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+            return RepoScan(path, os.path.basename(os.path.abspath(path)), None, [], "not a git repository")
+        root = repo.working_tree_dir or repo.git_dir
+        name = os.path.basename(os.path.normpath(root))
+        if not repo.head.is_valid():
+            return RepoScan(root, name, None, [], "no commits")
+        head = repo.head.commit.hexsha
+        cursor = (cursors or {}).get(root)
+        if cursor == head:
+            return RepoScan(root, name, head, [])
+        # A cursor that is gone (history rewritten) means a full scan; already ingested commits
+        # are then skipped against the history.
+        rev_range = f"{cursor}..{head}" if cursor and _is_commit(repo, cursor) else head
+        try:
+            commits = _log_commits(repo, rev_range, author)
+        except git.GitCommandError as e:
+            return RepoScan(root, name, None, [], e.stderr.strip() or "git log failed")
+        span.set(repo=name, commits=len(commits))
+        return RepoScan(root, name, head, commits)
+
+def _categorise(messages: Sequence[str], workers: Optional[int]) -> List[Optional[str]]:
+    from brag.category_utils import Categoriser
+    history = [line for line in read_history() if line.startswith(BRAG_ENTRY_PREFIX)][-INGEST_CATEGORISE_WINDOW:]
+    categoriser = Categoriser(history)
+    if len(messages) <= INGEST_CATEGORISE_CHUNK:
+        return [categoriser(message) for message in messages]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(categoriser, messages, chunksize=INGEST_CATEGORISE_CHUNK))
+
+def ingest_repos(paths: Sequence[str], author: str, categorise: bool = False,
+                 workers: int = INGEST_WORKERS) -> IngestResult:
+    """
+    Add the author's new commits in each repo to the brag doc, with the repo name as category
+    (or the auto-categoriser's pick with categorise), and move each repo's cursor to its HEAD.
+    """
+    key = author.lower()
+    cursors = load_cursors()
+    author_cursors = {root: shas[key] for root, shas in cursors.items() if key in shas}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        scans = list(pool.map(lambda path: scan_repo(path, author, author_cursors), paths))
+    seen = {(timestamp, message) for timestamp, _, message in iter_fields_in("".join(read_history(include_archive=True)))}
+    candidates = []
+    for s in scans:
+        for timestamp, subject in s.commits:
+            if (timestamp, subject) not in seen:
+                seen.add((timestamp, subject))
+                candidates.append((timestamp, s.name, subject))
+    candidates.sort(key=lambda candidate: candidate[0])
+    if categorise and candidates:
+        with trace.span("ingest.categorise", entries=len(candidates)):
+            picks = _categorise([subject for _, _, subject in candidates], workers)
+        candidates = [(timestamp, pick or name, subject) for (timestamp, name, subject), pick in zip(candidates, picks)]
+    added = add_entries(candidates)
+    moved = [s for s in scans if s.head and author_cursors.get(s.path) != s.head]
+    for s in moved:
+        cursors.setdefault(s.path, {})[key] = s.head
+    if moved:
+        _save_cursors(cursors)
+    return IngestResult(scans, added)
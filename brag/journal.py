@@ -0,0 +1,269 @@
+"""
+Write-ahead journal for brag doc appends.
+
+add_entry writes each entry as a checksummed record to a small journal next to the doc, and the
+records are applied to the markdown at group commit: after every `entries` appends or once the
+oldest uncommitted one is `ms` milliseconds old, whichever comes first, the journal is fsynced,
+the records are appended to the doc, the doc is fsynced and only then is the journal emptied.
+The default of one entry makes every `brag add` durable when it returns; the daemon trades a short
+window for throughput, and entries of an open group reach the doc when it commits or when the next
+command starts. Set BRAG_GROUP_COMMIT to "N" or "N:MS" to choose, and BRAG_FSYNC=0 to skip fsync
+altogether.
+
+The journal therefore only ever holds the appends of the current group. If the process dies
+before or during a commit, recover() completes the doc from it, torn last line included. Records
+are matched to the doc by byte offset, and a journal whose records don't fit the doc's tail (the
+doc was edited or pulled since) is discarded rather than replayed.
+"""
+import os
+import zlib
+import atexit
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from brag import trace
+from brag.cache import invalidate
+from brag.constants import (
+    JOURNAL_FILE_NAME, JOURNAL_GROUP_ENTRIES, JOURNAL_GROUP_MS, GROUP_COMMIT_ENV, FSYNC_ENV
+)
+
+class Record(NamedTuple):
+    offset: int  # where the line was appended in the doc
+    line: str  # entry line without its newline
+
+class GroupCommit(NamedTuple):
+    entries: int
+    ms: int
+    fsync: bool = True
+
+_policy: Optional[GroupCommit] = None
+
+def group_commit_from_env() -> GroupCommit:
+    """Return the group commit policy set by BRAG_GROUP_COMMIT and BRAG_FSYNC, or the defaults."""
+    entries, ms = JOURNAL_GROUP_ENTRIES, JOURNAL_GROUP_MS
+    value = os.environ.get(GROUP_COMMIT_ENV, "")
+    if value:
+        parts = value.split(":", 1)
+        entries = max(1, int(parts[0]))
+        ms = int(parts[1]) if len(parts) > 1 else 0
+    return GroupCommit(entries, ms, os.environ.get(FSYNC_ENV, "1") != "0")
+
+def get_journal_path(doc_path: str) -> str:
+    """Return the journal of the brag doc at doc_path."""
+    return os.path.join(os.path.dirname(doc_path), JOURNAL_FILE_NAME)
+
+def encode_record(record: Record) -> bytes:
+    payload = f"{record.offset} {record.line}".encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+def decode_record(raw: bytes) -> Optional[Record]:
+    """Return the record in raw, or None if it is torn or fails its checksum."""
+    if not raw.endswith(b"\n") or len(raw) < 10 or raw[8:9] != b" ":
+        return None
+    payload = raw[9:-1]
+    try:
+        if int(raw[:8], 16) != zlib.crc32(payload):
+            return None
+        offset, line = payload.decode("utf-8").split(" ", 1)
+        return Record(int(offset), line)
+    except ValueError:
+        return None
+
+def read_records(journal_path: str) -> Tuple[List[Record], int]:
+    """Return the valid records of a journal and the length of the valid prefix in bytes."""
+    records, valid = [], 0
+    try:
+        with open(journal_path, "rb") as f:
+            for raw in f:
+                record = decode_record(raw)
+                if record is None:
+                    break
+                records.append(record)
+                valid += len(raw)
+    except FileNotFoundError:
+        pass
+    return records, valid
+
+def _fsync(fd: int, policy: GroupCommit) -> None:
+    if policy.fsync:
+        os.fsync(fd)
+
+class Journal:
+    """The journal of one brag doc. Thread-safe; one instance per doc per process."""
+
+    def __init__(self, doc_path: str, policy: Optional[GroupCommit] = None):
+        self.doc_path = doc_path
+        self.path = get_journal_path(doc_path)
+        self.policy = policy or _policy or group_commit_from_env()
+        self._lock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._pending: List[bytes] = []  # journalled lines not yet applied to the doc
+        self._start = 0  # doc offset of the first pending line
+        self._timer: Optional[threading.Timer] = None
+
+    def _open(self) -> int:
+        if self._fd is not None and not os.fstat(self._fd).st_nlink:
+            os.close(self._fd)  # the journal was deleted along with its directory
+            self._fd = None
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        return self._fd
+
+    def append(self, lines: List[str]) -> None:
+        """Journal the entry lines (each ending in a newline); they reach the doc at group commit."""
+        with self._lock, trace.span("journal.append") as span:
+            fd = self._open()
+            if not self._pending:
+                self._start = os.path.getsize(self.doc_path) if os.path.exists(self.doc_path) else 0
+            offset = self._start + sum(map(len, self._pending))
+            records = []
+            for line in lines:
+                raw = line.encode("utf-8")
+                records.append(encode_record(Record(offset, line.rstrip("\n"))))
+                self._pending.append(raw)
+                offset += len(raw)
+            os.write(fd, b"".join(records))
+            span.set(entries=len(lines))
+            if len(self._pending) >= self.policy.entries:
+                self.commit()
+            elif self.policy.ms and self._timer is None:
+                self._timer = threading.Timer(self.policy.ms / 1000, self.commit)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def commit(self) -> None:
+        """Fsync the journal, apply its records to the doc, fsync the doc and empty the journal."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            with trace.span("journal.fsync", entries=len(self._pending)):
+                _fsync(self._open(), self.policy)  # the group is durable before the doc is touched
+                data = b"".join(self._pending)
+                with open(self.doc_path, "ab"):
+                    pass
+                with open(self.doc_path, "rb+") as doc:
+                    size = doc.seek(0, os.SEEK_END)
+                    tail = b""
+                    if self._start <= size:
+                        doc.seek(self._start)
+                        tail = doc.read(len(data))
+                    if not data.startswith(tail):
+                        doc.seek(0, os.SEEK_END)  # the doc changed under the group: append after it
+                        tail = b""
+                    doc.write(data[len(tail):])  # recover() in another process may have applied some
+                    doc.flush()
+                    _fsync(doc.fileno(), self.policy)
+                os.ftruncate(self._open(), 0)
+                self._pending = []
+            invalidate(self.doc_path)
+
+    def checkpoint(self) -> None:
+        """Commit, or fsync the doc and empty the journal: everything journalled so far is in the markdown."""
+        with self._lock:
+            if self._pending:
+                self.commit()
+                return
+            with trace.span("journal.fsync"):
+                if os.path.exists(self.doc_path):
+                    with open(self.doc_path, "rb+") as doc:
+                        _fsync(doc.fileno(), self.policy)
+                # Not fsynced: records that survive a crash here match the durable doc and are skipped
+                os.ftruncate(self._open(), 0)
+
+    def close(self) -> None:
+        with self._lock:
+            self.commit()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+_journals: Dict[str, Journal] = {}
+_journals_lock = threading.Lock()
+
+def get_journal(doc_path: str) -> Journal:
+    """Return this process's journal for the doc at doc_path."""
+    with _journals_lock:
+        journal = _journals.get(doc_path)
+        if journal is None:
+            journal = _journals[doc_path] = Journal(doc_path)
+        return journal
+
+def set_group_commit(policy: GroupCommit) -> None:
+    """Use policy for journals opened from now on and for the open ones."""
+    global _policy
+    _policy = policy
+    with _journals_lock:
+        journals = list(_journals.values())
+    for journal in journals:
+        journal.commit()
+        journal.policy = policy
+
+def checkpoint(doc_path: str) -> None:
+    """Checkpoint the doc's journal if there is one. Call before rewriting the doc."""
+    recover(doc_path)
+    if doc_path in _journals or os.path.exists(get_journal_path(doc_path)):
+        get_journal(doc_path).checkpoint()
+
+@atexit.register
+def close_all() -> None:
+    """Commit and close every open journal."""
+    with _journals_lock:
+        journals = list(_journals.values())
+    for journal in journals:
+        journal.close()
+
+def _applied(doc, record: Record, size: int) -> bool:
+    data = (record.line + "\n").encode("utf-8")
+    if record.offset + len(data) > size:
+        return False
+    doc.seek(record.offset)
+    return doc.read(len(data)) == data
+
+def recover(doc_path: str) -> int:
+    """
+    Bring the doc up to date with its journal after a crash: drop a torn journal tail, complete a
+    torn last line in the doc and append the records the doc is missing. The journal is discarded
+    instead if the doc's tail isn't a prefix of the missing records, i.e. the doc changed since.
+    This process's open group is committed first. Returns the number of records replayed. Costs
+    one stat when there is nothing to do.
+    """
+    journal = _journals.get(doc_path)
+    if journal is not None:
+        journal.commit()  # this process's open group, e.g. in the daemon
+    journal_path = get_journal_path(doc_path)
+    if not os.path.exists(journal_path) or not os.path.getsize(journal_path):
+        return 0
+    with get_journal(doc_path)._lock:
+        records, valid = read_records(journal_path)
+        if valid < os.path.getsize(journal_path):
+            with open(journal_path, "rb+") as f:
+                f.truncate(valid)
+        if not records:
+            return 0
+        if not os.path.exists(doc_path):
+            open(doc_path, "a").close()
+        size = os.path.getsize(doc_path)
+        with open(doc_path, "rb+") as doc:
+            missing = len(records)
+            while missing > 0 and not _applied(doc, records[missing - 1], size):
+                missing -= 1
+            pending = records[missing:]
+            if pending:
+                data = "".join(record.line + "\n" for record in pending).encode("utf-8")
+                start = pending[0].offset
+                tail = b""
+                if start <= size:
+                    doc.seek(start)
+                    tail = doc.read()
+                if start > size or not data.startswith(tail):
+                    pending = []  # edited or pulled since: the offsets no longer describe this doc
+                else:
+                    doc.write(data[len(tail):])  # completes a torn append of the first missing record
+                    doc.flush()
+        if pending:
+            invalidate(doc_path)
+        get_journal(doc_path).checkpoint()
+        return len(pending)
@@ -0,0 +1,7 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class BragEntry(BaseModel):
+    timestamp: str
+    message: str
+    category: Optional[str] = None
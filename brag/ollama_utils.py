@@ -1,11 +1,24 @@
 import requests
 import json
+import os
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
 from pydantic import BaseModel
-from brag.doc_utils import get_brag_doc_path
-from brag.constants import OLLAMA_API_URL, OLLAMA_MODEL
+from brag import trace
+from brag.doc_utils import get_brag_data_dir, read_history
+from brag.category_utils import parse_brag_line
+from brag.constants import (
+    OLLAMA_API_URL, OLLAMA_MODEL, BULLET_WORKERS, UNCATEGORISED_LABEL,
+    CACHE_DIR_NAME, RESPONSE_CACHE_DIR_NAME,
+    JOB_QUEUE_FILE_NAME, JOB_WORKERS
+)
 from brag.prompts import (
     SUMMARIZE_BRAG_DOC_PROMPT, 
     GENERATE_RESUME_BULLETS_PROMPT,
+    GENERATE_CATEGORY_BULLETS_PROMPT,
     PROFILE_BASED_RESUME_PROMPT,
     PROFILE_BASED_SUMMARY_PROMPT
 )
@@ -14,32 +27,232 @@ from brag.profile import get_profile
 class OllamaResponse(BaseModel):
     response: str
 
-def summarize_brag_doc() -> str:
-    brag_doc = get_brag_doc_path()
-    with open(brag_doc, "r") as f:
-        content = f.read()
-    prompt = SUMMARIZE_BRAG_DOC_PROMPT.format(content=content)
-    response = requests.post(OLLAMA_API_URL, json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": False})
-    data = response.json()
-    return OllamaResponse(**data).response if "response" in data else "No summary generated."
-
-def generate_resume_bullets() -> str:
-    brag_doc = get_brag_doc_path()
-    with open(brag_doc, "r") as f:
-        content = f.read()
-    prompt = GENERATE_RESUME_BULLETS_PROMPT.format(content=content)
-    response = requests.post(OLLAMA_API_URL, json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": False})
-    data = response.json()
-    return OllamaResponse(**data).response if "response" in data else "No bullet points generated."
+class OllamaUnavailableError(Exception):
+    """Raised when Ollama cannot be reached. The request has been queued as a job."""
 
-def generate_profile_based_resume() -> str:
-    """Generate a resume using both profile information and brag document."""
+    def __init__(self, job_id: str):
+        super().__init__(
+            f"Ollama is not reachable at {OLLAMA_API_URL}. "
+            f"Queued job {job_id}; run `brag jobs run` once it is back."
+        )
+        self.job_id = job_id
+
+class GenerationCancelled(Exception):
+    """Raised when a streaming generation is cancelled before it finished."""
+
+class GenerationRequest(NamedTuple):
+    prompt: str
+    key: str    # response cache key
+    label: str  # shown in the job queue
+
+_queue_lock = threading.Lock()
+
+def _generate(prompt: str, model: str = OLLAMA_MODEL) -> Optional[str]:
+    """Send a prompt to Ollama and return the generated text, or None if nothing came back."""
+    with trace.span("ollama.http", model=model, prompt_chars=len(prompt)) as span:
+        response = requests.post(OLLAMA_API_URL, json={"model": model, "prompt": prompt, "stream": False})
+        span.set(status=getattr(response, "status_code", None), bytes=len(getattr(response, "content", b"") or b""))
+        data = response.json()
+    return OllamaResponse(**data).response if "response" in data else None
+
+def generate_stream(prompt: str, on_chunk: Callable[[str], None],
+                    cancel: Optional[threading.Event] = None, model: str = OLLAMA_MODEL) -> str:
+    """
+    Stream a generation from Ollama, passing each chunk of text to on_chunk as it arrives.
+    Raises GenerationCancelled as soon as cancel is set. Returns the full text.
+    """
+    if cancel is not None and cancel.is_set():
+        raise GenerationCancelled()
+    parts = []
+    with trace.span("ollama.stream", model=model, prompt_chars=len(prompt)) as span:
+        response = requests.post(OLLAMA_API_URL, json={"model": model, "prompt": prompt, "stream": True}, stream=True)
+        try:
+            _read_stream(response, parts, on_chunk, cancel)
+        finally:
+            response.close()
+            if trace.enabled():
+                span.set(bytes=sum(len(part.encode("utf-8")) for part in parts), chunks=len(parts))
+    return "".join(parts)
+
+def _read_stream(response, parts: List[str], on_chunk: Callable[[str], None],
+                 cancel: Optional[threading.Event]) -> None:
+    for line in response.iter_lines():
+        if cancel is not None and cancel.is_set():
+            raise GenerationCancelled()
+        if not line:
+            continue
+        data = json.loads(line)
+        if "error" in data:
+            raise RuntimeError(data["error"])
+        chunk = data.get("response", "")
+        if chunk:
+            parts.append(chunk)
+            on_chunk(chunk)
+        if data.get("done"):
+            break
+
+def make_cache_key(*parts: str) -> str:
+    """Return a stable content hash for the given parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def get_response_cache_dir() -> str:
+    """Return the directory holding cached Ollama responses."""
+    return os.path.join(get_brag_data_dir(), CACHE_DIR_NAME, RESPONSE_CACHE_DIR_NAME)
+
+def get_cached_response(key: str) -> Optional[str]:
+    """Return the cached response stored under key, if any."""
+    path = os.path.join(get_response_cache_dir(), f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)["response"]
+    except (ValueError, KeyError, OSError):
+        return None
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def put_cached_response(key: str, response: str) -> None:
+    """Store a response under key, replacing the cache file atomically."""
+    path = os.path.join(get_response_cache_dir(), f"{key}.json")
+    _write_json_atomic(path, {"model": OLLAMA_MODEL, "response": response})
+
+def get_job_queue_path() -> str:
+    """Return the path to the persisted queue of pending Ollama jobs."""
+    return os.path.join(get_brag_data_dir(), CACHE_DIR_NAME, JOB_QUEUE_FILE_NAME)
+
+def load_jobs() -> List[Dict[str, Any]]:
+    """Load the queued jobs, oldest first."""
+    path = get_job_queue_path()
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return []
+
+def save_jobs(jobs: List[Dict[str, Any]]) -> None:
+    """Persist the job queue atomically."""
+    _write_json_atomic(get_job_queue_path(), jobs)
+
+def enqueue_job(key: str, prompt: str, label: str) -> str:
+    """
+    Queue a generation request for later. A job whose cache key is already queued is not duplicated.
+    Returns the job id.
+    """
+    with _queue_lock:
+        jobs = load_jobs()
+        for job in jobs:
+            if job["key"] == key:
+                job["status"] = "pending"
+                save_jobs(jobs)
+                return job["id"]
+        job_id = key[:12]
+        jobs.append({
+            "id": job_id,
+            "key": key,
+            "label": label,
+            "model": OLLAMA_MODEL,
+            "prompt": prompt,
+            "status": "pending",
+            "attempts": 0,
+            "error": None,
+            "created": time.time(),
+        })
+        save_jobs(jobs)
+        return job_id
+
+def _run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    job = dict(job)
+    job["attempts"] += 1
+    try:
+        response = _generate(job["prompt"], job["model"])
+    except requests.exceptions.ConnectionError as e:
+        job["status"] = "pending"
+        job["error"] = str(e)
+        return job
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+        return job
+    if response is None:
+        job["status"] = "failed"
+        job["error"] = "Ollama returned no response."
+        return job
+    put_cached_response(job["key"], response)
+    job["status"] = "done"
+    job["error"] = None
+    return job
+
+def run_jobs(max_workers: int = JOB_WORKERS) -> Dict[str, int]:
+    """
+    Drain the job queue with bounded concurrency. Successful results are written to the response
+    cache and removed from the queue; unreachable-server and failed jobs stay queued.
+    Returns a count of jobs per resulting status.
+    """
+    pending = [job for job in load_jobs() if job["status"] != "done"]
+    counts = {"done": 0, "pending": 0, "failed": 0}
+    if not pending:
+        return counts
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+        results = {job["id"]: job for job in pool.map(_run_job, pending)}
+    with _queue_lock:
+        # Keep jobs queued by other processes while this batch was running.
+        remaining = []
+        for job in load_jobs():
+            job = results.get(job["id"], job)
+            if job["status"] != "done":
+                remaining.append(job)
+        save_jobs(remaining)
+    for job in results.values():
+        counts[job["status"]] += 1
+    return counts
+
+def _generate_cached(prompt: str, key: str, label: str) -> Optional[str]:
+    """
+    Return the cached response for key, generating and caching it if needed.
+    If Ollama is unreachable, the request is queued and OllamaUnavailableError is raised.
+    """
+    cached = get_cached_response(key)
+    if cached is not None:
+        return cached
+    try:
+        response = _generate(prompt)
+    except requests.exceptions.ConnectionError:
+        raise OllamaUnavailableError(enqueue_job(key, prompt, label))
+    if response is not None:
+        put_cached_response(key, response)
+    return response
+
+def _request(prompt: str, label: str) -> GenerationRequest:
+    return GenerationRequest(prompt, make_cache_key("generate", OLLAMA_MODEL, prompt), label)
+
+def summary_request(history_lines: Optional[List[str]] = None) -> GenerationRequest:
+    """Build the request for a summary of the brag doc, or of history_lines if given."""
+    content = "".join(read_history(include_archive=True) if history_lines is None else history_lines)
+    return _request(SUMMARIZE_BRAG_DOC_PROMPT.format(content=content), "summary")
+
+def resume_bullets_request(history_lines: Optional[List[str]] = None) -> GenerationRequest:
+    """Build the request for resume bullets over the whole brag doc, or over history_lines if given."""
+    content = "".join(read_history(include_archive=True) if history_lines is None else history_lines)
+    return _request(GENERATE_RESUME_BULLETS_PROMPT.format(content=content), "bullets")
+
+def profile_resume_request() -> GenerationRequest:
+    """Build the request for a resume from the profile and the brag doc."""
     profile = get_profile()
     profile_json = json.dumps(profile, indent=2)
     
-    brag_doc = get_brag_doc_path()
-    with open(brag_doc, "r") as f:
-        content = f.read()
+    content = "".join(read_history(include_archive=True))
     
     title = profile.get("title", "Developer")
     prompt = PROFILE_BASED_RESUME_PROMPT.format(
@@ -47,19 +260,14 @@ def generate_profile_based_resume() -> str:
         content=content,
         title=title
     )
-    
-    response = requests.post(OLLAMA_API_URL, json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": False})
-    data = response.json()
-    return OllamaResponse(**data).response if "response" in data else "No resume generated."
+    return _request(prompt, "profile resume")
 
-def generate_profile_based_summary() -> str:
-    """Generate a professional summary using both profile information and brag document."""
+def profile_summary_request() -> GenerationRequest:
+    """Build the request for a professional summary from the profile and the brag doc."""
     profile = get_profile()
     profile_json = json.dumps(profile, indent=2)
     
-    brag_doc = get_brag_doc_path()
-    with open(brag_doc, "r") as f:
-        content = f.read()
+    content = "".join(read_history(include_archive=True))
     
     name = profile.get("name", "Developer")
     prompt = PROFILE_BASED_SUMMARY_PROMPT.format(
@@ -67,7 +275,68 @@ def generate_profile_based_summary() -> str:
         content=content,
         name=name
     )
-    
-    response = requests.post(OLLAMA_API_URL, json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": False})
-    data = response.json()
-    return OllamaResponse(**data).response if "response" in data else "No professional summary generated."
+    return _request(prompt, "profile summary")
+
+def summarize_brag_doc(history_lines: Optional[List[str]] = None) -> str:
+    response = _generate_cached(*summary_request(history_lines))
+    return response if response is not None else "No summary generated."
+
+def group_entries_by_category(history_lines: List[str]) -> Dict[Optional[str], List[str]]:
+    """
+    Group brag entry lines by their [category] tag, preserving the order within each group.
+    Entries without a category are grouped under None.
+    """
+    groups: Dict[Optional[str], List[str]] = {}
+    for line in history_lines:
+        category, message = parse_brag_line(line)
+        if not message:
+            continue
+        groups.setdefault(category or None, []).append(line.strip())
+    return groups
+
+def generate_category_bullets(category: Optional[str], entries: List[str]) -> str:
+    """
+    Generate bullets for a single category. Results are cached by a content hash of the
+    category's entries, so unchanged categories are never sent to the model again.
+    """
+    label = category or UNCATEGORISED_LABEL
+    key = make_cache_key("bullets", OLLAMA_MODEL, label, *entries)
+    prompt = GENERATE_CATEGORY_BULLETS_PROMPT.format(category=label, content="\n".join(entries))
+    response = _generate_cached(prompt, key, f"bullets: {label}")
+    return response if response is not None else "No bullet points generated."
+
+def generate_resume_bullets(per_category: bool = False, max_workers: int = BULLET_WORKERS,
+                            history_lines: Optional[List[str]] = None) -> str:
+    """
+    Generate resume bullet points from the brag doc, or from history_lines if given.
+
+    With per_category, entries are split by their [category] tag and each category is generated
+    concurrently on a bounded worker pool. Results are merged in a stable order: categories sorted
+    alphabetically, uncategorised entries last.
+    """
+    if per_category:
+        groups = group_entries_by_category(read_history(include_archive=True) if history_lines is None else history_lines)
+        if not groups:
+            return "No bullet points generated."
+        categories = sorted((c for c in groups if c is not None), key=str.lower)
+        if None in groups:
+            categories.append(None)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(categories)))) as pool:
+            results = list(pool.map(lambda c: generate_category_bullets(c, groups[c]), categories))
+        sections = [
+            f"## {category or UNCATEGORISED_LABEL}\n{bullets.strip()}"
+            for category, bullets in zip(categories, results)
+        ]
+        return "\n\n".join(sections)
+    response = _generate_cached(*resume_bullets_request(history_lines))
+    return response if response is not None else "No bullet points generated."
+
+def generate_profile_based_resume() -> str:
+    """Generate a resume using both profile information and brag document."""
+    response = _generate_cached(*profile_resume_request())
+    return response if response is not None else "No resume generated."
+
+def generate_profile_based_summary() -> str:
+    """Generate a professional summary using both profile information and brag document."""
+    response = _generate_cached(*profile_summary_request())
+    return response if response is not None else "No professional summary generated."
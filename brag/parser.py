@@ -0,0 +1,94 @@
+"""
+The brag entry parser. An entry line is '- [YYYY-MM-DD HH:MM:SS] [Category] message', the category
+being optional. Timestamps are returned as their fixed-width 19-character string, which sorts
+chronologically, so callers compare them without converting. Anything else (the header, blank
+lines, hand edits with a malformed timestamp) is not an entry.
+
+Every reader goes through the compiled patterns here, except category_utils.parse_brag_line whose
+string splitting is cheaper per line than creating a match object. The per-line functions cost one
+regex match and no splitting; the *_in functions scan a whole buffer of lines in one call, which
+is what bulk readers such as stats and category extraction should use.
+"""
+import re
+from typing import AnyStr, Iterator, List, Optional, Tuple
+
+_TIMESTAMP = r"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)"
+_DAY = r"(\d{4}-\d\d-\d\d) \d\d:\d\d:\d\d"
+_CATEGORY = r"(?:\[([^\]\n]*)\] *)?"
+_ENTRY = r"- \[" + _TIMESTAMP + r"\] +" + _CATEGORY + r"([^\n]*)"
+
+# Per-line patterns are anchored by match(). The buffer patterns start with the newline before
+# each line (the *_in functions prepend one for the first line): a literal prefix lets the regex
+# engine skip ahead to the next line start instead of trying every position like ^ with MULTILINE.
+# Timestamps are ASCII digits, and re.ASCII spares \d the Unicode digit lookup.
+ENTRY_PATTERN = re.compile(_ENTRY, re.ASCII)
+DAY_PATTERN = re.compile(r"- \[" + _DAY + r"\] ", re.ASCII)
+DAY_BYTES_PATTERN = re.compile(DAY_PATTERN.pattern.encode("ascii"))
+ENTRIES_PATTERN = re.compile(r"\n" + _ENTRY, re.ASCII)
+DAYS_PATTERN = re.compile(r"\n- \[" + _DAY + r"\] ", re.ASCII)
+DAYS_BYTES_PATTERN = re.compile(DAYS_PATTERN.pattern.encode("ascii"))
+HEADS_PATTERN = re.compile(r"\n- \[" + _DAY + r"\] +" + _CATEGORY, re.ASCII)
+CATEGORIES_PATTERN = re.compile(r"\n- \[\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\] +\[([^\]\n]*)\]", re.ASCII)
+
+TIMESTAMP, CATEGORY, MESSAGE = 1, 2, 3  # group numbers: match.span(CATEGORY) etc.
+
+Fields = Tuple[str, Optional[str], str]  # (timestamp, category or None, message)
+
+def match_entry(line: str) -> Optional["re.Match[str]"]:
+    """Return the match of an entry line, whose TIMESTAMP/CATEGORY/MESSAGE spans locate its parts."""
+    return ENTRY_PATTERN.match(line)
+
+def _fields(match: "re.Match[str]") -> Fields:
+    timestamp, category, message = match.groups()
+    return timestamp, (category.strip() or None) if category else None, message.rstrip()
+
+def parse_line(line: str) -> Optional[Fields]:
+    """Return (timestamp, category, message) of an entry line, or None if it isn't one."""
+    match = ENTRY_PATTERN.match(line)
+    if match is None:
+        return None
+    timestamp, category, message = match.groups()  # inlined _fields: this is the per-line hot path
+    return timestamp, (category.strip() or None) if category else None, message.rstrip()
+
+def entry_day(line: str) -> Optional[str]:
+    """Return the 'YYYY-MM-DD' date of an entry line, or None if it isn't one."""
+    match = DAY_PATTERN.match(line)
+    return match.group(1) if match else None
+
+def iter_fields_in(buffer: str) -> Iterator[Fields]:
+    """Yield (timestamp, category, message) for every entry line in a buffer of lines."""
+    return map(_fields, ENTRIES_PATTERN.finditer("\n" + buffer))
+
+def days_in(buffer: AnyStr) -> List[AnyStr]:
+    """
+    Return the 'YYYY-MM-DD' date of every entry line in a buffer, in order. Raw doc bytes are
+    scanned without decoding and give bytes dates.
+    """
+    if isinstance(buffer, bytes):
+        return DAYS_BYTES_PATTERN.findall(b"\n" + buffer)
+    return DAYS_PATTERN.findall("\n" + buffer)
+
+def _days_pattern(first: Optional[bytes], last: Optional[bytes]) -> "re.Pattern[bytes]":
+    if first is None or last is None:
+        return DAYS_BYTES_PATTERN
+    years = b"|".join(b"%d" % year for year in range(int(first[:4]), int(last[:4]) + 1))
+    return re.compile(rb"\n- \[((?:" + years + rb")-\d\d-\d\d) \d\d:\d\d:\d\d\] ")
+
+def iter_days_at(data: bytes, end: Optional[int] = None, first: Optional[bytes] = None,
+                 last: Optional[bytes] = None) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yield (byte offset, bytes date) of every entry line of raw doc bytes that ends by offset end.
+    Given first and last dates, lines from other years are skipped inside the regex engine, so
+    callers only see candidates and still compare the full dates.
+    """
+    stop = len(data) if end is None else min(end, len(data))
+    for match in _days_pattern(first, last).finditer(b"\n" + data, 0, stop + 1):
+        yield match.start(), match.group(1)
+
+def heads_in(buffer: str) -> List[Tuple[str, str]]:
+    """Return (date, category) of every entry line in a buffer; the category is '' if it has none."""
+    return HEADS_PATTERN.findall("\n" + buffer)
+
+def categories_in(buffer: str) -> List[str]:
+    """Return the category of every categorised entry line in a buffer, as written."""
+    return CATEGORIES_PATTERN.findall("\n" + buffer)
@@ -1,7 +1,12 @@
 import os
+import copy
 import json
-from typing import Dict, Optional, Any
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Any, Tuple
 import platform
+from brag.cache import file_key
 from brag.constants import (
     PROFILE_FILE_NAME,
     WINDOWS_BASE_PATH, DARWIN_APP_SUPPORT_PATH, LINUX_DATA_PATH, XDG_DATA_HOME_ENV
@@ -39,112 +44,190 @@ def get_profile_path(test_path: str = None) -> str:
         xdg = os.environ.get(XDG_DATA_HOME_ENV, os.path.join(home, LINUX_DATA_PATH))
         return os.path.join(xdg, PROFILE_FILE_NAME)
 
+def default_profile() -> Dict[str, Any]:
+    """Return an empty profile."""
+    return {
+        "name": "",
+        "title": "",
+        "skills": [],
+        "experience": [],
+        "education": [],
+        "contact": {
+            "email": "",
+            "phone": "",
+            "linkedin": "",
+            "github": ""
+        },
+        "summary": ""
+    }
+
+def _parent(profile: Dict[str, Any], field: str, create: bool = True) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Resolve a dotted field like "contact.email" to (containing dict, key)."""
+    parts = field.split(".")
+    current = profile
+    for part in parts[:-1]:
+        if part not in current:
+            if not create:
+                return None, parts[-1]
+            current[part] = {}
+        current = current[part]
+    return current, parts[-1]
+
+def set_field(profile: Dict[str, Any], field: str, value: Any) -> None:
+    """Set a (possibly nested) field on a profile dict."""
+    parent, key = _parent(profile, field)
+    parent[key] = value
+
+def append_item(profile: Dict[str, Any], field: str, item: Any) -> None:
+    """Append an item to a (possibly nested) list field on a profile dict."""
+    parent, key = _parent(profile, field)
+    if key not in parent:
+        parent[key] = []
+    if not isinstance(parent[key], list):
+        parent[key] = [parent[key]]
+    parent[key].append(item)
+
+def pop_item(profile: Dict[str, Any], field: str, index: int) -> Optional[Any]:
+    """Remove an item from a (possibly nested) list field by index. Returns None if there is none."""
+    parent, key = _parent(profile, field, create=False)
+    if parent is None or key not in parent or not isinstance(parent[key], list):
+        return None
+    if index >= len(parent[key]):
+        return None
+    return parent[key].pop(index)
+
+class ProfileStore:
+    """
+    Reads and writes the profile file. Reads are served from memory until the file's
+    (inode, size, mtime) changes, and edits made inside transaction() are written once,
+    atomically, when the block exits.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._lock = threading.RLock()
+        self._cache: Optional[Tuple[str, Tuple[int, int, int], Dict[str, Any]]] = None
+        self._pending: Optional[Dict[str, Any]] = None
+
+    @property
+    def path(self) -> str:
+        # Resolved on every access so a default store follows IS_TESTING and env changes.
+        return self._path or get_profile_path()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _load(self) -> Dict[str, Any]:
+        path = self.path
+        key = file_key(path)
+        if key is None:
+            return default_profile()
+        if self._cache and self._cache[0] == path and self._cache[1] == key:
+            return self._cache[2]
+        with open(path, "r") as f:
+            data = json.load(f)
+        self._cache = (path, key, data)
+        return data
+
+    def get(self) -> Dict[str, Any]:
+        """Return a copy of the profile (the pending state inside a transaction)."""
+        with self._lock:
+            if self._pending is not None:
+                return copy.deepcopy(self._pending)
+            return copy.deepcopy(self._load())
+
+    def save(self, profile_data: Dict[str, Any]) -> None:
+        """Replace the profile with profile_data using a temp file and an atomic rename."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.clear()
+                self._pending.update(copy.deepcopy(profile_data))
+                return
+            self._write(profile_data)
+
+    def _write(self, profile_data: Dict[str, Any]) -> None:
+        path = self.path
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".brag_profile.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(profile_data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._cache = (path, file_key(path), copy.deepcopy(profile_data))
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the profile as a mutable dict and write it once when the block exits without an
+        error. Nested transactions join the outer one.
+        """
+        with self._lock:
+            if self._pending is not None:
+                yield self._pending
+                return
+            self._pending = copy.deepcopy(self._load())
+            try:
+                yield self._pending
+                self._write(self._pending)
+            finally:
+                self._pending = None
+
+    def invalidate(self) -> None:
+        """Drop the cached profile so the next read goes to disk."""
+        with self._lock:
+            self._cache = None
+
+_default_store = ProfileStore()
+
+def get_profile_store() -> ProfileStore:
+    """Return the store used by the module-level profile functions."""
+    return _default_store
+
 def init_profile() -> bool:
     """Initialize a profile file if it doesn't exist."""
-    profile_path = get_profile_path()
-    if not os.path.exists(profile_path):
-        os.makedirs(os.path.dirname(profile_path), exist_ok=True)
-        default_profile = {
-            "name": "",
-            "title": "",
-            "skills": [],
-            "experience": [],
-            "education": [],
-            "contact": {
-                "email": "",
-                "phone": "",
-                "linkedin": "",
-                "github": ""
-            },
-            "summary": ""
-        }
-        save_profile(default_profile)
+    store = get_profile_store()
+    if not store.exists():
+        store.save(default_profile())
         return True
     return False
 
 def save_profile(profile_data: Dict[str, Any]) -> None:
     """Save profile data to file."""
-    profile_path = get_profile_path()
-    with open(profile_path, "w") as f:
-        json.dump(profile_data, f, indent=2)
+    get_profile_store().save(profile_data)
 
 def get_profile() -> Dict[str, Any]:
     """Get profile data from file."""
-    profile_path = get_profile_path()
-    if not os.path.exists(profile_path):
-        init_profile()
-        return get_profile()
-    
-    with open(profile_path, "r") as f:
-        return json.load(f)
+    init_profile()
+    return get_profile_store().get()
+
+def update_profile_fields(values: Dict[str, Any]) -> None:
+    """Update several profile fields with a single write."""
+    init_profile()
+    with get_profile_store().transaction() as profile:
+        for field, value in values.items():
+            set_field(profile, field, value)
+    from brag.completion import record_profile_field_use
+    record_profile_field_use(*values)
 
 def update_profile_field(field: str, value: Any) -> None:
     """Update a specific profile field."""
-    profile = get_profile()
-    
-    # Handle nested fields like "contact.email"
-    if "." in field:
-        parts = field.split(".")
-        current = profile
-        for part in parts[:-1]:
-            if part not in current:
-                current[part] = {}
-            current = current[part]
-        current[parts[-1]] = value
-    else:
-        profile[field] = value
-    
-    save_profile(profile)
+    update_profile_fields({field: value})
 
 def add_list_item(field: str, item: Any) -> None:
     """Add an item to a list field in the profile."""
-    profile = get_profile()
-    
-    # Handle nested fields
-    if "." in field:
-        parts = field.split(".")
-        current = profile
-        for part in parts[:-1]:
-            if part not in current:
-                current[part] = {}
-            current = current[part]
-        if parts[-1] not in current:
-            current[parts[-1]] = []
-        if not isinstance(current[parts[-1]], list):
-            current[parts[-1]] = [current[parts[-1]]]
-        current[parts[-1]].append(item)
-    else:
-        if field not in profile:
-            profile[field] = []
-        if not isinstance(profile[field], list):
-            profile[field] = [profile[field]]
-        profile[field].append(item)
-    
-    save_profile(profile)
+    init_profile()
+    with get_profile_store().transaction() as profile:
+        append_item(profile, field, item)
 
 def remove_list_item(field: str, index: int) -> Optional[Any]:
     """Remove an item from a list field by index."""
-    profile = get_profile()
-    
-    # Handle nested fields
-    if "." in field:
-        parts = field.split(".")
-        current = profile
-        for part in parts[:-1]:
-            if part not in current:
-                return None
-            current = current[part]
-        if parts[-1] not in current or not isinstance(current[parts[-1]], list):
-            return None
-        if index >= len(current[parts[-1]]):
-            return None
-        removed = current[parts[-1]].pop(index)
-    else:
-        if field not in profile or not isinstance(profile[field], list):
-            return None
-        if index >= len(profile[field]):
-            return None
-        removed = profile[field].pop(index)
-    
-    save_profile(profile)
-    return removed 
\ No newline at end of file
+    init_profile()
+    with get_profile_store().transaction() as profile:
+        return pop_item(profile, field, index)
@@ -13,6 +13,11 @@ Generate resume bullet points from the following brag doc. Summarise each projec
 {content}
 """
 
+GENERATE_CATEGORY_BULLETS_PROMPT = """
+Generate one or two resume bullet points for the project "{category}" from the following brag doc entries. Only output the bullets. Format of the input file: - [Date] [Project Name] Brag):
+{content}
+"""
+
 # Profile-aware prompts
 PROFILE_BASED_RESUME_PROMPT = """
 Using the developer's profile information and brag document, generate a comprehensive resume that highlights their professional experience and achievements.
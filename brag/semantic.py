@@ -0,0 +1,196 @@
+"""
+Semantic search over the brag history.
+
+Entries are embedded through Ollama's embeddings endpoint and their unit-length vectors are kept
+next to the doc in `.brag_cache/embeddings`: `vectors.f32` is a float32 matrix with one row per
+entry, read through np.memmap, and `ids.json` maps each row to its entry line. Only entries
+without a row are sent to Ollama, and rows of purged entries are simply dropped from the map.
+A query is one matrix-vector product over the whole matrix, with the date and category filters
+applied as masks before the top k rows are picked.
+"""
+import os
+import json
+import requests
+import numpy as np
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from brag import trace
+from brag.cache import cached, file_key, invalidate
+from brag.doc_utils import Entry, get_brag_doc_path, iter_entries, parse_entry
+from brag.constants import (
+    CACHE_DIR_NAME, EMBEDDING_DIR_NAME, EMBEDDING_BATCH, OLLAMA_EMBED_URL, OLLAMA_EMBED_MODEL,
+    SEMANTIC_TOP_K
+)
+
+VECTORS_FILE_NAME = "vectors.f32"
+IDS_FILE_NAME = "ids.json"
+
+class EmbeddingUnavailableError(Exception):
+    """Raised when the Ollama embeddings endpoint cannot be reached."""
+
+    def __init__(self, detail: str):
+        super().__init__(
+            f"Could not get embeddings from {OLLAMA_EMBED_URL} ({detail}). "
+            f"Semantic search needs Ollama with an embedding model: `ollama pull {OLLAMA_EMBED_MODEL}`."
+        )
+
+class Match(NamedTuple):
+    score: float  # cosine similarity to the query
+    entry: Entry
+
+class Index(NamedTuple):
+    vectors: np.ndarray  # (rows, dim) float32, memory-mapped
+    lines: List[Optional[str]]  # entry line of each row, None once the entry is gone
+    days: np.ndarray  # 'YYYY-MM-DD' of each row, '' for dropped rows
+    categories: np.ndarray  # lower-cased category of each row, '' if none
+
+def get_index_dir(path: Optional[str] = None) -> str:
+    """Return the embedding index directory of the brag doc at path (the default doc if None)."""
+    return os.path.join(os.path.dirname(path or get_brag_doc_path()), CACHE_DIR_NAME, EMBEDDING_DIR_NAME)
+
+def _doc_key(path: str) -> List[Any]:
+    from brag.archive import get_archive_dir
+    from brag.constants import ARCHIVE_INDEX_FILE_NAME
+    from brag.tombstones import get_log_path
+    archive_index = os.path.join(get_archive_dir(path), ARCHIVE_INDEX_FILE_NAME)
+    keys = (file_key(path), file_key(get_log_path(path)), file_key(archive_index))
+    return [list(key) if key else None for key in keys]  # as it reads back from JSON
+
+def _load_ids(ids_path: str) -> Dict[str, Any]:
+    try:
+        with open(ids_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_ids(ids_path: str, ids: Dict[str, Any]) -> None:
+    tmp_path = f"{ids_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(ids, f)
+    os.replace(tmp_path, ids_path)
+
+def embedding_text(entry: Entry) -> str:
+    """Return the text embedded for an entry: its message, led by its category if it has one."""
+    return f"{entry.category}: {entry.message}" if entry.category else entry.message
+
+def embed(texts: Sequence[str], model: str = OLLAMA_EMBED_MODEL) -> np.ndarray:
+    """Return the unit-length float32 embeddings of texts, one row each."""
+    with trace.span("semantic.embed", model=model, entries=len(texts)) as span:
+        try:
+            response = requests.post(OLLAMA_EMBED_URL, json={"model": model, "input": list(texts)})
+            response.raise_for_status()
+            vectors = np.asarray(response.json()["embeddings"], dtype=np.float32)
+        except requests.exceptions.RequestException as e:
+            raise EmbeddingUnavailableError(type(e).__name__)
+        except (ValueError, KeyError):
+            raise EmbeddingUnavailableError("unexpected response")
+        span.set(status=response.status_code, bytes=len(response.content))
+    if vectors.ndim != 2 or len(vectors) != len(texts):
+        raise EmbeddingUnavailableError("unexpected response")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def _append_vectors(vectors_path: str, rows: int, dim: int, vectors: np.ndarray) -> None:
+    with open(vectors_path, "ab") as f:
+        f.truncate(rows * dim * 4)  # drop rows a crash wrote without recording them in ids.json
+        f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+
+def update_index(path: Optional[str] = None, model: str = OLLAMA_EMBED_MODEL,
+                 batch_size: int = EMBEDDING_BATCH) -> int:
+    """
+    Embed the entries of the doc at path that have no vector yet and drop the rows of entries
+    that are gone. Returns the number of entries embedded. A no-op while the doc, its tombstone
+    log and its archive are unchanged since the last update.
+    """
+    brag_doc = path or get_brag_doc_path()
+    if not os.path.exists(brag_doc):
+        return 0
+    index_dir = get_index_dir(brag_doc)
+    ids_path = os.path.join(index_dir, IDS_FILE_NAME)
+    vectors_path = os.path.join(index_dir, VECTORS_FILE_NAME)
+    ids = _load_ids(ids_path)
+    doc_key = _doc_key(brag_doc)
+    if ids.get("model") == model and ids.get("doc_key") == doc_key:
+        return 0
+    if ids.get("model") != model:
+        ids = {"model": model, "dim": None, "lines": []}
+        if os.path.exists(vectors_path):
+            os.remove(vectors_path)
+    os.makedirs(index_dir, exist_ok=True)
+    with trace.span("semantic.update") as span:
+        rows = {line: row for row, line in enumerate(ids["lines"]) if line is not None}
+        live, new = set(), []
+        for entry in iter_entries(path=brag_doc):
+            line = entry.line.rstrip("\n")
+            if line not in live:
+                live.add(line)
+                if line not in rows:
+                    new.append(entry)
+        lines = [line if line in live else None for line in ids["lines"]]
+        for start in range(0, len(new), batch_size):
+            batch = new[start:start + batch_size]
+            vectors = embed([embedding_text(entry) for entry in batch], model)
+            if ids["dim"] is None:
+                ids["dim"] = int(vectors.shape[1])
+            _append_vectors(vectors_path, len(lines), ids["dim"], vectors)
+            lines.extend(entry.line.rstrip("\n") for entry in batch)
+            ids["lines"] = lines
+            _save_ids(ids_path, ids)  # keep what was embedded if a later batch fails
+        ids["lines"] = lines
+        ids["doc_key"] = doc_key
+        _save_ids(ids_path, ids)
+        span.set(entries=len(new))
+    invalidate(ids_path)
+    return len(new)
+
+def _read_index(ids_path: str, vectors_path: str) -> Index:
+    ids = _load_ids(ids_path)
+    lines = ids.get("lines", [])
+    if not lines or not ids.get("dim"):
+        return Index(np.empty((0, 0), dtype=np.float32), [], np.empty(0, dtype="U10"), np.empty(0, dtype=str))
+    vectors = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(len(lines), ids["dim"]))
+    entries = [parse_entry(line) if line is not None else None for line in lines]
+    days = np.array([entry.timestamp[:10] if entry else "" for entry in entries], dtype="U10")
+    categories = np.array([(entry.category or "").lower() if entry else "" for entry in entries])
+    return Index(vectors, lines, days, categories)
+
+def load_index(path: Optional[str] = None) -> Index:
+    """Return the embedding index of the doc at path, memory-mapped and cached until it changes."""
+    index_dir = get_index_dir(path)
+    ids_path = os.path.join(index_dir, IDS_FILE_NAME)
+    vectors_path = os.path.join(index_dir, VECTORS_FILE_NAME)
+    return cached("semantic_index", ids_path, lambda: _read_index(ids_path, vectors_path), deps=(vectors_path,))
+
+def top_k(index: Index, query_vector: np.ndarray, k: int, since: Optional[str] = None,
+          until: Optional[str] = None, category: Optional[str] = None) -> List[Tuple[int, float]]:
+    """Return the (row, score) of the k rows most similar to query_vector that pass the filters."""
+    if not index.lines:
+        return []
+    scores = index.vectors @ query_vector
+    mask = index.days != ""
+    if since:
+        mask &= index.days >= since
+    if until:
+        mask &= index.days <= until
+    if category:
+        mask &= index.categories == category.lower()
+    scores = np.where(mask, scores, -np.inf)
+    k = min(k, int(mask.sum()))
+    if k <= 0:
+        return []
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return [(int(row), float(scores[row])) for row in best]
+
+def semantic_search(query: str, k: int = SEMANTIC_TOP_K, since: Optional[str] = None,
+                    until: Optional[str] = None, category: Optional[str] = None,
+                    path: Optional[str] = None) -> List[Match]:
+    """Return the k entries of the doc at path closest in meaning to query, best first."""
+    model = OLLAMA_EMBED_MODEL
+    update_index(path, model)
+    index = load_index(path)
+    if not index.lines:
+        return []
+    query_vector = embed([query], model)[0]
+    with trace.span("semantic.query", entries=len(index.lines)):
+        best = top_k(index, query_vector, k, since, until, category)
+    return [Match(score, parse_entry(index.lines[row] + "\n")) for row, score in best]
@@ -0,0 +1,219 @@
+"""
+Brag doc analytics. Entries are parsed once into NumPy columns (epoch days and category ids),
+and every statistic is a bucketed aggregation over those columns.
+"""
+from datetime import date, timedelta
+from functools import partial
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+from brag.doc_utils import cached_doc, get_brag_doc_path, iter_doc_lines
+from brag.parser import heads_in
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+EPOCH = date(1970, 1, 1)
+
+class EntryColumns(NamedTuple):
+    days: np.ndarray          # int64 days since the epoch, one per entry
+    category_ids: np.ndarray  # int64 index into categories, -1 for uncategorised
+    categories: List[str]
+
+def _to_epoch_days(dates: List[str]) -> np.ndarray:
+    try:
+        return np.array(dates, dtype="datetime64[D]").astype(np.int64)
+    except ValueError:
+        # Fall back to per-item parsing so one malformed timestamp doesn't hide the rest.
+        parsed = []
+        for value in dates:
+            try:
+                parsed.append(np.datetime64(value, "D"))
+            except ValueError:
+                parsed.append(np.datetime64("NaT"))
+        return np.array(parsed, dtype="datetime64[D]").astype(np.int64)
+
+def _parse_columns(path: str, since: Optional[str] = None, until: Optional[str] = None) -> EntryColumns:
+    from brag.archive import iter_lines_with_archive
+    heads = heads_in("".join(iter_lines_with_archive(iter_doc_lines(path), path, since, until)))
+    dates = [day for day, _ in heads]
+    names = []
+    category_index: Dict[str, int] = {}
+    for _, category in heads:
+        category = category.strip()
+        names.append(category_index.setdefault(category, len(category_index)) if category else -1)
+    days = _to_epoch_days(dates) if dates else np.empty(0, dtype=np.int64)
+    category_ids = np.array(names, dtype=np.int64)
+    valid = days != np.iinfo(np.int64).min  # NaT
+    columns = EntryColumns(days[valid], category_ids[valid], list(category_index))
+    return filter_columns(columns, since, until) if since or until else columns
+
+def load_entry_columns(path: Optional[str] = None, since: Optional[str] = None,
+                       until: Optional[str] = None) -> EntryColumns:
+    """
+    Return the brag doc's entries in an inclusive 'YYYY-MM-DD' date range as columns, re-parsing
+    only when the doc changes. Archive blocks outside the range are never decompressed.
+    """
+    path = path or get_brag_doc_path()
+    return cached_doc(f"entry_columns:{since}:{until}", path, lambda: _parse_columns(path, since, until))
+
+def merge_columns(parts: Sequence[EntryColumns]) -> EntryColumns:
+    """Concatenate columns from several docs, unifying their category ids by name."""
+    categories: Dict[str, int] = {}
+    days, ids = [], []
+    for part in parts:
+        mapping = np.array([categories.setdefault(name, len(categories)) for name in part.categories] + [-1], dtype=np.int64)
+        days.append(part.days)
+        ids.append(mapping[part.category_ids])  # -1 indexes the trailing -1
+    if not days:
+        return EntryColumns(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), [])
+    return EntryColumns(np.concatenate(days), np.concatenate(ids), list(categories))
+
+def load_docs_columns(paths: Sequence[str], since: Optional[str] = None,
+                      until: Optional[str] = None) -> EntryColumns:
+    """Parse several brag docs in parallel worker processes and merge their columns."""
+    from brag.workspace import map_docs
+    return merge_columns(map_docs(partial(load_entry_columns, since=since, until=until), list(paths)))
+
+def filter_columns(columns: EntryColumns, since: Optional[str] = None,
+                   until: Optional[str] = None) -> EntryColumns:
+    """Restrict columns to an inclusive 'YYYY-MM-DD' date range."""
+    mask = np.ones(len(columns.days), dtype=bool)
+    if since:
+        mask &= columns.days >= np.datetime64(since, "D").astype(np.int64)
+    if until:
+        mask &= columns.days <= np.datetime64(until, "D").astype(np.int64)
+    return EntryColumns(columns.days[mask], columns.category_ids[mask], columns.categories)
+
+def sparkline(values) -> str:
+    """Render a sequence of counts as a one-line text sparkline."""
+    values = np.asarray(values)
+    if values.size == 0:
+        return ""
+    peak = values.max()
+    if peak == 0:
+        return SPARK_CHARS[0] * values.size
+    levels = np.ceil(values / peak * (len(SPARK_CHARS) - 1)).astype(int)
+    return "".join(SPARK_CHARS[level] for level in levels)
+
+def _day_str(day: int) -> str:
+    return (EPOCH + timedelta(days=int(day))).isoformat()
+
+def _week_start(week: int) -> str:
+    # Epoch day 0 is a Thursday; shifting by 3 makes weeks start on Monday.
+    return _day_str(week * 7 - 3)
+
+def _month_str(month: int) -> str:
+    return f"{1970 + month // 12:04d}-{month % 12 + 1:02d}"
+
+def _longest_streak(unique_days: np.ndarray):
+    if unique_days.size == 0:
+        return 0, None, None
+    breaks = np.flatnonzero(np.diff(unique_days) != 1)
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [unique_days.size - 1]))
+    lengths = ends - starts + 1
+    best = int(np.argmax(lengths))
+    return int(lengths[best]), int(unique_days[starts[best]]), int(unique_days[ends[best]])
+
+def _current_streak(unique_days: np.ndarray, today: int) -> int:
+    if unique_days.size == 0 or unique_days[-1] < today - 1:
+        return 0
+    breaks = np.flatnonzero(np.diff(unique_days) != 1)
+    start = breaks[-1] + 1 if breaks.size else 0
+    return int(unique_days.size - start)
+
+def compute_stats(columns: EntryColumns, top: int = 3, trend_months: int = 3,
+                  today: Optional[date] = None) -> Dict[str, Any]:
+    """Compute entry counts per week/month/category, category trends, streaks and busiest periods."""
+    days = columns.days
+    today_day = ((today or date.today()) - EPOCH).days
+    if days.size == 0:
+        return {"total": 0}
+
+    weeks = (days + 3) // 7
+    first_week = int(weeks.min())
+    per_week = np.bincount(weeks - first_week)
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    first_month = int(months.min())
+    month_offsets = months - first_month
+    per_month = np.bincount(month_offsets)
+
+    n_categories = len(columns.categories)
+    categorised = columns.category_ids >= 0
+    per_category = np.bincount(columns.category_ids[categorised], minlength=n_categories)
+    # One bincount over (category, month) pairs gives the full category-by-month matrix.
+    n_months = per_month.size
+    matrix = np.bincount(
+        columns.category_ids[categorised] * n_months + month_offsets[categorised],
+        minlength=n_categories * n_months
+    ).reshape(n_categories, n_months)
+    recent = matrix[:, -trend_months:].sum(axis=1)
+    previous = matrix[:, -2 * trend_months:-trend_months].sum(axis=1) if n_months > trend_months else np.zeros(n_categories, dtype=np.int64)
+
+    categories = []
+    for idx in np.argsort(-per_category, kind="stable"):
+        if not per_category[idx]:
+            continue
+        categories.append({
+            "category": columns.categories[idx],
+            "count": int(per_category[idx]),
+            "recent": int(recent[idx]),
+            "previous": int(previous[idx]),
+            "per_month": matrix[idx].tolist(),
+        })
+
+    unique_days = np.unique(days)
+    longest, longest_start, longest_end = _longest_streak(unique_days)
+    busiest_weeks = np.argsort(-per_week, kind="stable")[:top]
+    busiest_months = np.argsort(-per_month, kind="stable")[:top]
+    return {
+        "total": int(days.size),
+        "first": _day_str(days.min()),
+        "last": _day_str(days.max()),
+        "uncategorised": int((~categorised).sum()),
+        "per_week": {"start": _week_start(first_week), "counts": per_week.tolist()},
+        "per_month": {"start": _month_str(first_month), "counts": per_month.tolist()},
+        "categories": categories,
+        "streaks": {
+            "longest": longest,
+            "longest_start": _day_str(longest_start) if longest else None,
+            "longest_end": _day_str(longest_end) if longest else None,
+            "current": _current_streak(unique_days, today_day),
+            "active_days": int(unique_days.size),
+        },
+        "busiest_weeks": [
+            {"week_of": _week_start(first_week + int(w)), "count": int(per_week[w])} for w in busiest_weeks if per_week[w]
+        ],
+        "busiest_months": [
+            {"month": _month_str(first_month + int(m)), "count": int(per_month[m])} for m in busiest_months if per_month[m]
+        ],
+    }
+
+def format_stats(stats: Dict[str, Any], width: int = 52) -> str:
+    """Render computed stats as text with sparklines."""
+    if not stats["total"]:
+        return "No entries found."
+    lines = [f"Entries: {stats['total']} ({stats['first']} to {stats['last']})"]
+    weekly = stats["per_week"]["counts"][-width:]
+    monthly = stats["per_month"]["counts"][-width:]
+    lines.append(f"Per week (last {len(weekly)}):  {sparkline(weekly)}")
+    lines.append(f"Per month (last {len(monthly)}): {sparkline(monthly)}")
+    if stats["categories"]:
+        lines.append("")
+        lines.append("Categories:")
+        name_width = max(len(c["category"]) for c in stats["categories"])
+        for c in stats["categories"]:
+            trend = c["recent"] - c["previous"]
+            lines.append(
+                f"  {c['category']:<{name_width}}  {c['count']:>5}  {sparkline(c['per_month'][-width:])}  "
+                f"({'+' if trend >= 0 else ''}{trend} vs previous period)"
+            )
+    if stats["uncategorised"]:
+        lines.append(f"  (uncategorised: {stats['uncategorised']})")
+    streaks = stats["streaks"]
+    lines.append("")
+    lines.append(
+        f"Longest streak: {streaks['longest']} days ({streaks['longest_start']} to {streaks['longest_end']}), "
+        f"current streak: {streaks['current']} days, active days: {streaks['active_days']}"
+    )
+    lines.append("Busiest weeks: " + ", ".join(f"week of {w['week_of']} ({w['count']})" for w in stats["busiest_weeks"]))
+    lines.append("Busiest months: " + ", ".join(f"{m['month']} ({m['count']})" for m in stats["busiest_months"]))
+    return "\n".join(lines)
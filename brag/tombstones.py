@@ -0,0 +1,211 @@
+"""
+Deferred purges. A purge appends a tombstone (a date range, a generation number and the doc's last
+entry line at the time, its mark) to a small log next to the brag doc instead of rewriting it, and
+every reader drops the entries a live tombstone covers. Entries after the last occurrence of the
+mark were added after the purge and stay visible even when their dates fall in the range. Being
+a line rather than a byte offset, the mark still holds after the doc is edited by hand or pulled;
+only if the mark line itself is gone do readers fall back to the doc's size at the purge.
+
+The doc is rewritten only by compact(), which runs automatically once the purged share of entries
+passes COMPACT_THRESHOLD. Until then `brag purge --undo` simply drops the newest tombstone.
+"""
+import os
+import json
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from brag import trace
+from brag.cache import cached, invalidate
+from brag.constants import TOMBSTONE_FILE_NAME, COMPACT_THRESHOLD, PURGE_SCAN_BYTES
+from brag.parser import DAY_BYTES_PATTERN, entry_day, iter_days_at
+
+class Tombstone(NamedTuple):
+    generation: int
+    start: str  # inclusive YYYY-MM-DD bounds
+    end: str
+    offset: int  # doc size in bytes when the purge was made
+    entries: int  # entries hidden when the purge was made
+    mark: Optional[str] = None  # last entry line in the doc when the purge was made, if any
+
+def _doc_path(path: Optional[str]) -> str:
+    from brag import doc_utils
+    return path or doc_utils.get_brag_doc_path()
+
+def get_log_path(path: Optional[str] = None) -> str:
+    """Return the tombstone log of the brag doc at path (the default doc if None)."""
+    return os.path.join(os.path.dirname(_doc_path(path)), TOMBSTONE_FILE_NAME)
+
+def _load_raw(log_path: str) -> Dict[str, Any]:
+    try:
+        with open(log_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save(log_path: str, log: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    tmp_path = f"{log_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(log, f)
+    os.replace(tmp_path, log_path)
+
+def load_tombstones(path: Optional[str] = None) -> Tuple[Tombstone, ...]:
+    """Return the live tombstones of the doc at path, oldest first."""
+    log_path = get_log_path(path)
+    if not os.path.exists(log_path):
+        return ()
+    return cached("tombstones", log_path,
+                  lambda: tuple(Tombstone(**t) for t in _load_raw(log_path).get("tombstones", [])))
+
+def is_hidden(line: str, tombstones: Iterable[Tombstone]) -> bool:
+    """Return True if a tombstone covers the archived entry line; archived entries predate them all."""
+    day = entry_day(line)
+    return day is not None and any(t.start <= day <= t.end for t in tombstones)
+
+def _mark_ends(path: str, tombstones: Tuple[Tombstone, ...]) -> List[int]:
+    """
+    Return, for each tombstone, the offset just past the doc's last line equal to its mark. Marks
+    sit near the end of the doc, so it is read backwards only until every mark is found.
+    """
+    from brag.doc_utils import iter_raw_lines_reversed
+    size = os.path.getsize(path)
+    wanted = {t.mark.encode("utf-8") for t in tombstones if t.mark is not None}
+    found: Dict[bytes, int] = {}
+    if wanted:
+        with open(path, "rb") as f:
+            for offset, raw in iter_raw_lines_reversed(f):
+                if raw in wanted and raw not in found:
+                    found[raw] = min(offset + len(raw) + 1, size)
+                    if len(found) == len(wanted):
+                        break
+    # A mark line that was edited away falls back to the doc's size at the purge.
+    return [t.offset if t.mark is None else found.get(t.mark.encode("utf-8"), min(t.offset, size))
+            for t in tombstones]
+
+def _ranges(path: str, tombstones: Tuple[Tombstone, ...]) -> List[Tuple[bytes, bytes, int]]:
+    return [(t.start.encode("ascii"), t.end.encode("ascii"), limit)
+            for t, limit in zip(tombstones, _mark_ends(path, tombstones))]
+
+def iter_visible_blocks(path: str, tombstones: Tuple[Tombstone, ...]) -> Iterator[Tuple[bytes, int]]:
+    """
+    Stream the raw doc at path in blocks of whole lines, yielding each without the entry lines the
+    tombstones cover and how many were dropped. Blocks past the newest purge's mark pass through.
+    """
+    ranges = _ranges(path, tombstones) if tombstones else []
+    newest = max((limit for _, _, limit in ranges), default=0)
+    first = min((start for start, _, _ in ranges), default=None)
+    last = max((end for _, end, _ in ranges), default=None)
+    with open(path, "rb") as f:
+        offset = 0
+        for block in iter(lambda: b"".join(f.readlines(PURGE_SCAN_BYTES)), b""):
+            if offset >= newest:
+                yield block, 0
+            else:
+                parts, position, removed = [], 0, 0
+                for at, day in iter_days_at(block, newest - offset, first, last):
+                    if first <= day <= last and any(start <= day <= end and offset + at < limit
+                                                    for start, end, limit in ranges):
+                        parts.append(block[position:at])
+                        position = block.find(b"\n", at) + 1 or len(block)
+                        removed += 1
+                parts.append(block[position:])
+                yield b"".join(parts), removed
+            offset += len(block)
+
+def _reversed_visible_lines(path: str, tombstones: Tuple[Tombstone, ...]) -> Iterator[str]:
+    from brag.doc_utils import iter_raw_lines_reversed
+    ranges = _ranges(path, tombstones)
+    newest = max(limit for _, _, limit in ranges)
+    with open(path, "rb") as f:
+        for offset, raw in iter_raw_lines_reversed(f):
+            if offset < newest:
+                match = DAY_BYTES_PATTERN.match(raw)
+                if match and any(start <= match.group(1) <= end and offset < limit for start, end, limit in ranges):
+                    continue
+            yield raw.decode("utf-8") + "\n"
+
+def visible_lines(path: str, tombstones: Tuple[Tombstone, ...], reverse: bool = False) -> Iterator[str]:
+    """
+    Yield the doc's lines that no tombstone covers. The doc is streamed a block at a time, or
+    line by line from the end with reverse, which skips blank lines like iter_doc_lines_reversed.
+    """
+    if not os.path.exists(path):
+        return
+    if reverse:
+        yield from _reversed_visible_lines(path, tombstones)
+        return
+    for block, _ in iter_visible_blocks(path, tombstones):
+        yield from block.decode("utf-8").splitlines(keepends=True)
+
+def _last_entry_line(path: str) -> Optional[str]:
+    from brag.doc_utils import iter_doc_lines_reversed
+    from brag.parser import match_entry
+    for line in iter_doc_lines_reversed(path, include_hidden=True):
+        if match_entry(line):
+            return line.rstrip("\n")
+    return None
+
+def add_tombstone(start: str, end: str, entries: int, path: Optional[str] = None) -> Tombstone:
+    """Record a purge of the entries between start and end (inclusive) currently in the doc."""
+    brag_doc = _doc_path(path)
+    log_path = get_log_path(brag_doc)
+    log = _load_raw(log_path)
+    generation = log.get("generation", 0) + 1
+    size = os.path.getsize(brag_doc) if os.path.exists(brag_doc) else 0
+    tombstone = Tombstone(generation, start, end, size, entries, _last_entry_line(brag_doc))
+    log["generation"] = generation
+    log.setdefault("tombstones", []).append(tombstone._asdict())
+    _save(log_path, log)
+    invalidate(brag_doc)
+    return tombstone
+
+def undo_last(path: Optional[str] = None) -> Optional[Tombstone]:
+    """Drop the newest live tombstone, restoring its entries. Returns it, or None if there is none."""
+    brag_doc = _doc_path(path)
+    log_path = get_log_path(brag_doc)
+    log = _load_raw(log_path)
+    if not log.get("tombstones"):
+        return None
+    tombstone = Tombstone(**log["tombstones"].pop())
+    _save(log_path, log)
+    invalidate(brag_doc)
+    return tombstone
+
+def hidden_fraction(visible_entries: int, path: Optional[str] = None) -> float:
+    """Return the share of entries hidden by live tombstones, given the number still visible."""
+    hidden = sum(t.entries for t in load_tombstones(path))
+    total = hidden + visible_entries
+    return hidden / total if total else 0.0
+
+def needs_compaction(visible_entries: int, path: Optional[str] = None) -> bool:
+    """Return True once the hidden share of entries passes COMPACT_THRESHOLD."""
+    return hidden_fraction(visible_entries, path) > COMPACT_THRESHOLD
+
+def compact(path: Optional[str] = None) -> int:
+    """
+    Rewrite the doc and any archive blocks that hold purged entries without them, then clear the
+    live tombstones. Returns the number of entries removed.
+    """
+    from brag.journal import checkpoint
+    brag_doc = _doc_path(path)
+    checkpoint(brag_doc)  # every rewrite of the doc compacts first
+    tombstones = load_tombstones(brag_doc)
+    if not tombstones:
+        return 0
+    from brag.archive import compact_blocks
+    with trace.span("doc.compact") as span:
+        ranges = [(t.start, t.end) for t in tombstones]
+        removed = compact_blocks(ranges, lambda line: is_hidden(line, tombstones), brag_doc)
+        if os.path.exists(brag_doc):
+            tmp_path = f"{brag_doc}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                for block, hidden in iter_visible_blocks(brag_doc, tombstones):
+                    f.write(block)
+                    removed += hidden
+            os.replace(tmp_path, brag_doc)
+        log_path = get_log_path(brag_doc)
+        log = _load_raw(log_path)
+        log["tombstones"] = []
+        log["compacted"] = log.get("generation", 0)
+        _save(log_path, log)
+        span.set(entries=removed)
+    invalidate(brag_doc)
+    return removed
@@ -0,0 +1,165 @@
+"""
+Lightweight span timing for brag's hot paths.
+
+Tracing is off unless BRAG_TRACE names a file (each finished span is appended to it as a JSON
+line) or `brag --profile` collects spans for a summary table. While it is off, span() returns a
+shared no-op object, so an instrumented call costs one global lookup and one function call.
+"""
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, List, Optional
+from brag.constants import TRACE_ENV
+
+_enabled = False
+_sink = None
+_collected: Optional[List[Dict[str, Any]]] = None
+_lock = threading.Lock()
+_local = threading.local()
+# Import timings noted before tracing could be switched on by a command-line flag.
+_startup: List[Dict[str, Any]] = []
+_module_loaded = time.perf_counter()
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+_NO_SPAN = _NoSpan()
+
+class Span:
+    """A timed phase. Attach counts such as bytes or entries with set()."""
+    __slots__ = ("name", "attrs", "_start", "_wall")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = _stack()
+        self.attrs.setdefault("parent", stack[-1].name if stack else None)
+        stack.append(self)
+        self._wall = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        _emit(self.name, self._wall, duration, len(stack), self.attrs)
+        return False
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+def _stack() -> List[Span]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def _emit(name: str, wall: float, duration: float, depth: int, attrs: Dict[str, Any]) -> None:
+    record = {"span": name, "start": round(wall, 6), "duration_ms": round(duration * 1000, 3),
+              "depth": depth, "pid": os.getpid()}
+    record.update(attrs)
+    with _lock:
+        if _sink is not None:
+            _sink.write(json.dumps(record, default=str) + "\n")
+        if _collected is not None:
+            _collected.append(record)
+
+def span(name: str, **attrs) -> Any:
+    """Return a context manager timing the enclosed block as the named span."""
+    if not _enabled:
+        return _NO_SPAN
+    return Span(name, attrs)
+
+def record(name: str, started: float, **attrs) -> None:
+    """Record a span that started at perf_counter() value started and ends now."""
+    if _enabled:
+        duration = time.perf_counter() - started
+        _emit(name, time.time() - duration, duration, len(_stack()), attrs)
+
+def note_import(module: str) -> None:
+    """Note how long the modules imported since brag.trace took to load, e.g. at the end of brag.cli."""
+    duration = time.perf_counter() - _module_loaded
+    entry = {"span": f"import.{module}", "duration": duration, "wall": time.time() - duration}
+    if _enabled:
+        _emit(entry["span"], entry["wall"], duration, 0, {})
+    else:
+        _startup.append(entry)
+
+def enabled() -> bool:
+    return _enabled
+
+def enable(path: Optional[str] = None, collect: bool = False) -> None:
+    """Start tracing to a JSON-lines file at path and/or into memory for summary()."""
+    global _enabled, _sink, _collected
+    with _lock:
+        if path and _sink is None:
+            _sink = open(path, "a", buffering=1)
+        if collect:
+            _collected = []
+        _enabled = _sink is not None or _collected is not None
+    if _enabled:
+        for entry in _startup:
+            _emit(entry["span"], entry["wall"], entry["duration"], 0, {})
+        _startup.clear()
+
+def stop_collecting() -> List[Dict[str, Any]]:
+    """Stop collecting spans in memory and return them. Tracing to BRAG_TRACE carries on."""
+    global _enabled, _collected
+    with _lock:
+        collected = _collected or []
+        _collected = None
+        _enabled = _sink is not None
+    return collected
+
+def disable() -> List[Dict[str, Any]]:
+    """Stop tracing. Returns the spans collected in memory, if any."""
+    global _enabled, _sink, _collected
+    with _lock:
+        collected = _collected or []
+        if _sink is not None:
+            _sink.close()
+        _enabled = False
+        _sink = None
+        _collected = None
+    return collected
+
+def summary(records: List[Dict[str, Any]]) -> str:
+    """Render spans as a table of calls and total/mean/max time per span name, slowest first."""
+    rows: Dict[str, Dict[str, float]] = {}
+    for rec in records:
+        row = rows.setdefault(rec["span"], {"calls": 0, "total": 0.0, "max": 0.0, "bytes": 0, "entries": 0})
+        row["calls"] += 1
+        row["total"] += rec["duration_ms"]
+        row["max"] = max(row["max"], rec["duration_ms"])
+        for counter in ("bytes", "entries"):
+            if isinstance(rec.get(counter), int):
+                row[counter] += rec[counter]
+    if not rows:
+        return "No spans recorded."
+    width = max(len("span"), max(len(name) for name in rows))
+    lines = [f"{'span':<{width}}  {'calls':>5}  {'total ms':>9}  {'mean ms':>8}  {'max ms':>8}  {'bytes':>9}  {'entries':>7}"]
+    for name, row in sorted(rows.items(), key=lambda item: -item[1]["total"]):
+        lines.append(
+            f"{name:<{width}}  {row['calls']:>5}  {row['total']:>9.2f}  {row['total'] / row['calls']:>8.2f}  "
+            f"{row['max']:>8.2f}  {row['bytes'] or '':>9}  {row['entries'] or '':>7}"
+        )
+    return "\n".join(lines)
+
+if os.environ.get(TRACE_ENV):
+    enable(os.environ[TRACE_ENV])
@@ -0,0 +1,183 @@
+"""
+Named workspaces: a registry of brag docs besides the default one, and queries across them.
+
+Per-doc results are merged lazily by timestamp with heapq.merge. A query with a limit fans out
+over a process pool, one task per doc, with filters and the limit pushed down into the workers so
+each doc sends back at most `limit` entries. Without a limit each doc is streamed by its own worker
+process in chunks through a bounded queue, so the docs are read in parallel while memory stays
+bounded however many entries match.
+"""
+import os
+import json
+import heapq
+import multiprocessing
+from queue import Empty
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from brag.doc_utils import Entry, get_brag_doc_path, get_brag_data_dir, iter_entries
+from brag.constants import (
+    WORKSPACES_FILE_NAME, DEFAULT_WORKSPACE_NAME, WORKSPACE_WORKERS, WORKSPACE_CHUNK_ENTRIES,
+    WORKSPACE_QUEUE_CHUNKS
+)
+
+Doc = Tuple[str, str]  # (workspace name, doc path)
+
+class WorkspaceError(ValueError):
+    """Raised for unknown or invalid workspace names."""
+
+def get_registry_path() -> str:
+    """Return the path to the workspace registry, next to the default brag doc."""
+    return os.path.join(get_brag_data_dir(), WORKSPACES_FILE_NAME)
+
+def load_workspaces() -> Dict[str, str]:
+    """Return the registered workspaces as {name: doc path}."""
+    try:
+        with open(get_registry_path(), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_workspaces(workspaces: Dict[str, str]) -> None:
+    path = get_registry_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(workspaces, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def add_workspace(name: str, path: str) -> str:
+    """Register a brag doc under name. Returns the absolute doc path."""
+    if not name or name == DEFAULT_WORKSPACE_NAME:
+        raise WorkspaceError(f"'{name}' can't be used as a workspace name.")
+    path = os.path.abspath(os.path.expanduser(path))
+    workspaces = load_workspaces()
+    workspaces[name] = path
+    _save_workspaces(workspaces)
+    return path
+
+def remove_workspace(name: str) -> bool:
+    """Unregister a workspace. The doc itself is left alone. Returns False if it wasn't registered."""
+    workspaces = load_workspaces()
+    if name not in workspaces:
+        return False
+    del workspaces[name]
+    _save_workspaces(workspaces)
+    return True
+
+def resolve_docs(doc: Optional[str] = None, all_docs: bool = False) -> List[Doc]:
+    """
+    Return the (name, path) docs selected by --doc/--all: the default doc when neither is given,
+    the named doc, or the default doc followed by every registered one.
+    """
+    default = (DEFAULT_WORKSPACE_NAME, get_brag_doc_path())
+    workspaces = load_workspaces()
+    if all_docs:
+        docs = [default]
+        seen = {os.path.abspath(default[1])}
+        for name in sorted(workspaces):
+            if os.path.abspath(workspaces[name]) not in seen:
+                seen.add(os.path.abspath(workspaces[name]))
+                docs.append((name, workspaces[name]))
+        return docs
+    if doc is None or doc == DEFAULT_WORKSPACE_NAME:
+        return [default]
+    if doc not in workspaces:
+        raise WorkspaceError(f"Unknown workspace '{doc}'. Register it with `brag workspace add {doc} PATH`.")
+    return [(doc, workspaces[doc])]
+
+def map_docs(func: Callable[[str], Any], paths: Sequence[str], max_workers: Optional[int] = WORKSPACE_WORKERS) -> List[Any]:
+    """Apply func to each doc path, on a process pool when there is more than one doc."""
+    if len(paths) <= 1:
+        return [func(path) for path in paths]
+    workers = min(len(paths), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, paths))
+
+class _DocQuery:
+    """Picklable per-doc task: read up to limit of one doc's matching entries, in merge order."""
+
+    def __init__(self, filters: Dict[str, Any], reverse: bool, limit: Optional[int]):
+        self.filters = filters
+        self.reverse = reverse
+        self.limit = limit
+
+    def __call__(self, path: str) -> List[Entry]:
+        return list(islice(self.stream(path), self.limit))
+
+    def stream(self, path: str) -> Iterator[Entry]:
+        """Yield the doc's matching entries lazily, ignoring the limit."""
+        if not os.path.exists(path):
+            return iter(())
+        return iter_entries(reverse=self.reverse, path=path, **self.filters)
+
+def _labelled(name: str, entries: Iterable[Entry]) -> Iterator[Tuple[str, Entry]]:
+    for entry in entries:
+        yield name, entry
+
+def _send_entries(task: _DocQuery, path: str, queue: Any) -> None:
+    """Worker process: put the doc's matching entries on queue in chunks, then None."""
+    try:
+        entries = task.stream(path)
+        for chunk in iter(lambda: list(islice(entries, WORKSPACE_CHUNK_ENTRIES)), []):
+            queue.put(chunk)
+    except Exception as e:
+        queue.put(e)
+        return
+    queue.put(None)
+
+def _received_entries(process: Any, queue: Any) -> Iterator[Entry]:
+    while True:
+        try:
+            chunk = queue.get(timeout=1)
+        except Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"The worker reading a brag doc exited with code {process.exitcode}.")
+            continue
+        if chunk is None:
+            return
+        if isinstance(chunk, Exception):
+            raise chunk
+        yield from chunk
+
+def _streamed_by_workers(docs: Sequence[Doc], task: _DocQuery,
+                         max_workers: Optional[int]) -> Iterator[Tuple[str, Entry]]:
+    """
+    Merge every matching entry of the docs, each doc read by its own worker process while the
+    merge consumes the others. Docs beyond max_workers are read in this process. The workers are
+    stopped when the merge is exhausted or closed.
+    """
+    workers = min(len(docs), max_workers or os.cpu_count() or 1) if len(docs) > 1 else 0
+    context = multiprocessing.get_context()
+    processes, streams = [], []
+    try:
+        for index, (name, path) in enumerate(docs):
+            if index < workers:
+                queue = context.Queue(WORKSPACE_QUEUE_CHUNKS)
+                process = context.Process(target=_send_entries, args=(task, path, queue), daemon=True)
+                process.start()
+                processes.append(process)
+                streams.append(_labelled(name, _received_entries(process, queue)))
+            else:
+                streams.append(_labelled(name, task.stream(path)))
+        yield from heapq.merge(*streams, key=lambda item: item[1].timestamp, reverse=task.reverse)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+def iter_merged_entries(docs: Sequence[Doc], since: Optional[str] = None, until: Optional[str] = None,
+                        category: Optional[str] = None, query: Optional[str] = None,
+                        reverse: bool = False, limit: Optional[int] = None,
+                        max_workers: Optional[int] = WORKSPACE_WORKERS) -> Iterator[Tuple[str, Entry]]:
+    """
+    Yield (workspace name, entry) from all docs in timestamp order (newest first with reverse),
+    stopping after limit entries.
+    """
+    task = _DocQuery({"since": since, "until": until, "category": category, "query": query}, reverse, limit)
+    if not limit:
+        return _streamed_by_workers(docs, task, max_workers)
+    per_doc = map_docs(task, [path for _, path in docs], max_workers)
+    streams = [_labelled(name, entries) for (name, _), entries in zip(docs, per_doc)]
+    return islice(heapq.merge(*streams, key=lambda item: item[1].timestamp, reverse=reverse), limit)
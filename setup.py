@@ -10,11 +10,15 @@ setup(
         "typer",
         "GitPython",
         "requests",
-        "pydantic"
+        "pydantic",
+        "numpy"
     ],
+    extras_require={
+        "zstd": ["zstandard"]
+    },
     entry_points={
         "console_scripts": [
-            "brag=brag.cli:app"
+            "brag=brag.client:main"
         ]
     },
     python_requires=">=3.8",
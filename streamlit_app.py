@@ -1,15 +1,20 @@
 import streamlit as st
-from brag.doc_utils import init_brag_doc, add_entry, read_history, purge_entries_between, init_brag_repo, get_brag_doc_path
-from brag.git_utils import sync_with_git, get_git_history
+from brag.doc_utils import init_brag_doc, add_entry, purge_entries_between, init_brag_repo, get_brag_doc_path
+from brag.git_utils import sync_with_git
 from brag.ollama_utils import (
-    summarize_brag_doc, generate_resume_bullets,
-    generate_profile_based_resume, generate_profile_based_summary
+    summary_request, resume_bullets_request,
+    profile_resume_request, profile_summary_request
 )
+from brag.background import GenerationPool
 from brag.profile import (
-    init_profile, get_profile, update_profile_field,
+    init_profile, update_profile_fields,
     add_list_item, remove_list_item
 )
-from brag.constants import PROFILE_FIELDS
+from brag.app_data import (
+    current_keys, load_history_page, load_categories, load_profile, load_git_history,
+    invalidate_doc, invalidate_profile
+)
+from brag.constants import PROFILE_FIELDS, GIT_HISTORY_LIMIT, HISTORY_PAGE_SIZES
 from datetime import datetime, timedelta
 import re
 import json
@@ -17,12 +22,47 @@ import json
 st.set_page_config(page_title="Brag Doc Manager", layout="centered")
 st.title("Brag Doc Manager 📝")
 
+# --- Cached data access ---
+# Loaders are keyed on (inode, size, mtime_ns) of the files and on the repo's HEAD, so a rerun
+# where nothing changed only stats the files. Writes below also clear the caches explicitly.
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_history_page(doc_key, page, page_size, since, until, category, query):
+    return load_history_page(doc_key, page, page_size, since, until, category, query)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_categories(doc_key):
+    return load_categories(doc_key)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_profile(profile_key):
+    return load_profile(profile_key)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_git_history(head, limit):
+    return load_git_history(head, limit)
+
+# One generation pool for every session, so the same request is never generated twice at once.
+@st.cache_resource
+def generation_pool():
+    return GenerationPool()
+
+def refresh_doc():
+    invalidate_doc()
+    cached_history_page.clear()
+    cached_categories.clear()
+    cached_git_history.clear()
+
+def refresh_profile():
+    invalidate_profile()
+    cached_profile.clear()
+
 # --- Initialize Brag Doc ---
 st.header("Initialize Brag Doc")
 col1, col2, col3 = st.columns(3)
 with col1:
     if st.button("Initialize Brag Doc"):
         created = init_brag_doc()
+        refresh_doc()
         if created:
             st.success("Brag doc initialized.")
         else:
@@ -30,10 +70,12 @@ with col1:
 with col2:
     if st.button("Init Git Repo with Brag Doc"):
         bragdoc_path = init_brag_repo()
+        refresh_doc()
         st.success(f"Initialized git repo and brag doc at: {bragdoc_path}")
 with col3:
     if st.button("Initialize Profile"):
         created = init_profile()
+        refresh_profile()
         if created:
             st.success("Developer profile initialized.")
         else:
@@ -41,22 +83,32 @@ with col3:
 
 # --- Profile Management ---
 with st.expander("Profile Management"):
-    profile = get_profile()
+    profile = cached_profile(current_keys().profile)
     
     # Show current profile
     st.subheader("Your Developer Profile")
     st.json(profile)
     
-    # Update basic fields
+    # Update basic fields; all changed fields are saved with a single write
     st.subheader("Update Basic Information")
-    basic_field = st.selectbox("Select field to update", 
-                              ["name", "title", "summary", "contact.email", 
-                               "contact.phone", "contact.linkedin", "contact.github"])
-    field_value = st.text_input("New value", value="")
-    if st.button("Update Field") and field_value:
-        update_profile_field(basic_field, field_value)
-        st.success(f"Updated {basic_field}")
-        st.rerun()
+    basic_fields = ["name", "title", "summary", "contact.email",
+                    "contact.phone", "contact.linkedin", "contact.github"]
+    with st.form("basic_info"):
+        new_values = {}
+        for basic_field in basic_fields:
+            current = profile
+            for part in basic_field.split("."):
+                current = current.get(part, "") if isinstance(current, dict) else ""
+            new_values[basic_field] = (current, st.text_input(basic_field, value=current or ""))
+        if st.form_submit_button("Save Changes"):
+            changed = {field: value for field, (current, value) in new_values.items() if value != (current or "")}
+            if changed:
+                update_profile_fields(changed)
+                refresh_profile()
+                st.success(f"Updated {', '.join(changed)}")
+                st.rerun()
+            else:
+                st.info("No changes to save")
     
     # List fields management
     st.subheader("Manage List Fields")
@@ -68,6 +120,7 @@ with st.expander("Profile Management"):
         new_item = st.text_input("New item", value="")
         if st.button("Add Item") and new_item:
             add_list_item(list_field, new_item)
+            refresh_profile()
             st.success(f"Added to {list_field}")
             st.rerun()
     
@@ -79,6 +132,7 @@ with st.expander("Profile Management"):
             if st.button("Remove Item") and profile.get(list_field):
                 if item_index < len(profile.get(list_field, [])):
                     removed = remove_list_item(list_field, int(item_index))
+                    refresh_profile()
                     st.success(f"Removed: {removed}")
                     st.rerun()
                 else:
@@ -99,6 +153,7 @@ if st.button("Add Entry"):
             pass
         
         add_entry(message)
+        refresh_doc()
         st.success(f"Added entry: {message}")
     else:
         st.warning("Please enter a message.")
@@ -106,18 +161,53 @@ if st.button("Add Entry"):
 # --- View History ---
 st.header("Brag Doc History")
 if st.button("Refresh History"):
-    st.session_state['history'] = read_history()
-    try:
-        st.session_state['git_history'] = get_git_history()
-    except Exception:
-        st.session_state['git_history'] = []
+    refresh_doc()
 
-history = st.session_state.get('history', read_history())
-git_history = st.session_state.get('git_history', [])
+keys = current_keys()
+git_history = cached_git_history(keys.head, GIT_HISTORY_LIMIT)
 
-if history:
+# Filters run server-side over a streaming reader; only the visible page is parsed and sent.
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    history_since = st.date_input("From", value=None, key="history_since")
+with col2:
+    history_until = st.date_input("To", value=None, key="history_until")
+with col3:
+    history_category = st.selectbox("Category", ["All"] + cached_categories(keys.doc), key="history_category")
+with col4:
+    history_query = st.text_input("Search", key="history_query")
+page_size = st.selectbox("Entries per page", HISTORY_PAGE_SIZES, key="history_page_size")
+
+history_filters = (
+    history_since.isoformat() if history_since else None,
+    history_until.isoformat() if history_until else None,
+    None if history_category == "All" else history_category,
+    history_query.strip() or None,
+)
+# Go back to the first page whenever the filters change
+if st.session_state.get("history_filters") != (history_filters, page_size):
+    st.session_state["history_filters"] = (history_filters, page_size)
+    st.session_state["history_page"] = 0
+page = st.session_state["history_page"]
+rows, has_more = cached_history_page(keys.doc, page, page_size, *history_filters)
+
+if rows:
     st.subheader("Brag Entries:")
-    st.text("".join(history))
+    st.dataframe(rows, hide_index=True)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("Previous", disabled=page == 0):
+            st.session_state["history_page"] = page - 1
+            st.rerun()
+    with col2:
+        st.caption(f"Page {page + 1}")
+    with col3:
+        if st.button("Next", disabled=not has_more):
+            st.session_state["history_page"] = page + 1
+            st.rerun()
+elif page:
+    st.session_state["history_page"] = 0
+    st.rerun()
 else:
     st.info("No brag doc entries found.")
 
@@ -130,25 +220,45 @@ if git_history:
 st.header("Generate Content with Ollama")
 tab1, tab2, tab3, tab4 = st.tabs(["Basic Summary", "Resume Bullets", "Profile Resume", "Profile Summary"])
 
+def show_generation(name, output_label, height, polling):
+    job_key = st.session_state.get(f"generation_{name}")
+    job = generation_pool().get(job_key) if job_key else None
+    if job is None:
+        return
+    if polling and not job.running:
+        # Finished since the last poll: rerun the whole app so this section stops polling.
+        st.rerun()
+    st.text_area(output_label, job.text, height=height, key=f"output_{name}_{len(job.text)}")
+    if job.running:
+        if st.button("Cancel", key=f"cancel_{name}"):
+            job.cancel()
+    elif job.status == "unavailable":
+        st.warning(job.error)
+    elif job.status == "failed":
+        st.error(f"Generation failed: {job.error}")
+    elif job.status == "cancelled":
+        st.info("Generation cancelled.")
+
+def generation_tab(name, button_label, build_request, output_label, height):
+    """Start a generation in the background; partial output streams into a polling fragment."""
+    if st.button(button_label):
+        st.session_state[f"generation_{name}"] = generation_pool().submit(build_request()).key
+    job_key = st.session_state.get(f"generation_{name}")
+    job = generation_pool().get(job_key) if job_key else None
+    polling = job is not None and job.running
+    st.fragment(show_generation, run_every=1.0 if polling else None)(name, output_label, height, polling)
+
 with tab1:
-    if st.button("Generate Basic Summary"):
-        summary = summarize_brag_doc()
-        st.text_area("Summary:", summary, height=200)
+    generation_tab("summary", "Generate Basic Summary", summary_request, "Summary:", 200)
 
 with tab2:
-    if st.button("Generate Basic Resume Bullets"):
-        bullets = generate_resume_bullets()
-        st.text_area("Resume Bullets:", bullets, height=200)
+    generation_tab("bullets", "Generate Basic Resume Bullets", resume_bullets_request, "Resume Bullets:", 200)
 
 with tab3:
-    if st.button("Generate Profile-based Resume"):
-        profile_resume = generate_profile_based_resume()
-        st.text_area("Complete Resume:", profile_resume, height=300)
+    generation_tab("profile_resume", "Generate Profile-based Resume", profile_resume_request, "Complete Resume:", 300)
 
 with tab4:
-    if st.button("Generate Profile-based Summary"):
-        profile_summary = generate_profile_based_summary()
-        st.text_area("Professional Summary:", profile_summary, height=200)
+    generation_tab("profile_summary", "Generate Profile-based Summary", profile_summary_request, "Professional Summary:", 200)
 
 # --- Purge Entries ---
 st.header("Purge Entries")
@@ -188,7 +298,8 @@ if st.button("Purge Entries"):
             st.error(f"Invalid end: {e}")
             end_date = None
         if start_date and end_date:
-            removed = purge_entries_between(start_date, end_date)
+            removed, _ = purge_entries_between(start_date, end_date)
+            refresh_doc()
             st.success(f"Purged {removed} entries between {start_date} and {end_date}.")
 
 # --- Sync with Git ---
@@ -196,6 +307,7 @@ st.header("Sync with Git")
 if st.button("Sync Brag Doc with Git"):
     try:
         sync_with_git()
+        cached_git_history.clear()
         st.success("Brag doc synced with git.")
     except Exception as e:
         st.error(f"Git sync failed: {e}") 
\ No newline at end of file
@@ -28,6 +28,29 @@ def enable_testing_mode():
     constants.IS_TESTING = original_is_testing
     constants.TEST_DIR = original_test_dir
 
+@pytest.fixture
+def write_entries():
+    """
+    Fixture that returns a helper appending entry lines to a brag doc, creating it with the doc
+    header first if it doesn't exist.
+    Usage: write_entries(lines) writes to the default brag doc, write_entries(lines, path) to the
+    doc at path. Returns the doc path.
+    """
+    from brag import doc_utils
+
+    def _write(lines, path=None):
+        path = path or doc_utils.get_brag_doc_path()
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(constants.BRAG_DOC_HEADER)
+        with open(path, "a") as f:
+            for line in lines:
+                f.write(line + "\n")
+        return path
+
+    return _write
+
 @pytest.fixture
 def temp_bragdoc_path():
     """
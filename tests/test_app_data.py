@@ -0,0 +1,67 @@
+import os
+from brag import app_data
+from brag.doc_utils import init_brag_doc, add_entry
+from brag.profile import update_profile_field
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "streamlit_app.py")
+
+def test_keys_change_only_on_writes():
+    init_brag_doc()
+    first = app_data.current_keys()
+    assert app_data.current_keys() == first
+    add_entry("Shipped the cache layer")
+    second = app_data.current_keys()
+    assert second.doc != first.doc
+    assert second.profile == first.profile
+    update_profile_field("name", "Ada")
+    assert app_data.current_keys().profile != second.profile
+
+def test_head_is_none_without_repo():
+    init_brag_doc()
+    assert app_data.current_keys().head is None
+    assert app_data.load_git_history(None, 5) == []
+
+def test_loaders_return_current_data():
+    init_brag_doc()
+    add_entry("First entry")
+    add_entry("Second entry")
+    keys = app_data.current_keys()
+    rows, has_more = app_data.load_history_page(keys.doc, 0, 1)
+    assert [row["message"] for row in rows] == ["Second entry"] and has_more
+    rows, has_more = app_data.load_history_page(keys.doc, 0, 10, query="first")
+    assert [row["message"] for row in rows] == ["First entry"] and not has_more
+    update_profile_field("title", "Engineer")
+    assert app_data.load_profile(app_data.current_keys().profile)["title"] == "Engineer"
+
+def test_app_reruns_without_rereading(monkeypatch):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    st.cache_data.clear()
+    init_brag_doc()
+    add_entry("Rendered entry")
+    calls = []
+    original = app_data.load_history_page
+    monkeypatch.setattr(app_data, "load_history_page", lambda *args: (calls.append(args), original(*args))[1])
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+    at.run()
+    assert not at.exception
+    at.run()
+    assert not at.exception
+    assert len(calls) == 1
+    assert "Rendered entry" in at.dataframe[0].value["message"].tolist()
+
+def test_app_history_filters_and_pages():
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    st.cache_data.clear()
+    init_brag_doc()
+    for i in range(30):
+        add_entry(f"Entry {i}")
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+    at.run()
+    assert len(at.dataframe[0].value) == 25
+    next_button = [b for b in at.button if b.label == "Next"][0]
+    next_button.click().run()
+    assert len(at.dataframe[0].value) == 5
+    at.text_input(key="history_query").input("entry 29").run()
+    assert at.dataframe[0].value["message"].tolist() == ["Entry 29"]
@@ -0,0 +1,72 @@
+import os
+import json
+import pytest
+from typer.testing import CliRunner
+from brag import archive
+from brag.cli import app
+from brag.doc_utils import get_brag_doc_path, init_brag_doc, iter_entries, read_history
+
+runner = CliRunner()
+
+@pytest.fixture
+def seed_doc(write_entries):
+    write_entries([
+        "- [2021-03-01 10:00:00] [Web] Oldest",
+        "- [2021-09-01 10:00:00] [ML] Old",
+        "- [2022-06-01 10:00:00] [Web] Middle",
+        "- [2023-02-01 10:00:00] Recent",
+        "- [2024-01-01 10:00:00] [Ops] Newest",
+    ])
+
+def messages(**filters):
+    return [entry.message for entry in iter_entries(**filters)]
+
+def test_archive_before_moves_entries_into_blocks(seed_doc):
+    assert archive.archive_before("2023-01-01", block_entries=2) == 3
+    with open(get_brag_doc_path()) as f:
+        assert f.read() == "# Brag Doc\n\n- [2023-02-01 10:00:00] Recent\n- [2024-01-01 10:00:00] [Ops] Newest\n"
+    blocks = archive.load_blocks()
+    assert [(b.first[:10], b.last[:10], b.entries) for b in blocks] == [
+        ("2021-03-01", "2021-09-01", 2), ("2022-06-01", "2022-06-01", 1)
+    ]
+    assert all(b.file.endswith((".gz", ".zst")) for b in blocks)
+    assert archive.archive_before("2023-01-01") == 0
+
+def test_readers_include_archive_transparently(seed_doc):
+    archive.archive_before("2023-01-01", block_entries=2)
+    assert messages() == ["Oldest", "Old", "Middle", "Recent", "Newest"]
+    assert messages(reverse=True) == ["Newest", "Recent", "Middle", "Old", "Oldest"]
+    assert messages(category="web") == ["Oldest", "Middle"]
+    assert messages(archived=False) == ["Recent", "Newest"]
+    assert [line for line in read_history(include_archive=True) if line.startswith("- [")][0].endswith("Oldest\n")
+    assert len(read_history()) == 4
+
+def test_only_overlapping_blocks_are_read(seed_doc, monkeypatch):
+    archive.archive_before("2023-01-01", block_entries=2)
+    opened = []
+    original = archive._decompress
+    monkeypatch.setattr(archive, "_decompress", lambda path: opened.append(os.path.basename(path)) or original(path))
+    assert messages(since="2022-01-01") == ["Middle", "Recent", "Newest"]
+    assert opened == [archive.load_blocks()[1].file]
+    opened.clear()
+    assert messages(since="2023-01-01") == ["Recent", "Newest"]
+    assert opened == []
+
+def test_cli_archive_and_history(seed_doc):
+    result = runner.invoke(app, ["archive", "--before", "2022-01-01"])
+    assert "Archived 2 entries dated before 2022-01-01." in result.output
+    assert "Archive: 2 entries in 1 blocks" in result.output
+    result = runner.invoke(app, ["history", "--since", "2021-01-01", "--format", "ndjson"])
+    assert [json.loads(line)["message"] for line in result.output.splitlines()] == [
+        "Oldest", "Old", "Middle", "Recent", "Newest"
+    ]
+    result = runner.invoke(app, ["history"])
+    assert result.output.index("Oldest") < result.output.index("Middle")
+    result = runner.invoke(app, ["stats", "--format", "json"])
+    assert json.loads(result.output)["total"] == 5
+    result = runner.invoke(app, ["category", "list"])
+    assert "ML" in result.output
+
+def test_cli_archive_without_date_shows_summary():
+    init_brag_doc()
+    assert "Nothing is archived yet." in runner.invoke(app, ["archive"]).output
@@ -0,0 +1,121 @@
+import json
+import threading
+import pytest
+import requests
+from brag import background
+from brag.ollama_utils import GenerationRequest, get_cached_response, load_jobs
+
+class FakeStream:
+    """A streaming Ollama response that yields chunks, optionally waiting on a gate before each."""
+
+    def __init__(self, chunks, gate=None):
+        self._chunks = chunks
+        self._gate = gate
+        self.closed = False
+
+    def iter_lines(self):
+        for chunk in self._chunks:
+            if self._gate is not None:
+                self._gate.wait(5)
+            yield json.dumps({"response": chunk, "done": False}).encode("utf-8")
+        yield json.dumps({"response": "", "done": True}).encode("utf-8")
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def pool():
+    pool = background.GenerationPool(max_workers=2)
+    yield pool
+    pool.shutdown()
+
+def wait_for(job):
+    for _ in range(500):
+        if not job.running:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError("job did not finish")
+
+def make_request(key="k" * 64):
+    return GenerationRequest("prompt", key, "summary")
+
+def test_streams_and_caches_result(monkeypatch, pool):
+    posts = []
+    monkeypatch.setattr("brag.ollama_utils.requests.post",
+                        lambda *args, **kwargs: (posts.append(kwargs), FakeStream(["Hello", ", ", "world"]))[1])
+    job = wait_for(pool.submit(make_request()))
+    assert job.status == background.DONE
+    assert job.text == "Hello, world"
+    assert posts[0]["json"]["stream"] is True
+    assert get_cached_response(make_request().key) == "Hello, world"
+
+def test_in_flight_requests_are_deduplicated(monkeypatch, pool):
+    gate = threading.Event()
+    posts = []
+    monkeypatch.setattr("brag.ollama_utils.requests.post",
+                        lambda *args, **kwargs: (posts.append(1), FakeStream(["a", "b"], gate))[1])
+    first = pool.submit(make_request())
+    second = pool.submit(make_request())
+    assert first is second
+    gate.set()
+    wait_for(first)
+    assert len(posts) == 1
+    assert first.text == "ab"
+
+def test_partial_output_and_cancel(monkeypatch, pool):
+    gate = threading.Event()
+    seen = threading.Event()
+    stream = FakeStream(["one", "two", "three"])
+
+    def iter_lines():
+        for i, line in enumerate(FakeStream.iter_lines(stream)):
+            if i == 1:
+                seen.set()
+                gate.wait(5)
+            yield line
+
+    stream.iter_lines = iter_lines
+    monkeypatch.setattr("brag.ollama_utils.requests.post", lambda *args, **kwargs: stream)
+    job = pool.submit(make_request())
+    seen.wait(5)
+    assert job.text == "one"
+    job.cancel()
+    gate.set()
+    wait_for(job)
+    assert job.status == background.CANCELLED
+    assert stream.closed
+    assert get_cached_response(make_request().key) is None
+
+def test_unreachable_server_queues_job(monkeypatch, pool):
+    def _post(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr("brag.ollama_utils.requests.post", _post)
+    job = wait_for(pool.submit(make_request()))
+    assert job.status == background.UNAVAILABLE
+    assert [queued["key"] for queued in load_jobs()] == [make_request().key]
+
+def test_cached_response_completes_immediately(monkeypatch, pool):
+    from brag.ollama_utils import put_cached_response
+    put_cached_response(make_request().key, "cached text")
+    monkeypatch.setattr("brag.ollama_utils.requests.post", lambda *args, **kwargs: pytest.fail("should not post"))
+    job = pool.submit(make_request())
+    assert (job.status, job.text) == (background.DONE, "cached text")
+
+def test_streamlit_tab_shows_generation(monkeypatch):
+    import os
+    from streamlit.testing.v1 import AppTest
+    from brag.doc_utils import init_brag_doc, add_entry
+    init_brag_doc()
+    add_entry("Shipped background generation")
+    monkeypatch.setattr("brag.ollama_utils.requests.post", lambda *args, **kwargs: FakeStream(["Sum", "mary"]))
+    at = AppTest.from_file(os.path.join(os.path.dirname(os.path.dirname(__file__)), "streamlit_app.py"), default_timeout=30)
+    at.run()
+    [button for button in at.button if button.label == "Generate Basic Summary"][0].click().run()
+    for _ in range(50):
+        at.run()
+        if "Summary" in [area.value for area in at.text_area]:
+            break
+        threading.Event().wait(0.05)
+    assert not at.exception
+    assert "Summary" in [area.value for area in at.text_area]
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import time
+from brag import completion
+from brag.doc_utils import add_entry
+
+def test_categories_ranked_by_frequency_and_recency(write_entries):
+    write_entries([
+        "- [2020-01-01 10:00:00] [Archive] Old 1",
+        "- [2020-01-02 10:00:00] [Archive] Old 2",
+        "- [2020-01-03 10:00:00] [Archive] Old 3",
+        "- [2024-01-01 10:00:00] [Backend] New 1",
+    ])
+    add_entry("Fresh work", "Backend")
+    add_entry("Another", "API")
+    assert completion.complete_category("") == ["Backend", "API", "Archive"]
+    assert completion.complete_category("a") == ["API", "Archive"]
+    assert completion.complete_category_index("") == [("2", "Backend"), ("0", "API"), ("1", "Archive")]
+
+def test_catalogue_updates_incrementally_and_rebuilds_after_external_edit(write_entries):
+    write_entries(["- [2024-01-01 10:00:00] [Web] One"])
+    assert completion.complete_category("") == ["Web"]
+    add_entry("Two", "ML")
+    assert completion.load_catalogue()["categories"]["ML"]["count"] == 1
+    assert completion.load_catalogue()["doc_key"] is not None
+    # An edit that bypasses add_entry is noticed and triggers a rebuild.
+    write_entries(["- [2024-01-03 10:00:00] [Ops] Three"])
+    assert "Ops" in completion.complete_category("")
+
+def test_catalogue_rebuilds_after_purge(write_entries):
+    from brag.doc_utils import get_brag_doc_path, purge_entries_between
+    write_entries([f"- [2024-01-{day:02d} 10:00:00] [Web] Entry {day}" for day in range(1, 11)])
+    write_entries(["- [2024-02-01 10:00:00] [Ops] Purged"])
+    assert "Ops" in completion.complete_category("")
+    doc = get_brag_doc_path()
+    size = os.path.getsize(doc)
+    assert purge_entries_between("2024-02-01", "2024-02-01").removed == 1
+    assert os.path.getsize(doc) == size  # only tombstoned
+    assert completion.complete_category("") == ["Web"]
+
+def test_profile_fields_ranked_by_use():
+    from brag.profile import update_profile_field
+    update_profile_field("title", "Engineer")
+    fields = completion.complete_profile_field("")
+    assert fields[0] == "title"
+    assert completion.complete_profile_field("contact.") == [
+        "contact.email", "contact.phone", "contact.linkedin", "contact.github"
+    ]
+
+def test_completion_is_fast_with_many_categories(write_entries):
+    write_entries([f"- [2024-01-01 10:00:00] [Category {i}] Entry" for i in range(2000)])
+    completion.load_catalogue()
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        completion.complete_category("Category 1")
+        timings.append(time.perf_counter() - start)
+    assert min(timings) < 0.03
+
+def test_completion_does_not_import_heavy_modules():
+    code = "import sys, brag.completion; print(sorted({'git', 'requests', 'pydantic', 'typer'} & set(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,69 @@
+import os
+import threading
+import pytest
+from brag import client, daemon
+from brag.doc_utils import get_brag_data_dir, init_brag_doc
+
+@pytest.fixture
+def running_daemon():
+    init_brag_doc()
+    socket_path = os.path.join(get_brag_data_dir(), "test.sock")
+    server = daemon.make_server(socket_path)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+def test_forward_runs_commands_in_daemon(running_daemon):
+    code, output = client.forward(["add", "Served by the daemon"], running_daemon)
+    assert code == 0
+    assert "Added entry: Served by the daemon" in output
+    code, output = client.forward(["history", "--git-limit", "1"], running_daemon)
+    assert code == 0
+    assert "Served by the daemon" in output
+
+def test_forward_reports_exit_code(running_daemon):
+    code, output = client.forward(["purge"], running_daemon)
+    assert code == 1
+    assert "Please provide at least one of --start or --end." in output
+    code, output = client.forward(["no-such-command"], running_daemon)
+    assert code == 2
+    assert "No such command" in output
+
+def test_forward_falls_back_without_daemon(tmp_path, monkeypatch):
+    assert client.forward(["history"], str(tmp_path / "missing.sock")) is None
+    monkeypatch.setenv("BRAG_NO_DAEMON", "1")
+    assert client.forward(["history"], str(tmp_path / "missing.sock")) is None
+
+def test_serve_refuses_second_daemon(running_daemon):
+    with pytest.raises(RuntimeError):
+        daemon.make_server(running_daemon)
+
+def test_forward_runs_in_callers_directory(running_daemon, tmp_path, monkeypatch):
+    client.forward(["add", "Exported from elsewhere"], running_daemon)
+    daemon_dir, caller_dir = tmp_path / "daemon", tmp_path / "caller"
+    daemon_dir.mkdir()
+    caller_dir.mkdir()
+    monkeypatch.chdir(daemon_dir)
+    request = {"argv": ["export", "-o", "out.jsonl"], "cwd": str(caller_dir), "env": client.command_env()}
+    code, _ = client.send_request(request, running_daemon)
+    assert code == 0
+    assert "Exported from elsewhere" in (caller_dir / "out.jsonl").read_text()
+    assert not (daemon_dir / "out.jsonl").exists()
+    assert os.getcwd() == str(daemon_dir)
+
+def test_forward_streams_output(running_daemon, monkeypatch):
+    monkeypatch.setattr(daemon, "DAEMON_FLUSH_MS", 0)
+    client.forward(["add", "One"], running_daemon)
+    client.forward(["add", "Two"], running_daemon)
+    chunks = []
+    code, output = client.forward(["history", "--git-limit", "1"], running_daemon, write=chunks.append)
+    assert code == 0 and output == ""
+    assert len(chunks) > 1
+    assert "One" in "".join(chunks) and "Two" in "".join(chunks)
+
+def test_forward_hands_back_commands_with_other_settings(running_daemon, monkeypatch):
+    monkeypatch.setenv("OLLAMA_MODEL", "some-other-model")
+    assert client.forward(["history"], running_daemon) is None
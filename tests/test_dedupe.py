@@ -0,0 +1,105 @@
+from typer.testing import CliRunner
+from brag import dedupe
+from brag.cli import app
+from brag.archive import archive_before
+from brag.doc_utils import add_entry, get_brag_doc_path, iter_entries
+
+runner = CliRunner()
+
+def messages():
+    return [entry.message for entry in iter_entries()]
+
+def test_signature_similarity_tracks_wording():
+    original = dedupe.signature("Shipped the billing service, cutting latency by 40%")
+    reworded = dedupe.signature("shipped billing service - cut latency by 40 %")
+    unrelated = dedupe.signature("Mentored two interns through their first on-call rotation")
+    assert dedupe.similarity(original, original) == 1.0
+    assert dedupe.similarity(original, reworded) >= 0.5
+    assert dedupe.similarity(original, unrelated) < 0.2
+
+def test_find_duplicate_uses_incrementally_updated_index(write_entries):
+    write_entries(["- [2024-01-01 10:00:00] [Web] Migrated the checkout page to React"])
+    assert dedupe.find_duplicate("Wrote the quarterly planning doc") is None
+    add_entry("Fixed the flaky login test in CI", "Testing")
+    # The appended entry went into the persisted index without a rebuild.
+    assert len(dedupe._load_raw()["entries"]) == 2
+    duplicate = dedupe.find_duplicate("Fixed the flaky login tests in CI")
+    assert duplicate.entry.message == "Fixed the flaky login test in CI"
+    assert duplicate.similarity >= 0.5
+
+def test_index_rebuilds_after_external_edit(write_entries):
+    write_entries(["- [2024-01-01 10:00:00] Set up the staging cluster"])
+    assert dedupe.find_duplicate("Set up the staging cluster") is not None
+    write_entries(["- [2024-01-02 10:00:00] Wrote the incident review for the outage"])
+    assert dedupe.find_duplicate("Wrote an incident review for the outage").entry.timestamp == "2024-01-02 10:00:00"
+
+def test_find_duplicate_groups_in_one_pass(write_entries):
+    write_entries([
+        "- [2024-01-01 10:00:00] [Web] Migrated the checkout page to React",
+        "- [2024-01-02 10:00:00] Wrote the quarterly planning doc",
+        "- [2024-01-03 10:00:00] [Web] Migrated checkout page to React!",
+        "- [2024-01-04 10:00:00] Mentored two interns",
+        "- [2024-01-05 10:00:00] [Web] migrated the checkout page to react",
+    ])
+    groups = dedupe.find_duplicate_groups(iter_entries())
+    assert [[entry.timestamp[:10] for entry in group] for group in groups] == [
+        ["2024-01-01", "2024-01-03", "2024-01-05"]
+    ]
+
+def test_cli_add_on_duplicate_actions(write_entries):
+    write_entries(["- [2024-01-01 10:00:00] [Ops] Automated the weekly database backups"])
+    result = runner.invoke(app, ["add", "Automated weekly database backups"])
+    assert "Similar entry already logged" in result.output
+    assert len(messages()) == 2
+    result = runner.invoke(app, ["add", "Automated the weekly database backup", "--on-duplicate", "skip"])
+    assert "Skipped" in result.output
+    assert len(messages()) == 2
+    result = runner.invoke(app, ["add", "Automated the weekly DB backups", "--on-duplicate", "merge"])
+    assert "Replaced the earlier entry." in result.output
+    assert len(messages()) == 2
+    assert messages()[-1] == "Automated the weekly DB backups"
+    result = runner.invoke(app, ["add", "Something", "--on-duplicate", "ignore"])
+    assert result.exit_code == 1
+
+def test_cli_add_merge_refuses_archived_duplicate(write_entries):
+    write_entries([
+        "- [2021-01-01 10:00:00] [Ops] Automated the weekly database backups",
+        "- [2024-01-01 10:00:00] [Web] Rebuilt the landing page",
+    ])
+    archive_before("2022-01-01")
+    result = runner.invoke(app, ["add", "Automated the weekly DB backups", "--on-duplicate", "merge"])
+    assert result.exit_code == 1
+    assert "archived and can't be replaced" in result.output
+    assert "Replaced" not in result.output
+    assert messages() == ["Automated the weekly database backups", "Rebuilt the landing page"]
+
+def test_cli_add_merge_ignores_purged_entry(write_entries):
+    from datetime import date
+    from brag.doc_utils import purge_entries_between
+    write_entries([f"- [2024-01-{day:02d} 10:00:00] Entry {day}" for day in range(1, 11)])
+    add_entry("Automated the weekly database backups", "Ops")
+    assert dedupe.find_duplicate("Automated the weekly database backups") is not None
+    today = date.today().isoformat()
+    assert purge_entries_between(today, today).removed == 1
+    result = runner.invoke(app, ["add", "Automated the weekly DB backups", "--on-duplicate", "merge"])
+    assert result.exit_code == 0
+    assert "Similar entry" not in result.output
+    assert runner.invoke(app, ["purge", "--undo"]).exit_code == 0
+    assert messages()[-2:] == ["Automated the weekly database backups", "Automated the weekly DB backups"]
+
+def test_cli_dedupe_dry_run_then_remove(write_entries):
+    write_entries([
+        "- [2024-01-01 10:00:00] Gave a talk on observability at the meetup",
+        "- [2024-01-02 10:00:00] Reviewed the hiring rubric",
+        "- [2024-01-03 10:00:00] Gave a talk about observability at the meetup",
+    ])
+    result = runner.invoke(app, ["dedupe", "--dry-run"])
+    assert "drop  - [2024-01-01 10:00:00]" in result.output
+    assert "1 entries in 1 groups would be removed" in result.output
+    assert len(messages()) == 3
+    result = runner.invoke(app, ["dedupe"])
+    assert "Removed 1 near-duplicate entries" in result.output
+    assert messages() == ["Reviewed the hiring rubric", "Gave a talk about observability at the meetup"]
+    with open(get_brag_doc_path()) as f:
+        assert f.read().startswith("# Brag Doc")
+    assert "No near-duplicate entries found." in runner.invoke(app, ["dedupe"]).output
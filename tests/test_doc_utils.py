@@ -26,7 +26,7 @@ def test_init_brag_doc(temp_bragdoc_path, monkeypatch):
     
     assert content == "# Brag Doc\n\n"
 
-def test_add_and_read_entries(monkeypatch, temp_bragdoc_path):
+def test_add_and_read_entries(monkeypatch, temp_bragdoc_path, write_entries):
     """Test adding and reading entries with a temporary bragdoc"""
     # First initialize the brag doc
     os.makedirs(os.path.dirname(temp_bragdoc_path), exist_ok=True)
@@ -57,4 +57,55 @@ def test_testing_mode_uses_test_dir():
     
     # The path should be in the test directory
     assert constants.TEST_DIR in path
-    assert path.endswith("bragdoc.md") 
\ No newline at end of file
+    assert path.endswith("bragdoc.md") 
+
+def test_parse_entry():
+    from brag.doc_utils import parse_entry
+    entry = parse_entry("- [2024-01-02 10:00:00] [Web] Built a site\n")
+    assert (entry.timestamp, entry.category, entry.message) == ("2024-01-02 10:00:00", "Web", "Built a site")
+    entry = parse_entry("- [2024-01-02 10:00:00] Wrote docs\n")
+    assert (entry.category, entry.message) == (None, "Wrote docs")
+    assert parse_entry("# Brag Doc\n") is None
+    assert parse_entry("- [broken line\n") is None
+
+def test_iter_entries_filters_and_reverse(monkeypatch, temp_bragdoc_path, write_entries):
+    from brag.doc_utils import iter_entries
+    monkeypatch.setattr("brag.doc_utils.get_brag_doc_path", lambda *args: temp_bragdoc_path)
+    write_entries([
+        "- [2024-01-01 10:00:00] [Web] One",
+        "- [2024-01-05 10:00:00] [ML] Two",
+        "- [2024-01-09 10:00:00] [web] Three",
+        "- [2024-01-12 10:00:00] Four",
+    ], temp_bragdoc_path)
+    assert [e.message for e in iter_entries()] == ["One", "Two", "Three", "Four"]
+    assert [e.message for e in iter_entries(reverse=True)] == ["Four", "Three", "Two", "One"]
+    assert [e.message for e in iter_entries(since="2024-01-05", until="2024-01-09")] == ["Two", "Three"]
+    assert [e.message for e in iter_entries(category="WEB")] == ["One", "Three"]
+    assert [e.message for e in iter_entries(query="t")] == ["Two", "Three"]
+
+def test_page_entries(monkeypatch, temp_bragdoc_path, write_entries):
+    from brag.doc_utils import page_entries
+    monkeypatch.setattr("brag.doc_utils.get_brag_doc_path", lambda *args: temp_bragdoc_path)
+    write_entries([f"- [2024-01-{day:02d} 10:00:00] Entry {day}" for day in range(1, 8)], temp_bragdoc_path)
+    entries, has_more = page_entries(0, 3)
+    assert [e.message for e in entries] == ["Entry 7", "Entry 6", "Entry 5"] and has_more
+    entries, has_more = page_entries(2, 3)
+    assert [e.message for e in entries] == ["Entry 1"] and not has_more
+    entries, has_more = page_entries(0, 3, since="2024-01-06")
+    assert [e.message for e in entries] == ["Entry 7", "Entry 6"] and not has_more
+
+def test_reversed_lines_across_blocks(temp_bragdoc_path, write_entries):
+    from brag.doc_utils import iter_doc_lines, iter_doc_lines_reversed
+    write_entries([f"- [2024-01-01 10:00:00] Entry ñ {i}" for i in range(50)], temp_bragdoc_path)
+    forward = [line for line in iter_doc_lines(temp_bragdoc_path) if line.strip()]
+    backward = list(iter_doc_lines_reversed(temp_bragdoc_path, block_size=7))
+    assert backward == list(reversed(forward))
+
+def test_raw_reversed_lines_carry_offsets(temp_bragdoc_path, write_entries):
+    from brag.doc_utils import iter_raw_lines_reversed
+    write_entries([f"- [2024-01-01 10:00:00] Entry ñ {i}" for i in range(50)], temp_bragdoc_path)
+    with open(temp_bragdoc_path, "rb") as f:
+        data = f.read()
+        found = list(iter_raw_lines_reversed(f, block_size=7))
+    assert [raw for _, raw in found] == [raw for raw in reversed(data.split(b"\n")) if raw]
+    assert all(data[offset:offset + len(raw)] == raw for offset, raw in found)
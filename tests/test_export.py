@@ -0,0 +1,43 @@
+import io
+import csv
+import gzip
+import json
+import pytest
+from brag.doc_utils import iter_entries
+from brag.export import export_entries, open_output
+
+@pytest.fixture
+def seed_doc(write_entries):
+    write_entries(["- [2024-01-01 10:00:00] [Web] Built <the> site, fast", "- [2024-02-01 10:00:00] Wrote docs"])
+
+def export_to_string(fmt, **filters):
+    out = io.StringIO()
+    count = export_entries(iter_entries(**filters), fmt, out)
+    return count, out.getvalue()
+
+def test_export_jsonl_and_csv(seed_doc):
+    count, text = export_to_string("jsonl")
+    assert count == 2
+    rows = [json.loads(line) for line in text.splitlines()]
+    assert rows[0] == {"timestamp": "2024-01-01 10:00:00", "category": "Web", "message": "Built <the> site, fast"}
+    assert rows[1]["category"] is None
+    count, text = export_to_string("csv", category="web")
+    assert list(csv.reader(io.StringIO(text))) == [
+        ["timestamp", "category", "message"],
+        ["2024-01-01 10:00:00", "Web", "Built <the> site, fast"],
+    ]
+
+def test_export_html_escapes_and_md_roundtrips(seed_doc):
+    _, html = export_to_string("html")
+    assert "Built &lt;the&gt; site, fast" in html
+    assert html.rstrip().endswith("</html>")
+    _, md = export_to_string("md", since="2024-01-15")
+    assert md == "# Brag Doc\n\n- [2024-02-01 10:00:00] Wrote docs\n"
+
+def test_export_gzip_file(seed_doc, tmp_path):
+    path = str(tmp_path / "out" / "brag.jsonl.gz")
+    out = open_output(path)
+    export_entries(iter_entries(), "jsonl", out)
+    out.close()
+    with gzip.open(path, "rt") as f:
+        assert len(f.read().splitlines()) == 2
@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import subprocess
+from datetime import datetime, timedelta
+import git
+import pytest
+from brag import git_utils
+from brag.doc_utils import init_brag_repo, add_entry, read_history, get_brag_doc_path
+from brag.constants import PUSH_STATUS_FILE_NAME
+
+@pytest.fixture
+def brag_repo(tmp_path):
+    """A brag repo in the test data dir with a local bare repo as origin."""
+    remote = git.Repo.init(tmp_path / "remote.git", bare=True)
+    brag_doc = init_brag_repo()
+    repo = git.Repo(os.path.dirname(brag_doc))
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "Test")
+        config.set_value("user", "email", "test@example.com")
+    repo.create_remote("origin", remote.working_dir)
+    return repo, remote
+
+def commit_count(repo):
+    return len(list(repo.iter_commits()))
+
+def test_sync_resolves_repo_from_doc_dir(brag_repo, tmp_path, monkeypatch):
+    repo, remote = brag_repo
+    monkeypatch.chdir(tmp_path)
+    add_entry("Shipped the feature")
+    result = git_utils.sync_with_git(background=False)
+    assert result.commit == repo.head.commit.hexsha
+    assert remote.head.commit.hexsha == result.commit
+
+def test_sync_skips_commit_when_unchanged(brag_repo):
+    repo, _ = brag_repo
+    add_entry("Shipped the feature")
+    git_utils.sync_with_git(background=False)
+    before = commit_count(repo)
+    result = git_utils.sync_with_git(background=False)
+    assert result.commit is None
+    assert commit_count(repo) == before
+
+def test_sync_squashes_unpushed_commits(brag_repo):
+    repo, remote = brag_repo
+    git_utils.sync_with_git(background=False)
+    pushed = commit_count(repo)
+    add_entry("First")
+    first = git_utils.sync_with_git(push=False)
+    add_entry("Second")
+    second = git_utils.sync_with_git(push=False)
+    assert not first.squashed
+    assert second.squashed
+    assert commit_count(repo) == pushed + 1
+    git_utils.sync_with_git(background=False)
+    assert remote.head.commit.hexsha == repo.head.commit.hexsha
+    add_entry("Third")
+    third = git_utils.sync_with_git(push=False)
+    assert not third.squashed
+    assert commit_count(repo) == pushed + 2
+
+def test_background_push_writes_status(brag_repo):
+    repo, remote = brag_repo
+    add_entry("Shipped the feature")
+    result = git_utils.sync_with_git()
+    assert result.push_started
+    deadline = time.time() + 30
+    while git_utils.get_push_status().get("state") in (None, "running") and time.time() < deadline:
+        time.sleep(0.1)
+    status = git_utils.get_push_status()
+    assert status["state"] == "ok", status
+    assert status["sha"] == repo.head.commit.hexsha
+    assert remote.head.commit.hexsha == repo.head.commit.hexsha
+
+def test_dead_push_process_counts_as_failed(brag_repo):
+    repo, _ = brag_repo
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    status_path = git_utils._cache_path(PUSH_STATUS_FILE_NAME)
+    git_utils._write_json(status_path, {"state": "running", "sha": None, "pid": proc.pid, "started": time.time()})
+    assert git_utils.get_push_status()["state"] == "failed"
+    add_entry("First")
+    git_utils.sync_with_git(push=False)
+    add_entry("Second")
+    assert git_utils.sync_with_git(push=False).squashed
+
+def test_init_repo_ignores_cache_and_journal(brag_repo):
+    repo, _ = brag_repo
+    with open(os.path.join(repo.working_tree_dir, ".gitignore")) as f:
+        assert f.read().splitlines() == [".brag_cache/", "journal.log"]
+    assert ".gitignore" in [item.path for item in repo.head.commit.tree]
+    commits = commit_count(repo)
+    init_brag_repo()
+    assert commit_count(repo) == commits
+    add_entry("Shipped the feature")
+    git_utils.sync_with_git(push=False)
+    assert repo.untracked_files == []
+
+def test_git_history_limit_and_cache(brag_repo, monkeypatch):
+    repo, _ = brag_repo
+    for i in range(3):
+        add_entry(f"Entry {i}")
+        git_utils.sync_with_git(push=False)
+        repo.git.commit("--allow-empty", "-m", "Unrelated commit")
+    commits = git_utils.get_git_history(limit=2)
+    assert len(commits) == 2
+    assert commits[0].hexsha == repo.head.commit.parents[0].hexsha
+    assert all(c.summary != "Unrelated commit" for c in commits)
+    assert git_utils.read_head_sha() == repo.head.commit.hexsha
+
+    def _no_git(*args, **kwargs):
+        raise AssertionError("git should not be touched on a cache hit")
+
+    monkeypatch.setattr(git_utils, "get_brag_repo", _no_git)
+    cached = git_utils.get_git_history(limit=2)
+    assert [c.hexsha for c in cached] == [c.hexsha for c in commits]
+    assert cached[0].committed_datetime == commits[0].committed_datetime
+    monkeypatch.undo()
+
+    add_entry("Entry 3")
+    git_utils.sync_with_git(push=False)
+    assert git_utils.get_git_history(limit=2)[0].hexsha == repo.head.commit.hexsha
+
+def test_git_history_since(brag_repo):
+    add_entry("Entry")
+    git_utils.sync_with_git(push=False)
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    assert git_utils.get_git_history(since=tomorrow) == []
+    assert len(git_utils.get_git_history(since="2000-01-01")) >= 1
+
+def test_entry_index_attributes_entries_incrementally(brag_repo, monkeypatch):
+    repo, _ = brag_repo
+    add_entry("First")
+    first = git_utils.sync_with_git(push=False).commit
+    repo.git.commit("--allow-empty", "-m", "Unrelated commit")
+    add_entry("Second")
+    second = git_utils.sync_with_git(push=False).commit
+    add_entry("Uncommitted")
+
+    commits = git_utils.get_entry_commits(read_history())
+    by_message = {line.strip().split("] ", 1)[1]: sha for line, sha in commits.items()}
+    assert by_message == {"First": first, "Second": second, "Uncommitted": None}
+
+    def _no_git(*args, **kwargs):
+        raise AssertionError("git should not be touched when HEAD is already indexed")
+
+    monkeypatch.setattr(git_utils, "get_brag_repo", _no_git)
+    assert git_utils.update_entry_index()
+    monkeypatch.undo()
+
+    # Amending the last sync commit rewrites history; the index follows HEAD.
+    with open(get_brag_doc_path(), "a") as f:
+        f.write("- [2024-01-01 10:00:00] Backfilled\n")
+    repo.git.add(get_brag_doc_path())
+    repo.git.commit("--amend", "--no-edit")
+    commits = git_utils.get_entry_commits(read_history())
+    by_message = {line.strip().split("] ", 1)[1]: sha for line, sha in commits.items()}
+    head = repo.head.commit.hexsha
+    assert by_message == {"First": first, "Second": head, "Uncommitted": head, "Backfilled": head}
+
+def test_sync_commits_archive_blocks(brag_repo):
+    from brag.archive import archive_before
+    repo, _ = brag_repo
+    with open(get_brag_doc_path(), "a") as f:
+        f.write("- [2020-01-01 10:00:00] Old work\n")
+    add_entry("New work")
+    git_utils.sync_with_git(push=False)
+    archive_before("2021-01-01")
+    git_utils.sync_with_git(push=False)
+    files = {item.path for item in repo.head.commit.tree.traverse()}
+    assert "archive/index.json" in files
+    assert any(path.startswith("archive/2020-01-01_") for path in files)
+
+def test_sync_commits_tombstone_log(brag_repo):
+    from brag.doc_utils import purge_entries_between
+    repo, _ = brag_repo
+    with open(get_brag_doc_path(), "a") as f:
+        f.writelines(f"- [2020-01-{day:02d} 10:00:00] Entry {day}\n" for day in range(1, 11))
+    git_utils.sync_with_git(push=False)
+    purge_entries_between("2020-01-01", "2020-01-01")
+    result = git_utils.sync_with_git(push=False)
+    assert result.commit is not None
+    assert "tombstones.json" in {item.path for item in repo.head.commit.tree.traverse()}
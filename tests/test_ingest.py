@@ -0,0 +1,117 @@
+import os
+import git
+from typer.testing import CliRunner
+from brag import ingest
+from brag.cli import app
+from brag.archive import archive_before, load_blocks
+from brag.doc_utils import add_entry, get_brag_doc_path, init_brag_doc, iter_entries, page_entries
+
+runner = CliRunner()
+
+ME = git.Actor("Me", "me@example.com")
+OTHER = git.Actor("Other", "other@example.com")
+
+def make_repo(path, commits):
+    """A repo at path with one commit per (author, message, unix time), in order."""
+    repo = git.Repo.init(path)
+    for author, message, at in commits:
+        commit(repo, author, message, at)
+    return repo
+
+def commit(repo, author, message, at):
+    date = f"{at} +0000"
+    repo.index.commit(message, author=author, committer=author, author_date=date, commit_date=date)
+
+def entries():
+    return [(entry.category, entry.message) for entry in iter_entries()]
+
+def test_ingests_only_the_authors_commits(tmp_path):
+    init_brag_doc()
+    repo_path = tmp_path / "api"
+    make_repo(repo_path, [
+        (ME, "Add rate limiting", 1700000000),
+        (OTHER, "Fix typo", 1700000100),
+        (ME, "Speed up the login query\n\nLonger body", 1700000200),
+    ])
+    result = ingest.ingest_repos([str(repo_path)], "ME@example.com")
+    assert result.added == 2
+    assert entries() == [("api", "Add rate limiting"), ("api", "Speed up the login query")]
+
+def test_rerun_only_reads_new_commits(tmp_path):
+    init_brag_doc()
+    repo = make_repo(tmp_path / "api", [(ME, "First", 1700000000)])
+    assert ingest.ingest_repos([repo.working_dir], "me@example.com").added == 1
+    result = ingest.ingest_repos([repo.working_dir], "me@example.com")
+    assert result.added == 0 and result.scans[0].commits == []
+    commit(repo, ME, "Second", 1700000100)
+    result = ingest.ingest_repos([repo.working_dir], "me@example.com")
+    assert [subject for _, subject in result.scans[0].commits] == ["Second"]
+    assert entries() == [("api", "First"), ("api", "Second")]
+    assert ingest.load_cursors()[repo.working_dir] == {"me@example.com": repo.head.commit.hexsha}
+
+def test_lost_cursor_does_not_duplicate_entries(tmp_path):
+    init_brag_doc()
+    repo = make_repo(tmp_path / "api", [(ME, "First", 1700000000)])
+    ingest.ingest_repos([repo.working_dir], "me@example.com")
+    os.remove(ingest.get_cursors_path())
+    assert ingest.ingest_repos([repo.working_dir], "me@example.com").added == 0
+    assert len(entries()) == 1
+
+def test_multiple_repos_are_merged_in_time_order(tmp_path):
+    init_brag_doc()
+    web = make_repo(tmp_path / "web", [(ME, "Web one", 1700000000), (ME, "Web two", 1700000300)])
+    api = make_repo(tmp_path / "api", [(ME, "Api one", 1700000100)])
+    result = ingest.ingest_repos([web.working_dir, api.working_dir], "me@example.com", workers=2)
+    assert result.added == 3
+    assert entries() == [("web", "Web one"), ("api", "Api one"), ("web", "Web two")]
+
+def test_older_commits_are_merged_in_time_order(tmp_path, write_entries):
+    write_entries(["- [2021-06-01 10:00:00] [Ops] Old", "- [2024-01-01 10:00:00] [Ops] New"])
+    repo = make_repo(tmp_path / "api", [(ME, "From 2022", 1655000000)])  # 2022-06-12
+    assert ingest.ingest_repos([repo.working_dir], "me@example.com").added == 1
+    assert [entry.message for entry in iter_entries(reverse=True)] == ["New", "From 2022", "Old"]
+    assert [entry.message for entry in page_entries(0, 2)[0]] == ["New", "From 2022"]
+    with open(get_brag_doc_path(), "r") as f:
+        assert f.read().startswith("# Brag Doc\n\n- [2021-06-01 10:00:00]")
+
+def test_commits_older_than_the_archive_go_into_it(tmp_path, write_entries):
+    write_entries(["- [2019-01-01 10:00:00] A", "- [2021-01-01 10:00:00] B", "- [2024-01-01 10:00:00] C"])
+    archive_before("2022-01-01")
+    repo = make_repo(tmp_path / "api", [(ME, "From 2020", 1590000000), (ME, "From 2023", 1690000000)])
+    ingest.ingest_repos([repo.working_dir], "me@example.com")
+    assert [entry.message for entry in iter_entries()] == ["A", "From 2020", "B", "From 2023", "C"]
+    assert sum(block.entries for block in load_blocks()) == 3
+
+def test_bad_repos_are_skipped(tmp_path):
+    init_brag_doc()
+    (tmp_path / "plain").mkdir()
+    git.Repo.init(tmp_path / "empty")
+    api = make_repo(tmp_path / "api", [(ME, "Api one", 1700000000)])
+    result = ingest.ingest_repos([str(tmp_path / "plain"), str(tmp_path / "empty"), api.working_dir], "me@example.com")
+    assert [scan.error for scan in result.scans] == ["not a git repository", "no commits", None]
+    assert result.added == 1
+
+def test_categorise_uses_history_then_repo_name(tmp_path):
+    init_brag_doc()
+    add_entry("Fixed the flaky deploy pipeline", category="Ops")
+    add_entry("Fixed the flaky deploy pipeline again", category="Ops")
+    repo = make_repo(tmp_path / "api", [
+        (ME, "Fixed the flaky deploy pipeline once more", 1700000000),
+        (ME, "Add pagination to search results", 1700000100),
+    ])
+    ingest.ingest_repos([repo.working_dir], "me@example.com", categorise=True)
+    assert entries()[:2] == [
+        ("Ops", "Fixed the flaky deploy pipeline once more"),
+        ("api", "Add pagination to search results"),
+    ]
+
+def test_cli_ingest_git(tmp_path):
+    init_brag_doc()
+    repo = make_repo(tmp_path / "api", [(ME, "First", 1700000000)])
+    result = runner.invoke(app, ["ingest-git", repo.working_dir, "--author", "me@example.com"])
+    assert result.exit_code == 0
+    assert "api: 1 new commits" in result.output
+    assert "Added 1 entries from 1 repos." in result.output
+    result = runner.invoke(app, ["ingest-git", repo.working_dir, str(tmp_path / "nope"), "--author", "me@example.com"])
+    assert "skipped, not a git repository" in result.output
+    assert "No new commits to ingest." in result.output
@@ -0,0 +1,163 @@
+import os
+from typer.testing import CliRunner
+from brag import journal
+from brag.cli import app
+from brag.doc_utils import add_entry, get_brag_doc_path, init_brag_doc, iter_entries
+
+runner = CliRunner()
+
+def messages():
+    return [entry.message for entry in iter_entries()]
+
+def journal_record(offset, line):
+    return journal.encode_record(journal.Record(offset, line))
+
+def crash_after_journal(lines, doc_tail=""):
+    """Journal lines as a crashed add would have, leaving doc_tail of them in the doc."""
+    brag_doc = get_brag_doc_path()
+    offset = os.path.getsize(brag_doc)
+    with open(journal.get_journal_path(brag_doc), "ab") as f:
+        for line in lines:
+            f.write(journal_record(offset, line))
+            offset += len(line.encode("utf-8")) + 1
+    with open(brag_doc, "a") as f:
+        f.write(doc_tail)
+
+def test_add_entry_empties_journal_once_durable(monkeypatch):
+    init_brag_doc()
+    add_entry("First")
+    assert os.path.getsize(journal.get_journal_path(get_brag_doc_path())) == 0
+    log = journal.Journal(get_brag_doc_path(), journal.GroupCommit(entries=2, ms=0))
+    log.append(["- [2024-01-01 10:00:00] Second\n"])
+    records, _ = journal.read_records(log.path)
+    assert [record.line[-6:] for record in records] == ["Second"]
+    assert messages() == ["First"]  # applied to the doc at group commit
+    log.append(["- [2024-01-01 10:00:01] Third\n"])
+    assert os.path.getsize(log.path) == 0
+    log.close()
+    assert messages() == ["First", "Second", "Third"]
+
+def test_recover_skips_journal_of_edited_doc():
+    init_brag_doc()
+    brag_doc = get_brag_doc_path()
+    lines = ["- [2024-01-01 10:00:00] One", "- [2024-01-01 10:00:01] Two"]
+    crash_after_journal(lines, doc_tail="".join(line + "\n" for line in lines))
+    with open(brag_doc, "r") as f:
+        content = f.read()
+    with open(brag_doc, "w") as f:
+        f.write(content.replace("# Brag Doc", "# Brags"))
+    assert journal.recover(brag_doc) == 0
+    assert messages() == ["One", "Two"]
+    assert os.path.getsize(journal.get_journal_path(brag_doc)) == 0
+
+def test_recover_does_not_restore_entries_deleted_by_hand():
+    init_brag_doc()
+    brag_doc = get_brag_doc_path()
+    lines = ["- [2024-01-01 10:00:00] One", "- [2024-01-01 10:00:01] Two"]
+    crash_after_journal(lines, doc_tail="".join(line + "\n" for line in lines))
+    with open(brag_doc, "r") as f:
+        content = f.read()
+    with open(brag_doc, "w") as f:
+        f.write(content.replace(lines[0] + "\n", ""))
+    assert journal.recover(brag_doc) == 0
+    assert messages() == ["Two"]
+
+def test_cli_edit_between_adds_does_not_duplicate():
+    runner.invoke(app, ["init"])
+    runner.invoke(app, ["add", "First"])
+    runner.invoke(app, ["add", "Second"])
+    brag_doc = get_brag_doc_path()
+    with open(brag_doc, "r") as f:
+        content = f.read()
+    with open(brag_doc, "w") as f:
+        f.write(content.replace("# Brag Doc", "# Brags"))
+    runner.invoke(app, ["category", "show"])
+    assert messages() == ["First", "Second"]
+
+def test_recover_replays_missing_records_and_truncates_torn_line():
+    init_brag_doc()
+    add_entry("Kept")
+    lines = ["- [2024-01-01 10:00:00] Lost one", "- [2024-01-01 10:00:01] Lost two"]
+    crash_after_journal(lines, doc_tail="- [2024-01-01 10:0")
+    assert journal.recover(get_brag_doc_path()) == 2
+    assert messages() == ["Kept", "Lost one", "Lost two"]
+    assert journal.recover(get_brag_doc_path()) == 0
+    assert messages() == ["Kept", "Lost one", "Lost two"]
+
+def test_recover_does_not_duplicate_applied_records():
+    init_brag_doc()
+    lines = ["- [2024-01-01 10:00:00] Applied", "- [2024-01-01 10:00:01] Missing"]
+    crash_after_journal(lines, doc_tail=lines[0] + "\n")
+    assert journal.recover(get_brag_doc_path()) == 1
+    assert messages() == ["Applied", "Missing"]
+
+def test_recover_drops_torn_journal_tail():
+    init_brag_doc()
+    brag_doc = get_brag_doc_path()
+    record = journal_record(os.path.getsize(brag_doc), "- [2024-01-01 10:00:00] Half written")
+    with open(journal.get_journal_path(brag_doc), "wb") as f:
+        f.write(record[:-6])
+    assert journal.recover(brag_doc) == 0
+    assert os.path.getsize(journal.get_journal_path(brag_doc)) == 0
+    assert messages() == []
+
+def test_corrupt_record_fails_checksum():
+    record = journal_record(0, "- [2024-01-01 10:00:00] Entry")
+    assert journal.decode_record(record) == journal.Record(0, "- [2024-01-01 10:00:00] Entry")
+    assert journal.decode_record(record.replace(b"Entry", b"Entri")) is None
+
+def test_group_commit_batches_fsyncs(monkeypatch):
+    init_brag_doc()
+    synced = []
+    monkeypatch.setattr(journal.os, "fsync", synced.append)
+    log = journal.Journal(get_brag_doc_path(), journal.GroupCommit(entries=3, ms=0))
+    for i in range(7):
+        log.append([f"- [2024-01-01 10:00:0{i}] Entry {i}\n"])
+    assert len(synced) == 4  # the journal, then the doc, per group
+    log.close()
+    assert len(synced) == 6
+    assert len(messages()) == 7
+
+def test_journal_is_durable_before_doc_is_touched(monkeypatch):
+    init_brag_doc()
+    brag_doc = get_brag_doc_path()
+    log_path = journal.get_journal_path(brag_doc)
+    synced = []
+
+    def fsync(fd):
+        with open(brag_doc) as f:
+            in_doc = "Durable" in f.read()
+        if os.fstat(fd).st_ino == os.stat(log_path).st_ino:
+            records, _ = journal.read_records(log_path)
+            synced.append(("journal", [record.line[-7:] for record in records], in_doc))
+        else:
+            synced.append(("doc", os.path.getsize(log_path) > 0, in_doc))
+
+    monkeypatch.setattr(journal.os, "fsync", fsync)
+    add_entry("Durable")
+    assert synced == [("journal", ["Durable"], False), ("doc", True, True)]
+    assert os.path.getsize(log_path) == 0
+
+def test_recover_commits_open_group():
+    init_brag_doc()
+    log = journal.get_journal(get_brag_doc_path())
+    log.policy = journal.GroupCommit(entries=32, ms=0)
+    log.append(["- [2024-01-01 10:00:00] Pending\n"])
+    assert messages() == []
+    assert journal.recover(get_brag_doc_path()) == 0
+    assert messages() == ["Pending"]
+    assert os.path.getsize(log.path) == 0
+
+def test_group_commit_from_env(monkeypatch):
+    monkeypatch.setenv("BRAG_GROUP_COMMIT", "16:5")
+    monkeypatch.setenv("BRAG_FSYNC", "0")
+    assert journal.group_commit_from_env() == journal.GroupCommit(16, 5, False)
+    monkeypatch.delenv("BRAG_GROUP_COMMIT")
+    monkeypatch.delenv("BRAG_FSYNC")
+    assert journal.group_commit_from_env() == journal.GroupCommit(1, 0, True)
+
+def test_cli_recovers_before_running_command():
+    init_brag_doc()
+    crash_after_journal(["- [2024-01-01 10:00:00] [Ops] Recovered"])
+    result = runner.invoke(app, ["history", "--format", "ndjson"])
+    assert "Recovered" in result.output
@@ -0,0 +1,94 @@
+import os
+import pytest
+from brag import ollama_utils
+
+class FakeResponse:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    """Record prompts sent to Ollama and answer with a canned response."""
+    prompts = []
+
+    def _post(url, json=None, **kwargs):
+        prompts.append(json["prompt"])
+        return FakeResponse({"response": f"- bullet {len(prompts)}"})
+
+    monkeypatch.setattr("brag.ollama_utils.requests.post", _post)
+    return prompts
+
+def test_group_entries_by_category():
+    lines = [
+        "# Brag Doc\n",
+        "- [2024-01-01 10:00:00] [Web] Built a site\n",
+        "- [2024-01-02 10:00:00] Wrote docs\n",
+        "- [2024-01-03 10:00:00] [Web] Shipped it\n",
+    ]
+    groups = ollama_utils.group_entries_by_category(lines)
+    assert list(groups) == ["Web", None]
+    assert len(groups["Web"]) == 2
+    assert groups[None] == ["- [2024-01-02 10:00:00] Wrote docs"]
+
+def test_per_category_bullets_stable_order(fake_ollama, write_entries):
+    write_entries([
+        "- [2024-01-01 10:00:00] Wrote docs",
+        "- [2024-01-02 10:00:00] [ml] Trained a model",
+        "- [2024-01-03 10:00:00] [API] Added endpoints",
+    ])
+    result = ollama_utils.generate_resume_bullets(per_category=True, max_workers=2)
+    headings = [line for line in result.splitlines() if line.startswith("## ")]
+    assert headings == ["## API", "## ml", "## Uncategorised"]
+    assert len(fake_ollama) == 3
+
+def test_per_category_bullets_only_regenerates_changed_category(fake_ollama, write_entries):
+    write_entries([
+        "- [2024-01-01 10:00:00] [API] Added endpoints",
+        "- [2024-01-02 10:00:00] [ML] Trained a model",
+    ])
+    ollama_utils.generate_resume_bullets(per_category=True)
+    assert len(fake_ollama) == 2
+
+    write_entries(["- [2024-01-03 10:00:00] [ML] Tuned the model"])
+    ollama_utils.generate_resume_bullets(per_category=True)
+    assert len(fake_ollama) == 3
+    assert "Tuned the model" in fake_ollama[-1]
+    assert "Added endpoints" not in fake_ollama[-1]
+
+def test_failed_generation_is_not_cached(monkeypatch, write_entries):
+    monkeypatch.setattr("brag.ollama_utils.requests.post", lambda *a, **k: FakeResponse({}))
+    write_entries(["- [2024-01-01 10:00:00] [API] Added endpoints"])
+    result = ollama_utils.generate_resume_bullets(per_category=True)
+    assert "No bullet points generated." in result
+    assert not os.path.exists(ollama_utils.get_response_cache_dir()) or not os.listdir(ollama_utils.get_response_cache_dir())
+
+def test_unreachable_ollama_queues_job_and_run_fills_cache(monkeypatch, write_entries):
+    def _refuse(*args, **kwargs):
+        raise ollama_utils.requests.exceptions.ConnectionError("connection refused")
+
+    monkeypatch.setattr("brag.ollama_utils.requests.post", _refuse)
+    write_entries(["- [2024-01-01 10:00:00] [API] Added endpoints"])
+    with pytest.raises(ollama_utils.OllamaUnavailableError) as excinfo:
+        ollama_utils.summarize_brag_doc()
+    with pytest.raises(ollama_utils.OllamaUnavailableError):
+        ollama_utils.summarize_brag_doc()
+    jobs = ollama_utils.load_jobs()
+    assert [job["id"] for job in jobs] == [excinfo.value.job_id]
+    assert jobs[0]["status"] == "pending"
+
+    # Server still down: the job stays queued.
+    assert ollama_utils.run_jobs()["pending"] == 1
+
+    calls = []
+    def _post(url, json=None, **kwargs):
+        calls.append(json["prompt"])
+        return FakeResponse({"response": "Queued summary"})
+
+    monkeypatch.setattr("brag.ollama_utils.requests.post", _post)
+    assert ollama_utils.run_jobs() == {"done": 1, "pending": 0, "failed": 0}
+    assert ollama_utils.load_jobs() == []
+    assert ollama_utils.summarize_brag_doc() == "Queued summary"
+    assert len(calls) == 1
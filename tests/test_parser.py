@@ -0,0 +1,85 @@
+import pytest
+from brag import parser
+from brag.category_utils import extract_categories_from_history, parse_brag_line
+from brag.doc_utils import parse_entry
+
+def test_parse_line_with_and_without_category():
+    assert parser.parse_line("- [2024-05-01 09:30:00] [Web Dev] Shipped the redesign\n") == (
+        "2024-05-01 09:30:00", "Web Dev", "Shipped the redesign"
+    )
+    assert parser.parse_line("- [2024-05-01 09:30:00] Shipped it") == ("2024-05-01 09:30:00", None, "Shipped it")
+    assert parser.parse_line("- [2024-05-01 09:30:00] [ Ops ]Fixed paging  \n") == (
+        "2024-05-01 09:30:00", "Ops", "Fixed paging"
+    )
+    assert parser.parse_line("- [2024-05-01 09:30:00] [] Empty category") == (
+        "2024-05-01 09:30:00", None, "Empty category"
+    )
+
+@pytest.mark.parametrize("line", [
+    "",
+    "\n",
+    "# Brag Doc\n",
+    "Plain text",
+    "- [2024-05-01 09:30:00]\n",  # no space before the message
+    "- [2024-05-01] Date without time",
+    "- [not a date] [ML] Broken",
+    "- [2024-5-1 09:30:00] Unpadded",
+    "-  [2024-05-01 09:30:00] Extra space",
+    "  - [2024-05-01 09:30:00] Indented",
+    "- [2024-05-01 09:30:00 Unclosed",
+])
+def test_malformed_lines_are_not_entries(line):
+    assert parser.parse_line(line) is None
+    assert parser.entry_day(line) is None
+    assert parse_entry(line) is None
+    assert parser.days_in(line) == []
+
+def test_parse_brag_line_splits_category_and_message():
+    assert parse_brag_line("- [2024-05-01 09:30:00] [ Web Dev ] Shipped it \n") == ("Web Dev", "Shipped it")
+    assert parse_brag_line("- [2024-05-01 09:30:00] Shipped it\n") == (None, "Shipped it")
+    assert parse_brag_line("# Brag Doc\n") == (None, "")
+
+def test_spans_locate_parts():
+    line = "- [2024-05-01 09:30:00] [Web] Shipped\n"
+    match = parser.match_entry(line)
+    assert line[slice(*match.span(parser.TIMESTAMP))] == "2024-05-01 09:30:00"
+    assert line[slice(*match.span(parser.CATEGORY))] == "Web"
+    assert line[slice(*match.span(parser.MESSAGE))] == "Shipped"
+    assert parser.match_entry("- [2024-05-01 09:30:00] x").span(parser.CATEGORY) == (-1, -1)
+
+def test_bulk_parsing_skips_malformed_lines():
+    buffer = (
+        "# Brag Doc\n\n"
+        "- [2024-01-01 10:00:00] [Web] One\n"
+        "- [broken] [ML] Two\n"
+        "- [2024-01-02 10:00:00] Three\n"
+        "- [2024-01-03 10:00:00] [ ML ] Four"
+    )
+    assert list(parser.iter_fields_in(buffer)) == [
+        ("2024-01-01 10:00:00", "Web", "One"),
+        ("2024-01-02 10:00:00", None, "Three"),
+        ("2024-01-03 10:00:00", "ML", "Four"),
+    ]
+    assert parser.days_in(buffer) == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert parser.heads_in(buffer) == [("2024-01-01", "Web"), ("2024-01-02", ""), ("2024-01-03", " ML ")]
+
+def test_bulk_and_per_line_parsers_agree():
+    lines = [
+        "- [2024-01-01 10:00:00] [Web] One\n",
+        "- [2024-01-02 10:00:00] Two",  # no trailing newline
+        "junk",
+        "- [2024-01-03 10:00:00] [ML] Three\n",
+    ]
+    assert list(parser.iter_fields_in("\n".join(lines))) == [
+        fields for fields in map(parser.parse_line, lines) if fields
+    ]
+    assert extract_categories_from_history(lines) == ["ML", "Web"]
+
+def test_days_at_byte_offsets_and_year_filter():
+    data = "# Brag Doc\n\n- [2020-06-01 10:00:00] Ünïcode\n- [2021-02-03 10:00:00] B\n- [2022-01-01 10:00:00] C\n".encode("utf-8")
+    found = list(parser.iter_days_at(data))
+    assert [day for _, day in found] == [b"2020-06-01", b"2021-02-03", b"2022-01-01"]
+    assert all(data[offset:].startswith(b"- [" + day) for offset, day in found)
+    assert [day for _, day in parser.iter_days_at(data, first=b"2021-01-01", last=b"2021-12-31")] == [b"2021-02-03"]
+    assert [day for _, day in parser.iter_days_at(data, end=found[2][0])] == [b"2020-06-01", b"2021-02-03"]
+    assert parser.days_in(data) == [b"2020-06-01", b"2021-02-03", b"2022-01-01"]
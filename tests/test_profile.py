@@ -0,0 +1,77 @@
+import os
+import json
+import pytest
+from typer.testing import CliRunner
+from brag import profile
+from brag.cli import app
+
+runner = CliRunner()
+
+def test_transaction_writes_once(monkeypatch):
+    profile.init_profile()
+    store = profile.get_profile_store()
+    writes = []
+    original = store._write
+    monkeypatch.setattr(store, "_write", lambda data: (writes.append(1), original(data)))
+    with store.transaction() as data:
+        profile.set_field(data, "name", "Ada")
+        profile.set_field(data, "contact.email", "ada@example.com")
+        profile.append_item(data, "skills", "Python")
+    assert len(writes) == 1
+    with open(profile.get_profile_path()) as f:
+        saved = json.load(f)
+    assert saved["name"] == "Ada"
+    assert saved["contact"]["email"] == "ada@example.com"
+    assert saved["skills"] == ["Python"]
+
+def test_update_fields_writes_catalogue_once(monkeypatch):
+    from brag import completion
+    saves = []
+    original = completion._save
+    monkeypatch.setattr(completion, "_save", lambda catalogue: (saves.append(1), original(catalogue)))
+    profile.update_profile_fields({"name": "Ada", "title": "Engineer", "contact.github": "ada"})
+    assert len(saves) == 1
+    used = completion.load_catalogue()["profile_fields"]
+    assert {field: usage["count"] for field, usage in used.items()} == {"name": 1, "title": 1, "contact.github": 1}
+
+def test_failed_transaction_leaves_file_untouched():
+    profile.update_profile_field("name", "Ada")
+    with pytest.raises(RuntimeError):
+        with profile.get_profile_store().transaction() as data:
+            data["name"] = "Grace"
+            raise RuntimeError("boom")
+    assert profile.get_profile()["name"] == "Ada"
+    directory = os.path.dirname(profile.get_profile_path())
+    assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+def test_cache_revalidates_on_external_change():
+    profile.update_profile_field("name", "Ada")
+    assert profile.get_profile()["name"] == "Ada"
+    path = profile.get_profile_path()
+    with open(path) as f:
+        data = json.load(f)
+    data["name"] = "Grace Hopper"
+    with open(path, "w") as f:
+        json.dump(data, f)
+    assert profile.get_profile()["name"] == "Grace Hopper"
+
+def test_get_profile_returns_copy():
+    profile.get_profile()["name"] = "Mutated"
+    assert profile.get_profile()["name"] == ""
+
+def test_remove_list_item_from_nested_field():
+    profile.add_list_item("contact.urls", "https://example.com")
+    assert profile.remove_list_item("contact.urls", 0) == "https://example.com"
+    assert profile.remove_list_item("contact.urls", 0) is None
+    assert profile.remove_list_item("missing.field", 0) is None
+
+def test_cli_profile_set():
+    result = runner.invoke(app, ["profile", "set", "name=Ada", "title=Engineer", "contact.github=ada"])
+    assert result.exit_code == 0
+    saved = profile.get_profile()
+    assert (saved["name"], saved["title"], saved["contact"]["github"]) == ("Ada", "Engineer", "ada")
+
+def test_cli_profile_set_rejects_bad_assignment():
+    result = runner.invoke(app, ["profile", "set", "name"])
+    assert result.exit_code == 1
+    assert "Use field=value" in result.output
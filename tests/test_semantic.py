@@ -0,0 +1,108 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from typer.testing import CliRunner
+from brag import semantic
+from brag.cli import app
+from brag.doc_utils import get_brag_doc_path, purge_entries_between
+
+runner = CliRunner()
+
+TOPICS = [
+    ("reliability", "outage", "uptime", "flaky", "incident", "on-call"),
+    ("css", "website", "react", "ui"),
+    ("model", "training", "dataset"),
+]
+
+def stub_vector(text):
+    """One dimension per topic, counting its words, plus a small constant one."""
+    words = text.lower().replace(":", " ").split()
+    return [sum(word in topic for word in words) for topic in TOPICS] + [0.1]
+
+@pytest.fixture
+def embed_server(monkeypatch):
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests_seen.append(body["input"])
+            data = json.dumps({"embeddings": [stub_vector(text) for text in body["input"]]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    monkeypatch.setattr(semantic, "OLLAMA_EMBED_URL", f"http://127.0.0.1:{server.server_port}/api/embed")
+    yield requests_seen
+    server.shutdown()
+    server.server_close()
+
+DOC = [
+    "- [2024-01-05 10:00:00] [Ops] Fixed the flaky deploy that caused an outage",
+    "- [2024-02-10 10:00:00] [Web] Rebuilt the website in React",
+    "- [2024-03-15 10:00:00] [ML] Trained a new model on the support dataset",
+    "- [2024-04-20 10:00:00] [Web] Cut incident count by adding uptime checks to the UI",
+]
+
+def messages(matches):
+    return [match.entry.message for match in matches]
+
+def test_search_ranks_by_meaning(embed_server, write_entries):
+    write_entries(DOC)
+    matches = semantic.semantic_search("reliability incidents on-call", k=2)
+    assert messages(matches) == [
+        "Fixed the flaky deploy that caused an outage",
+        "Cut incident count by adding uptime checks to the UI",
+    ]
+    assert matches[0].score >= matches[1].score
+
+def test_filters_apply_before_top_k(embed_server, write_entries):
+    write_entries(DOC)
+    assert messages(semantic.semantic_search("outage", k=1, category="web")) == [
+        "Cut incident count by adding uptime checks to the UI"
+    ]
+    assert messages(semantic.semantic_search("outage", k=5, until="2024-03-31"))[0] == (
+        "Fixed the flaky deploy that caused an outage"
+    )
+    assert semantic.semantic_search("outage", since="2025-01-01") == []
+
+def test_only_new_entries_are_embedded(embed_server, write_entries):
+    write_entries(DOC)
+    assert semantic.update_index() == 4
+    assert semantic.update_index() == 0
+    with open(get_brag_doc_path(), "a") as f:
+        f.write("- [2024-05-01 10:00:00] Wrote the incident runbook\n")
+    assert semantic.update_index() == 1
+    assert embed_server[-1] == ["Wrote the incident runbook"]
+    assert len(semantic.load_index().lines) == 5
+
+def test_purged_entries_drop_out_of_results(embed_server, write_entries):
+    write_entries(DOC)
+    semantic.update_index()
+    purge_entries_between("2024-01-01", "2024-01-31")
+    assert semantic.update_index() == 0
+    assert "Fixed the flaky deploy that caused an outage" not in messages(semantic.semantic_search("outage"))
+
+def test_unreachable_endpoint(monkeypatch, write_entries):
+    write_entries(DOC)
+    monkeypatch.setattr(semantic, "OLLAMA_EMBED_URL", "http://127.0.0.1:9/api/embed")
+    with pytest.raises(semantic.EmbeddingUnavailableError):
+        semantic.semantic_search("outage")
+    result = runner.invoke(app, ["search", "--semantic", "outage"])
+    assert result.exit_code == 1
+    assert "Could not get embeddings" in result.output
+
+def test_cli_semantic_search(embed_server, write_entries):
+    write_entries(DOC)
+    result = runner.invoke(app, ["search", "--semantic", "reliability", "--limit", "1", "--format", "ndjson"])
+    assert [json.loads(line)["message"] for line in result.output.splitlines()] == [
+        "Fixed the flaky deploy that caused an outage"
+    ]
@@ -0,0 +1,60 @@
+from datetime import date
+import numpy as np
+from brag.stats import load_entry_columns, filter_columns, compute_stats, format_stats, sparkline
+
+def test_compute_stats_buckets_and_streaks(write_entries):
+    write_entries([
+        "- [2024-01-01 09:00:00] [Web] One",
+        "- [2024-01-02 09:00:00] [Web] Two",
+        "- [2024-01-03 09:00:00] [ML] Three",
+        "- [2024-01-03 18:00:00] Four",
+        "- [2024-02-20 09:00:00] [ML] Five",
+        "- [not a date] [ML] Broken",
+    ])
+    stats = compute_stats(load_entry_columns(), trend_months=1, today=date(2024, 2, 21))
+    assert stats["total"] == 5
+    assert (stats["first"], stats["last"]) == ("2024-01-01", "2024-02-20")
+    assert stats["uncategorised"] == 1
+    assert stats["per_month"] == {"start": "2024-01", "counts": [4, 1]}
+    assert stats["per_week"]["start"] == "2024-01-01"
+    assert sum(stats["per_week"]["counts"]) == 5
+    assert [(c["category"], c["count"], c["recent"], c["previous"]) for c in stats["categories"]] == [
+        ("Web", 2, 0, 2), ("ML", 2, 1, 1)
+    ]
+    assert stats["streaks"]["longest"] == 3
+    assert stats["streaks"]["longest_start"] == "2024-01-01"
+    assert stats["streaks"]["current"] == 1
+    assert stats["busiest_months"][0] == {"month": "2024-01", "count": 4}
+    assert "Entries: 5" in format_stats(stats)
+
+def test_filter_columns_and_empty(write_entries):
+    write_entries(["- [2024-01-01 09:00:00] [Web] One", "- [2024-03-01 09:00:00] [Web] Two"])
+    columns = filter_columns(load_entry_columns(), since="2024-02-01")
+    assert columns.days.size == 1
+    assert compute_stats(filter_columns(columns, until="2024-01-01")) == {"total": 0}
+
+def test_date_range_skips_archive_blocks(write_entries, monkeypatch):
+    from brag import archive
+    from brag.cache import invalidate
+    write_entries([
+        "- [2020-01-01 09:00:00] [Web] Old",
+        "- [2020-06-01 09:00:00] [Web] Older",
+        "- [2024-01-01 09:00:00] [ML] New",
+        "- [2024-03-01 09:00:00] [ML] Newer",
+    ])
+    archive.archive_before("2021-01-01")
+    assert load_entry_columns().days.size == 4
+    invalidate()
+    read = []
+    real_decompress = archive._decompress
+    monkeypatch.setattr(archive, "_decompress", lambda path: read.append(path) or real_decompress(path))
+    assert load_entry_columns(since="2023-01-01").days.size == 2
+    assert read == []
+    assert load_entry_columns(since="2023-01-01", until="2024-02-01").days.size == 1
+    columns = load_entry_columns(until="2020-03-01")
+    assert (columns.days.size, len(read)) == (1, 1)
+
+def test_sparkline():
+    assert sparkline([0, 1, 2, 4]) == "▁▃▅█"
+    assert sparkline(np.zeros(3)) == "▁▁▁"
+    assert sparkline([]) == ""
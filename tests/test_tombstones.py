@@ -0,0 +1,124 @@
+import os
+from datetime import datetime
+import pytest
+from typer.testing import CliRunner
+from brag import tombstones
+from brag.archive import archive_before, load_blocks
+from brag.cli import app
+from brag.doc_utils import (
+    add_entry, get_brag_doc_path, iter_entries, purge_entries_between, read_history
+)
+
+runner = CliRunner()
+
+@pytest.fixture
+def seed_doc(write_entries):
+    write_entries([f"- [2024-01-{day:02d} 10:00:00] Entry {day}" for day in range(1, 11)])
+
+def messages(**filters):
+    return [entry.message for entry in iter_entries(**filters)]
+
+def test_purge_hides_entries_without_rewriting(seed_doc):
+    size = os.path.getsize(get_brag_doc_path())
+    assert purge_entries_between("2024-01-03", "2024-01-04").removed == 2
+    assert os.path.getsize(get_brag_doc_path()) == size
+    assert "Entry 3" not in messages()
+    assert messages(reverse=True)[:7] == [f"Entry {day}" for day in (10, 9, 8, 7, 6, 5, 2)]
+    assert not any("Entry 4" in line for line in read_history())
+    assert [t.generation for t in tombstones.load_tombstones()] == [1]
+
+def test_entries_added_after_purge_stay_visible(seed_doc):
+    today = datetime.now().strftime("%Y-%m-%d")
+    purge_entries_between("2024-01-10", today)
+    add_entry("Added after the purge")
+    assert messages()[-2:] == ["Entry 9", "Added after the purge"]
+
+def edit_doc(edit):
+    with open(get_brag_doc_path(), "r") as f:
+        content = f.read()
+    with open(get_brag_doc_path(), "w") as f:
+        f.write(edit(content))
+
+def test_purge_survives_hand_edits_before_it(seed_doc):
+    purge_entries_between("2024-01-03", "2024-01-04")
+    edit_doc(lambda content: content.replace("- [2024-01-01 10:00:00] Entry 1\n", ""))
+    with open(get_brag_doc_path(), "a") as f:
+        f.write("- [2024-01-03 18:00:00] Logged late\n")
+    assert messages() == ["Entry 2"] + [f"Entry {day}" for day in range(5, 11)] + ["Logged late"]
+    assert messages(reverse=True) == list(reversed(messages()))
+
+def test_purge_survives_lines_pulled_in_above_it(seed_doc):
+    purge_entries_between("2024-01-10", "2024-01-10")
+    pulled = "".join(f"- [2023-12-{day:02d} 10:00:00] Pulled {day}\n" for day in range(20, 31))
+    edit_doc(lambda content: content.replace("# Brag Doc\n\n", "# Brag Doc\n\n" + pulled))
+    assert "Entry 10" not in messages()
+    assert "Entry 10" not in messages(reverse=True)
+    assert len(messages()) == 20
+
+def test_undo_restores_newest_purge_first(seed_doc):
+    purge_entries_between("2024-01-01", "2024-01-01")
+    purge_entries_between("2024-01-05", "2024-01-05")
+    assert tombstones.undo_last().start == "2024-01-05"
+    assert "Entry 5" in messages()
+    assert "Entry 1" not in messages()
+    tombstones.undo_last()
+    assert tombstones.undo_last() is None
+    assert len(messages()) == 10
+
+def test_compaction_runs_past_threshold_and_is_final(seed_doc):
+    assert not purge_entries_between("2024-01-01", "2024-01-02").compacted
+    assert tombstones.load_tombstones()
+    assert purge_entries_between("2024-01-03", "2024-01-04").compacted  # 4 of 10 entries purged
+    assert tombstones.load_tombstones() == ()
+    with open(get_brag_doc_path()) as f:
+        content = f.read()
+    assert "Entry 1\n" not in content and "Entry 4" not in content and "Entry 5" in content
+    assert tombstones.undo_last() is None
+
+def test_tombstones_apply_to_archive_and_compaction_rewrites_blocks(seed_doc):
+    archive_before("2024-01-06")
+    purge_entries_between("2024-01-02", "2024-01-02")
+    assert messages()[:2] == ["Entry 1", "Entry 3"]
+    old_block = load_blocks()[0].file
+    assert tombstones.compact() == 1
+    assert load_blocks()[0].entries == 4
+    assert load_blocks()[0].file != old_block
+    assert messages()[:2] == ["Entry 1", "Entry 3"]
+
+def test_cached_readers_notice_tombstone_log_changes(seed_doc):
+    assert len(read_history()) == 12
+    log_path = tombstones.get_log_path()
+    tombstones._save(log_path, {"generation": 1, "tombstones": [
+        {"generation": 1, "start": "2024-01-01", "end": "2024-01-01",
+         "offset": os.path.getsize(get_brag_doc_path()), "entries": 1}
+    ]})
+    assert len(read_history()) == 11
+
+def test_cli_purge_undo_and_compact(seed_doc):
+    result = runner.invoke(app, ["purge", "--start", "2024-01-02", "--end", "2024-01-02"])
+    assert "Purged 1 entries" in result.output
+    assert "brag purge --undo" in result.output
+    result = runner.invoke(app, ["purge", "--undo"])
+    assert "Restored 1 entries between 2024-01-02 and 2024-01-02." in result.output
+    runner.invoke(app, ["purge", "--start", "2024-01-02", "--end", "2024-01-02"])
+    result = runner.invoke(app, ["compact"])
+    assert "removing 1 purged entries" in result.output
+    result = runner.invoke(app, ["purge", "--undo"])
+    assert result.exit_code == 1
+    assert "Nothing to undo" in result.output
+
+def test_cli_purge_hints_undo_only_while_possible(seed_doc):
+    result = runner.invoke(app, ["purge", "--start", "2024-01-01", "--end", "2024-01-10"])
+    assert "Purged 10 entries" in result.output
+    assert "can't be undone" in result.output
+    assert "brag purge --undo" not in result.output
+
+def test_cli_archive_warns_before_dropping_undo(seed_doc):
+    runner.invoke(app, ["purge", "--start", "2024-01-08", "--end", "2024-01-08"])
+    result = runner.invoke(app, ["archive", "--before", "2023-01-01"])
+    assert "no longer be undone" not in result.output
+    assert tombstones.load_tombstones()
+    result = runner.invoke(app, ["archive", "--before", "2024-01-03"])
+    assert "Archived 2 entries" in result.output
+    assert "earlier purges can no longer be undone" in result.output
+    assert runner.invoke(app, ["purge", "--undo"]).exit_code == 1
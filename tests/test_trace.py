@@ -0,0 +1,63 @@
+import json
+import pytest
+from typer.testing import CliRunner
+from brag import trace
+from brag.cli import app
+from brag.doc_utils import init_brag_doc, add_entry, read_history
+
+runner = CliRunner()
+
+@pytest.fixture(autouse=True)
+def tracing_off():
+    trace.disable()
+    yield
+    trace.disable()
+
+def test_disabled_spans_are_shared_no_ops():
+    assert trace.span("a") is trace.span("b", bytes=1)
+    with trace.span("a") as span:
+        span.set(entries=3)
+    assert trace.disable() == []
+
+def test_trace_file_gets_json_lines(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    trace.enable(str(path))
+    init_brag_doc()
+    add_entry("Traced entry")
+    read_history()
+    trace.disable()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    spans = {rec["span"]: rec for rec in records}
+    assert spans["doc.append"]["entries"] == 1
+    assert spans["doc.append"]["bytes"] > 0
+    assert spans["doc.read"]["parent"] == "doc.read_history"
+    assert spans["doc.read"]["depth"] == 1
+    assert all(rec["duration_ms"] >= 0 for rec in records)
+
+def test_span_records_errors():
+    trace.enable(collect=True)
+    with pytest.raises(ValueError):
+        with trace.span("boom"):
+            raise ValueError("x")
+    assert trace.stop_collecting()[0]["error"] == "ValueError"
+
+def test_summary_table():
+    table = trace.summary([
+        {"span": "doc.read", "duration_ms": 2.0, "bytes": 10},
+        {"span": "doc.read", "duration_ms": 4.0, "bytes": 5},
+        {"span": "cli.add", "duration_ms": 1.0},
+    ])
+    lines = table.splitlines()
+    assert lines[1].split()[:5] == ["doc.read", "2", "6.00", "3.00", "4.00"]
+    assert lines[1].split()[5] == "15"
+    assert lines[2].startswith("cli.add")
+
+def test_cli_profile_prints_summary():
+    with runner.isolated_filesystem():
+        runner.invoke(app, ["init"])
+        result = runner.invoke(app, ["--profile", "add", "Profiled entry"])
+    assert result.exit_code == 0
+    assert "Added entry: Profiled entry" in result.output
+    assert "cli.add" in result.output
+    assert "doc.append" in result.output
+    assert not trace.enabled()
@@ -0,0 +1,132 @@
+import os
+import json
+import multiprocessing
+import pytest
+from typer.testing import CliRunner
+from brag import workspace
+from brag.cli import app
+from brag.doc_utils import init_brag_doc
+
+runner = CliRunner()
+
+@pytest.fixture
+def team(tmp_path, write_entries):
+    """The default doc plus two registered workspaces with interleaved timestamps."""
+    write_entries([
+        "- [2024-01-01 10:00:00] [Web] Mine first",
+        "- [2024-03-01 10:00:00] [ML] Mine third",
+    ])
+    alice = str(tmp_path / "alice" / "bragdoc.md")
+    bob = str(tmp_path / "bob" / "bragdoc.md")
+    write_entries(["- [2024-02-01 10:00:00] [Web] Alice second"], alice)
+    write_entries([
+        "- [2024-01-15 10:00:00] [Infra] Bob fixed the deploy",
+        "- [2024-04-01 10:00:00] Bob fourth",
+    ], bob)
+    workspace.add_workspace("alice", alice)
+    workspace.add_workspace("bob", bob)
+    return {"alice": alice, "bob": bob}
+
+def test_registry_round_trip(team):
+    assert workspace.load_workspaces() == team
+    assert workspace.resolve_docs("alice") == [("alice", team["alice"])]
+    assert [name for name, _ in workspace.resolve_docs(all_docs=True)] == ["default", "alice", "bob"]
+    assert workspace.remove_workspace("alice")
+    assert not workspace.remove_workspace("alice")
+    with pytest.raises(workspace.WorkspaceError):
+        workspace.resolve_docs("alice")
+    with pytest.raises(workspace.WorkspaceError):
+        workspace.add_workspace("default", team["bob"])
+
+def test_merged_entries_in_timestamp_order(team):
+    docs = workspace.resolve_docs(all_docs=True)
+    merged = list(workspace.iter_merged_entries(docs, max_workers=2))
+    assert [entry.message for _, entry in merged] == [
+        "Mine first", "Bob fixed the deploy", "Alice second", "Mine third", "Bob fourth"
+    ]
+    newest = list(workspace.iter_merged_entries(docs, reverse=True, limit=2))
+    assert [(name, entry.message) for name, entry in newest] == [("bob", "Bob fourth"), ("default", "Mine third")]
+    web = list(workspace.iter_merged_entries(docs, category="web"))
+    assert [name for name, _ in web] == ["default", "alice"]
+
+def test_unlimited_merge_streams_docs_from_workers(team, tmp_path, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("unlimited queries must not collect whole docs in workers")
+
+    readers = tmp_path / "readers"
+    real_stream = workspace._DocQuery.stream
+
+    def stream(self, path):
+        with open(readers, "a") as f:
+            f.write(f"{os.getpid()}\n")
+        return real_stream(self, path)
+
+    monkeypatch.setattr(workspace, "map_docs", no_pool)
+    monkeypatch.setattr(workspace._DocQuery, "stream", stream)
+    monkeypatch.setattr(workspace, "WORKSPACE_CHUNK_ENTRIES", 1)
+    docs = workspace.resolve_docs(all_docs=True)
+    merged = workspace.iter_merged_entries(docs, max_workers=2)
+    name, entry = next(merged)
+    assert (name, entry.message) == ("default", "Mine first")
+    pids = readers.read_text().split()
+    assert len(pids) == 3 and len(set(pids)) == 3
+    assert str(os.getpid()) in pids  # the doc beyond max_workers is read in this process
+    assert [entry.message for _, entry in merged] == [
+        "Bob fixed the deploy", "Alice second", "Mine third", "Bob fourth"
+    ]
+    assert multiprocessing.active_children() == []
+    merged = workspace.iter_merged_entries(docs, reverse=True, max_workers=3)
+    assert next(merged)[1].message == "Bob fourth"
+    merged.close()  # stops the workers still streaming
+    assert multiprocessing.active_children() == []
+
+def test_cli_history_all_and_doc(team):
+    result = runner.invoke(app, ["history", "--all", "--format", "ndjson"])
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [row["doc"] for row in rows] == ["default", "bob", "alice", "default", "bob"]
+    result = runner.invoke(app, ["history", "--doc", "alice"])
+    assert "Alice second" in result.output
+    assert "Mine first" not in result.output
+    result = runner.invoke(app, ["history", "--doc", "nobody"])
+    assert result.exit_code == 1
+    assert "Unknown workspace" in result.output
+
+def test_cli_history_rejects_git_options_for_workspaces(team):
+    for args in (["--doc", "alice", "--with-commits"], ["--all", "--git-since", "2w"], ["--all", "--git-limit", "5"]):
+        result = runner.invoke(app, ["history", *args])
+        assert result.exit_code == 1
+        assert "can't be combined with --doc or --all" in result.output
+
+def test_cli_search(team):
+    result = runner.invoke(app, ["search", "bob", "--all"])
+    assert result.output.splitlines() == [
+        "bob: - [2024-04-01 10:00:00] Bob fourth",
+        "bob: - [2024-01-15 10:00:00] [Infra] Bob fixed the deploy",
+    ]
+    result = runner.invoke(app, ["search", "MINE first"])
+    assert result.output.strip() == "- [2024-01-01 10:00:00] [Web] Mine first"
+    result = runner.invoke(app, ["search", "nothing matches"])
+    assert "No matching entries found." in result.output
+
+def test_cli_stats_all(team):
+    result = runner.invoke(app, ["stats", "--all", "--format", "json"])
+    stats = json.loads(result.output)
+    assert stats["total"] == 5
+    assert {c["category"]: c["count"] for c in stats["categories"]} == {"Web": 2, "ML": 1, "Infra": 1}
+    assert stats["uncategorised"] == 1
+
+def test_cli_summarize_all_uses_every_doc(team, monkeypatch):
+    seen = []
+    monkeypatch.setattr("brag.ollama_utils.summarize_brag_doc", lambda lines=None: seen.append(lines) or "Team summary")
+    result = runner.invoke(app, ["summarize", "--all"])
+    assert "Team summary" in result.output
+    assert len(seen[0]) == 5
+
+def test_cli_workspace_commands(tmp_path):
+    init_brag_doc()
+    result = runner.invoke(app, ["workspace", "add", "proj", str(tmp_path / "proj.md")])
+    assert result.exit_code == 0
+    result = runner.invoke(app, ["workspace", "list"])
+    assert f"proj: {tmp_path / 'proj.md'}" in result.output
+    assert runner.invoke(app, ["workspace", "remove", "proj"]).exit_code == 0
+    assert runner.invoke(app, ["workspace", "remove", "proj"]).exit_code == 1